@@ -0,0 +1,542 @@
+"""Mesures de performance de l'application.
+
+Usage : python benchmark.py profils [--notes N]
+        python benchmark.py cohorte [--etudiants N]
+        python benchmark.py classement [--lignes N ...]
+        python benchmark.py export [--lignes N ...]
+        python benchmark.py ecole [--etudiants N] [--processus N ...]
+        python benchmark.py suite [--etudiants N ...] [--donnees DOSSIER] [--reference FICHIER]
+                                  [--enregistrer] [--tolerance T] [--tolerance-pic T] [--repetitions N]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from calcul_vectorise import (Cohorte, calculer, comparer_au_calcul_unitaire, ages,
+                              comparer_ages_au_calcul_unitaire)
+from database import Database, PROFILS, MATIERES_PAR_DEFAUT
+from generateur_ecole import TAILLES, generer_ecole
+from exportation import (exporter_lignes, exporter_ecole, exporter_classe, classes_ecole, format_export,
+                         ENTETES_TOUS_LES_ETUDIANTS)
+from importation import lire_lignes
+from journal_notes import JournalNotes
+from models import Etudiant, Matiere, Note, ResultatEtudiant
+
+
+def mesurer_commits_profil(profil: str, nombre_notes: int = 500) -> float:
+    """Retourne le nombre de commits par seconde de ajouter_note (une transaction par note)"""
+    with tempfile.TemporaryDirectory() as dossier:
+        db = Database(os.path.join(dossier, "bench.db"), profil=profil)
+        try:
+            matieres = db.get_matieres("Bac", "Informatique")
+            matricules = []
+            for i in range(nombre_notes // (3 * len(matieres)) + 1):
+                etudiant = Etudiant(f"ETU{i:06d}", f"Nom{i}", f"Prenom{i}", "2006-01-01", "F", "Informatique", "Bac")
+                db.ajouter_etudiant(etudiant)
+                matricules.append(etudiant.matricule)
+            notes = [
+                Note(None, matricule, matiere.id, 12.0, 14.0, trimestre)
+                for matricule in matricules for matiere in matieres for trimestre in (1, 2, 3)
+            ][:nombre_notes]
+
+            debut = time.perf_counter()
+            for note in notes:
+                db.ajouter_note(note)
+            duree = time.perf_counter() - debut
+        finally:
+            db.close()
+    return len(notes) / duree
+
+
+def bench_profils(nombre_notes: int):
+    print(f"{'Profil':<15} {'commits/s':>12}")
+    for profil in PROFILS:
+        print(f"{profil:<15} {mesurer_commits_profil(profil, nombre_notes):>12.0f}")
+
+
+def cohorte_synthetique(nombre_etudiants: int, niveau: str = "Bac", filiere: str = "Informatique",
+                        graine: int = 0) -> Cohorte:
+    """Cohorte aléatoire reproductible : notes au centième, quelques notes manquantes,
+    et une part de notes au quart de point qui produisent des demi-centièmes"""
+    aleatoire = np.random.default_rng(graine)
+    catalogue = [(nom, coef) for nom, coef, n, f in MATIERES_PAR_DEFAUT if (n, f) == (niveau, filiere)]
+    matieres = [Matiere(i, nom, coef, niveau, filiere) for i, (nom, coef) in enumerate(catalogue, 1)]
+    forme = (nombre_etudiants, len(matieres), 3)
+
+    def notes():
+        valeurs = aleatoire.integers(0, 2001, forme) / 100
+        quarts = aleatoire.integers(0, 81, forme) / 4
+        valeurs = np.where(aleatoire.random(forme) < 0.3, quarts, valeurs)
+        valeurs[aleatoire.random(forme) < 0.02] = np.nan
+        return valeurs
+
+    matricules = [f"ETU{i:07d}" for i in range(nombre_etudiants)]
+    return Cohorte(niveau, filiere, matricules, matieres, notes(), notes())
+
+
+def bench_cohorte(nombre_etudiants: int, corpus: int = 5000):
+    for niveau, filiere in (("Bac", "Informatique"), ("1ère année", "Tronc Commun")):
+        cohorte = cohorte_synthetique(corpus, niveau, filiere, graine=len(filiere))
+        ecarts = comparer_au_calcul_unitaire(cohorte, calculer(cohorte))
+        ecarts += comparer_au_calcul_unitaire(cohorte, calculer(cohorte, dense=True), dense=True)
+        print(f"Corpus {niveau} {filiere} ({corpus} étudiants) : {len(ecarts)} écart(s) avec le calcul unitaire")
+        for ecart in ecarts[:10]:
+            print(f"  {ecart}")
+
+    cohorte = cohorte_synthetique(nombre_etudiants)
+    debut = time.perf_counter()
+    calculer(cohorte)
+    duree = time.perf_counter() - debut
+    print(f"Calcul vectorisé de {nombre_etudiants} étudiants : {duree * 1000:.0f} ms")
+
+    # Âges : dates de naissance sur cinq ans, dont des 29 février
+    aleatoire = np.random.default_rng(nombre_etudiants)
+    naissances = np.datetime64("2004-01-01") + aleatoire.integers(0, 5 * 365, nombre_etudiants)
+
+    def etudiants():
+        return [Etudiant.from_row((f"ETU{i:07d}", "Nom", "Prenom", str(naissance), "F", "Informatique", "Bac"))
+                for i, naissance in enumerate(naissances)]
+
+    ecarts = comparer_ages_au_calcul_unitaire(etudiants())
+    liste = etudiants()
+    debut = time.perf_counter()
+    ages(liste)
+    duree_vectorisee = time.perf_counter() - debut
+    liste = etudiants()
+    debut = time.perf_counter()
+    [etudiant.age for etudiant in liste]
+    duree_unitaire = time.perf_counter() - debut
+    print(f"Âges de {nombre_etudiants} étudiants : {len(ecarts)} écart(s), vectorisé {duree_vectorisee * 1000:.0f} ms, "
+          f"un à un {duree_unitaire * 1000:.0f} ms")
+
+
+def classement_synthetique(nombre_etudiants: int):
+    """Classement trié de ResultatEtudiant, comme NotesWindow.charger_classement le construit"""
+    aleatoire = np.random.default_rng(nombre_etudiants)
+    classement = []
+    for i in range(nombre_etudiants):
+        trimestres = {t: round(float(m), 2) for t, m in zip((1, 2, 3), aleatoire.uniform(0, 20, 3))}
+        moyenne = (trimestres[1] + trimestres[2] + 2 * trimestres[3]) / 4
+        etudiant = Etudiant(f"ETU{i:07d}", f"Nom{i}", f"Prenom{i}", "2007-01-01", "F", "Informatique", "Bac")
+        classement.append(ResultatEtudiant(etudiant, {}, moyenne, 0, ResultatEtudiant.calculer_mention(moyenne),
+                                           0, trimestres))
+    classement.sort(key=lambda r: (-r.moyenne_generale, r.etudiant.nom, r.etudiant.prenom, r.etudiant.matricule))
+    for rang, resultat in enumerate(classement, 1):
+        resultat.rang = rang
+    return classement
+
+
+def _memoire_residente() -> int:
+    """Mémoire résidente du processus en octets (0 si /proc n'est pas disponible)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _table_widgets(classement):
+    """Ancienne implémentation : un QTableWidgetItem par cellule et un QPushButton par ligne"""
+    from PyQt5.QtWidgets import QPushButton, QTableWidget, QTableWidgetItem
+    from modeles_qt import COLONNES_CLASSEMENT
+
+    table = QTableWidget()
+    table.setColumnCount(len(COLONNES_CLASSEMENT))
+    table.setHorizontalHeaderLabels(COLONNES_CLASSEMENT)
+    table.setRowCount(len(classement))
+    for row, resultat in enumerate(classement):
+        etudiant = resultat.etudiant
+        moyennes_trim = resultat.moyennes_trimestres
+        valeurs = [
+            etudiant.matricule, etudiant.nom, etudiant.prenom, etudiant.date_naissance, etudiant.sexe,
+            f"{moyennes_trim.get(1, 0.0):.2f}", f"{moyennes_trim.get(2, 0.0):.2f}", f"{moyennes_trim.get(3, 0.0):.2f}",
+            f"{resultat.moyenne_generale:.2f}", resultat.mention,
+            ResultatEtudiant.calculer_decision(resultat.moyenne_generale, etudiant.niveau), str(resultat.rang),
+        ]
+        for col, valeur in enumerate(valeurs):
+            table.setItem(row, col, QTableWidgetItem(valeur))
+        bouton = QPushButton("Gérer les notes")
+        bouton.setStyleSheet("QPushButton { background-color: #2196F3; color: white; border: none; "
+                             "padding: 5px; border-radius: 3px; min-width: 100px; } "
+                             "QPushButton:hover { background-color: #1976D2; }")
+        bouton.clicked.connect(lambda checked, e=etudiant: None)
+        table.setCellWidget(row, 12, bouton)
+    return table
+
+
+def _table_modele(classement):
+    """Implémentation actuelle : ClassementTableModel et BoutonDelegue, sans widget par ligne"""
+    from PyQt5.QtWidgets import QTableView
+    from modeles_qt import BoutonDelegue, ClassementTableModel, COL_ACTION
+
+    table = QTableView()
+    modele = ClassementTableModel(table)
+    delegue = BoutonDelegue(table)
+    delegue.clique.connect(lambda row: None)
+    table.setModel(modele)
+    table.setItemDelegateForColumn(COL_ACTION, delegue)
+    modele.definir_classement(classement)
+    return table
+
+
+def bench_classement(tailles):
+    # Sans écran (serveur, CI), rendu hors écran
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    application = QApplication.instance() or QApplication([])
+
+    print(f"{'Lignes':>8} {'Implémentation':<18} {'remplissage':>12} {'affichage':>10} {'mémoire':>10}")
+    for taille in tailles:
+        classement = classement_synthetique(taille)
+        for nom, construire in (("widgets par ligne", _table_widgets), ("modèle + délégué", _table_modele)):
+            memoire = _memoire_residente()
+            debut = time.perf_counter()
+            table = construire(classement)
+            rempli = time.perf_counter()
+            table.resize(1200, 600)
+            table.show()
+            application.processEvents()
+            affiche = time.perf_counter()
+            memoire = (_memoire_residente() - memoire) / 2 ** 20
+            print(f"{taille:>8} {nom:<18} {(rempli - debut) * 1000:>10.0f} ms {(affiche - rempli) * 1000:>7.0f} ms"
+                  f" {memoire:>7.1f} Mo")
+            table.close()
+            table.deleteLater()
+            application.processEvents()
+
+
+def lignes_export_synthetiques(nombre: int):
+    for i in range(nombre):
+        moyenne = round(8 + (i % 1200) / 100, 2)
+        yield (f"ETU{i:06d}", f"Nom{i}", f"Prenom{i}", "2006-01-01", "F", "Bac", "Informatique",
+               moyenne, moyenne, moyenne, moyenne, ResultatEtudiant.calculer_mention(moyenne),
+               ResultatEtudiant.calculer_decision(moyenne, "Bac"))
+
+
+def _export_dataframe(chemin: str, nombre: int):
+    """Export historique : un dictionnaire par ligne, un DataFrame, puis to_excel"""
+    import pandas as pd
+    data = [dict(zip(ENTETES_TOUS_LES_ETUDIANTS, ligne)) for ligne in lignes_export_synthetiques(nombre)]
+    pd.DataFrame(data).to_excel(chemin, index=False)
+
+
+def bench_export(tailles):
+    """Durée et pic de mémoire Python (tracemalloc) de chaque méthode d'export"""
+    methodes = [
+        ("xlsx en flux", ".xlsx",
+         lambda chemin, n: exporter_lignes(chemin, ENTETES_TOUS_LES_ETUDIANTS, lignes_export_synthetiques(n))),
+        ("csv en flux", ".csv",
+         lambda chemin, n: exporter_lignes(chemin, ENTETES_TOUS_LES_ETUDIANTS, lignes_export_synthetiques(n))),
+    ]
+    try:
+        import pandas  # noqa: F401
+        methodes.insert(0, ("DataFrame", ".xlsx", _export_dataframe))
+    except ImportError:
+        print("pandas absent : export historique non mesuré")
+
+    print(f"{'Lignes':>8} {'Méthode':<14} {'durée':>10} {'pic mémoire':>12}")
+    with tempfile.TemporaryDirectory() as dossier:
+        for taille in tailles:
+            for nom, extension, exporter in methodes:
+                chemin = os.path.join(dossier, f"export_{taille}{extension}")
+                tracemalloc.start()
+                debut = time.perf_counter()
+                exporter(chemin, taille)
+                duree = time.perf_counter() - debut
+                _, pic = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(f"{taille:>8} {nom:<14} {duree:>8.2f} s {pic / 2 ** 20:>9.1f} Mo")
+
+
+def ecole_synthetique(db: Database, nombre_etudiants: int):
+    """Écrit etudiants.txt et les journaux de notes d'une école répartie sur toutes les classes (dossier courant)"""
+    aleatoire = random.Random(0)
+    classes = [(niveau, filiere) for niveau, filieres in Etudiant.FILIERES.items() for filiere in filieres]
+    matieres = {classe: [m.nom for m in db.get_matieres(*classe)] for classe in classes}
+    notes = {classe: [] for classe in classes}
+    with open("etudiants.txt", "w", encoding="utf-8") as f:
+        for i in range(nombre_etudiants):
+            niveau, filiere = classe = classes[i % len(classes)]
+            matricule = f"ETU{i:06d}"
+            f.write(f"{matricule}|Nom{i}|Prenom{i}|2006-01-01|F|{filiere}|{niveau}\n")
+            for matiere in matieres[classe]:
+                for trimestre in (1, 2, 3):
+                    notes[classe].append(((matricule, matiere, trimestre),
+                                          (aleatoire.randint(0, 40) / 2, aleatoire.randint(0, 40) / 2)))
+    for (niveau, filiere), enregistrements in notes.items():
+        JournalNotes.pour(niveau, filiere).ajouter(enregistrements)
+
+
+def bench_ecole(nombre_etudiants: int, tailles_pool):
+    """Export de toute l'école : une classe après l'autre dans le processus, puis pools de processus"""
+    print(f"{os.cpu_count()} cœur(s) disponible(s)")
+    origine = os.getcwd()
+    with tempfile.TemporaryDirectory() as dossier:
+        os.chdir(dossier)
+        try:
+            db = Database(os.path.join(dossier, "bench.db"))
+            ecole_synthetique(db, nombre_etudiants)
+
+            debut = time.perf_counter()
+            os.makedirs("sequentiel")
+            for (niveau, filiere), lignes in classes_ecole().items():
+                if lignes:
+                    chemin = os.path.join("sequentiel", f"{niveau}_{filiere}.{format_export(len(lignes))}")
+                    exporter_classe(niveau, filiere, lignes,
+                                    {m.nom: m.coefficient for m in db.get_matieres(niveau, filiere)}, chemin)
+            print(f"{'séquentiel':<14} {time.perf_counter() - debut:>8.2f} s")
+            reference = {fichier: list(lire_lignes(os.path.join("sequentiel", fichier)))
+                         for fichier in os.listdir("sequentiel")}
+
+            for taille in tailles_pool:
+                debut = time.perf_counter()
+                synthese = exporter_ecole(db, f"pool_{taille}", processus=taille)
+                duree = time.perf_counter() - debut
+                # Même contenu que le calcul séquentiel, classe par classe
+                for fichier in os.listdir(f"pool_{taille}"):
+                    if fichier != "synthese.xlsx":
+                        if list(lire_lignes(os.path.join(f"pool_{taille}", fichier))) != reference[fichier]:
+                            print(f"ÉCART dans {fichier}")
+                print(f"{f'{taille} processus':<14} {duree:>8.2f} s   {synthese}")
+            db.close()
+        finally:
+            os.chdir(origine)
+
+
+REFERENCE = "benchmark_reference.json"
+# Écarts ignorés quelle que soit la tolérance : bruit de mesure
+ECART_DUREE_MIN = 0.005   # secondes
+ECART_PIC_MIN = 2 ** 20   # octets
+TERMES_RECHERCHE = ("ben", "ines", "ma", "hédi", "ben sa", "mœller", "zzz")
+
+
+def _classe_principale(effectifs, db: Database):
+    """Classe la plus nombreuse parmi celles qui ont des matières (les notes portent sur elles)"""
+    classes = [classe for classe in effectifs if effectifs[classe] and db.get_matieres(*classe)]
+    return max(classes, key=lambda classe: effectifs[classe])
+
+
+def _effectifs(chemin_etudiants: str = "etudiants.txt"):
+    return {classe: len(lignes) for classe, lignes in classes_ecole(chemin_etudiants).items()}
+
+
+def _operations(application, fenetre, db: Database, niveau: str, filiere: str):
+    """(nom, préparation, opération) des chemins critiques, dans le dossier courant de l'école.
+
+    La préparation, non mesurée, vide les caches en mémoire : chaque mesure part des fichiers.
+    Les opérations unitaires portent sur un échantillon des 1000 premiers étudiants de la classe.
+    """
+    from taches import ControleTache, SignauxTache
+
+    controle = ControleTache(SignauxTache())
+    echantillon = [etudiant.matricule for etudiant in db.get_etudiants_by_niveau_filiere(niveau, filiere)[:1000]]
+
+    def vider_caches():
+        JournalNotes._journaux.clear()
+        fenetre.coefficients.clear()
+
+    def moyennes_trimestres():
+        for matricule in echantillon:
+            fenetre.calculer_moyennes_trimestres(matricule, niveau, filiere, db)
+
+    def charger_classement():
+        fenetre.charger_classement()
+        fenetre.taches.attendre()
+        application.processEvents()  # livre le résultat : afficher_classement
+        if len(fenetre.classement) != len(fenetre.etudiants) or not fenetre.classement:
+            raise RuntimeError("classement incomplet")
+
+    def exporter(ecrire):
+        def operation():
+            os.remove(ecrire())
+        return operation
+
+    return [
+        ("get_classement", None, lambda: db.get_classement(niveau, filiere)),
+        ("calculer_moyenne_generale", None, lambda: [db.calculer_moyenne_generale(m) for m in echantillon]),
+        ("calculer_moyennes_trimestres", vider_caches, moyennes_trimestres),
+        ("charger_classement", vider_caches, charger_classement),
+        ("rechercher_etudiants", None, lambda: [db.rechercher_etudiants(terme) for terme in TERMES_RECHERCHE]),
+        ("export_moyennes_classe", vider_caches, exporter(
+            lambda: fenetre.ecrire_moyennes_excel(controle, db, fenetre.etudiants, niveau, filiere))),
+        ("export_tous_les_etudiants", vider_caches, exporter(
+            lambda: fenetre.ecrire_tous_les_etudiants_excel(controle, db))),
+    ]
+
+
+def _mesurer(preparation, operation, repetitions: int):
+    """Meilleure durée (s) sur repetitions exécutions, puis pic de mémoire Python (octets) d'une exécution
+    supplémentaire sous tracemalloc, qui ralentit trop l'exécution pour être chronométrée"""
+    durees = []
+    for _ in range(repetitions):
+        if preparation:
+            preparation()
+        debut = time.perf_counter()
+        operation()
+        durees.append(time.perf_counter() - debut)
+    if preparation:
+        preparation()
+    tracemalloc.start()
+    try:
+        operation()
+        _, pic = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(durees), pic
+
+
+def mesurer_ecole(application, dossier: str, repetitions: int = 3):
+    """Mesure chaque chemin critique sur l'école du dossier ; retourne {opération: {"duree", "pic"}}.
+
+    application : la QApplication, qui doit survivre aux mesures de toutes les écoles.
+    """
+    origine = os.getcwd()
+    os.chdir(dossier)
+    try:
+        from database import GestionnaireConnexions
+        from notes_window import NotesWindow
+
+        db = Database()
+        niveau, filiere = _classe_principale(_effectifs(), db)
+        fenetre = NotesWindow(niveau=niveau, filiere=filiere)
+        fenetre.taches.attendre()
+        application.processEvents()
+        resultats = {}
+        try:
+            for nom, preparation, operation in _operations(application, fenetre, db, niveau, filiere):
+                duree, pic = _mesurer(preparation, operation, repetitions)
+                resultats[nom] = {"duree": round(duree, 5), "pic": pic}
+        finally:
+            fenetre.close()
+            application.processEvents()
+            db.close()
+            GestionnaireConnexions.fermer_tout()
+            JournalNotes._journaux.clear()
+        return resultats
+    finally:
+        os.chdir(origine)
+
+
+def _machine():
+    return {"systeme": platform.platform(), "processeur": platform.machine(), "coeurs": os.cpu_count(),
+            "python": platform.python_version(), "sqlite": sqlite3.sqlite_version}
+
+
+def _comparer(taille: int, resultats, reference, tolerance: float, tolerance_pic: float):
+    """Affiche les mesures d'une taille face à la référence ; retourne le nombre de régressions"""
+    regressions = 0
+    for nom, mesure in resultats.items():
+        ref = reference.get(nom)
+        colonnes = f"{taille:>7} {nom:<29} {mesure['duree'] * 1000:>9.1f} ms {mesure['pic'] / 2 ** 20:>8.1f} Mo"
+        if ref is None:
+            print(f"{colonnes}   (pas de référence)")
+            continue
+        ecart_duree = mesure["duree"] / ref["duree"] - 1 if ref["duree"] else 0.0
+        ecart_pic = mesure["pic"] / ref["pic"] - 1 if ref["pic"] else 0.0
+        lente = ecart_duree > tolerance and mesure["duree"] - ref["duree"] > ECART_DUREE_MIN
+        lourde = ecart_pic > tolerance_pic and mesure["pic"] - ref["pic"] > ECART_PIC_MIN
+        statut = " ".join(motif for motif, vrai in (("RÉGRESSION durée", lente), ("RÉGRESSION mémoire", lourde))
+                          if vrai) or "ok"
+        regressions += lente + lourde
+        print(f"{colonnes}   {ecart_duree:>+7.0%} {ecart_pic:>+7.0%}   {statut}")
+    return regressions
+
+
+def bench_suite(tailles, donnees=None, fichier_reference=REFERENCE, enregistrer=False, tolerance=0.5,
+                tolerance_pic=0.1, repetitions=3):
+    """Suite complète : une école générée par taille (réutilisée si donnees la contient déjà),
+    mesures de chaque chemin critique, comparaison à la référence ou enregistrement de celle-ci.
+
+    Les durées varient d'un lancement à l'autre, les pics de mémoire très peu : chacun sa tolérance.
+    Retourne le nombre de régressions.
+    """
+    reference = {}
+    if os.path.exists(fichier_reference):
+        with open(fichier_reference, encoding="utf-8") as f:
+            reference = json.load(f)
+        if not enregistrer and reference.get("machine") != _machine():
+            print(f"Attention : référence mesurée sur une autre machine ({reference.get('machine')})")
+
+    # Sans écran (serveur, CI), rendu hors écran
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    application = QApplication.instance() or QApplication([])
+
+    temporaire = None
+    if donnees is None:
+        temporaire = tempfile.TemporaryDirectory()
+        donnees = temporaire.name
+    try:
+        mesures = {}
+        print(f"{'Taille':>7} {'Opération':<29} {'durée':>12} {'pic':>11}   {'Δdurée':>7} {'Δpic':>7}")
+        regressions = 0
+        for taille in tailles:
+            dossier = os.path.join(donnees, f"ecole_{taille}")
+            if not os.path.exists(os.path.join(dossier, "etudiants.txt")):
+                generer_ecole(dossier, taille)
+            mesures[str(taille)] = mesurer_ecole(application, dossier, repetitions)
+            regressions += _comparer(taille, mesures[str(taille)],
+                                     reference.get("resultats", {}).get(str(taille), {}), tolerance, tolerance_pic)
+    finally:
+        if temporaire is not None:
+            temporaire.cleanup()
+
+    if enregistrer:
+        resultats = dict(reference.get("resultats", {}), **mesures)
+        with open(fichier_reference, "w", encoding="utf-8") as f:
+            json.dump({"machine": _machine(), "repetitions": repetitions, "resultats": resultats}, f,
+                      ensure_ascii=False, indent=2)
+        print(f"Référence enregistrée dans {fichier_reference}")
+        return 0
+    if regressions:
+        print(f"{regressions} régression(s) (tolérances : durée {tolerance:.0%}, mémoire {tolerance_pic:.0%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sous_commandes = parser.add_subparsers(dest="commande", required=True)
+    profils = sous_commandes.add_parser("profils", help="commits par seconde pour chaque profil de pragmas")
+    profils.add_argument("--notes", type=int, default=500)
+    cohorte = sous_commandes.add_parser("cohorte", help="calcul vectorisé : exactitude et durée")
+    cohorte.add_argument("--etudiants", type=int, default=100000)
+    classement = sous_commandes.add_parser("classement", help="tableau du classement : widgets par ligne ou délégué")
+    classement.add_argument("--lignes", type=int, nargs="+", default=[100, 1000, 10000])
+    export = sous_commandes.add_parser("export", help="export des moyennes : DataFrame ou écriture en flux")
+    export.add_argument("--lignes", type=int, nargs="+", default=[10000, 50000])
+    ecole = sous_commandes.add_parser("ecole", help="export de toute l'école : séquentiel ou pool de processus")
+    ecole.add_argument("--etudiants", type=int, default=20000)
+    ecole.add_argument("--processus", type=int, nargs="+", default=[1, 2, 4])
+    suite = sous_commandes.add_parser("suite", help="chemins critiques sur des écoles générées, face à une référence")
+    suite.add_argument("--etudiants", type=int, nargs="+", default=list(TAILLES))
+    suite.add_argument("--donnees", help="dossier où garder les écoles générées (temporaire par défaut)")
+    suite.add_argument("--reference", default=REFERENCE)
+    suite.add_argument("--enregistrer", action="store_true", help="remplace la référence par ces mesures")
+    suite.add_argument("--tolerance", type=float, default=0.5, help="écart de durée toléré (0.5 = 50 %%)")
+    suite.add_argument("--tolerance-pic", type=float, default=0.1, help="écart de pic de mémoire toléré")
+    suite.add_argument("--repetitions", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.commande == "profils":
+        bench_profils(args.notes)
+    elif args.commande == "cohorte":
+        bench_cohorte(args.etudiants)
+    elif args.commande == "classement":
+        bench_classement(args.lignes)
+    elif args.commande == "export":
+        bench_export(args.lignes)
+    elif args.commande == "ecole":
+        bench_ecole(args.etudiants, args.processus)
+    elif args.commande == "suite":
+        if bench_suite(args.etudiants, args.donnees, args.reference, args.enregistrer, args.tolerance,
+                       args.tolerance_pic, args.repetitions):
+            sys.exit(1)
@@ -0,0 +1,317 @@
+"""Calcul vectorisé des résultats d'une cohorte (niveau, filière) avec NumPy.
+
+Les notes sont rangées dans des tableaux étudiant × matière × trimestre, puis moyennes,
+crédits, mentions, décisions et rangs sont calculés en une passe pour toute la cohorte.
+
+Les résultats sont identiques à ceux du calcul unitaire (Note.moyenne,
+ResultatEtudiant.calculer_moyenne_annuelle, calculer_mention, calculer_decision) :
+les sommes suivent l'ordre des matières comme les boucles Python, et arrondir() reproduit
+round() de Python, y compris sur les demi-centièmes où np.round diverge.
+
+Les âges d'une liste d'étudiants sont calculés de la même façon (ages, ages_par_classe) :
+toutes les dates de naissance sont analysées d'un coup et comparées à une même date.
+"""
+import bisect
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models import Etudiant, Matiere, Note, ResultatEtudiant
+
+TRIMESTRES = (1, 2, 3)
+MENTIONS = [(16, "Très Bien"), (14, "Bien"), (12, "Assez Bien"), (10, "Passable")]
+
+
+def arrondir(valeurs: np.ndarray, decimales: int = 2) -> np.ndarray:
+    """Équivalent exact de round() de Python, élément par élément (NaN reste NaN).
+
+    np.round multiplie par 10**decimales puis arrondit : l'erreur de ce produit le fait
+    diverger de round() sur les demi-centièmes. Ici le produit est calculé sans erreur,
+    sous la forme p + e (découpage de Dekker), ce qui permet de savoir exactement de quel
+    côté du demi-centième tombe la valeur ; les cas exactement à mi-chemin sont arrondis
+    au pair, comme round().
+    """
+    valeurs = np.asarray(valeurs, dtype=float)
+    echelle = 10.0 ** decimales
+    produit = valeurs * echelle
+    # Erreur exacte du produit : valeurs = haut + bas, chacun sur 26 bits (echelle tient sur 26 bits)
+    c = 134217729.0 * valeurs
+    haut = c - (c - valeurs)
+    bas = valeurs - haut
+    erreur = (haut * echelle - produit) + bas * echelle
+
+    entier = np.floor(produit)
+    ecart = (produit - entier - 0.5) + erreur       # signe de (valeur exacte × echelle) - (entier + 0,5)
+    pair = np.floor(entier * 0.5) * 2 == entier
+    superieur = (ecart > 0) | ((ecart == 0) & ~pair)
+    return (entier + superieur) / echelle
+
+
+@dataclass
+class Cohorte:
+    """Notes d'une cohorte : note_cc et note_exam de forme (étudiants, matières, 3), NaN si absentes"""
+    niveau: str
+    filiere: str
+    matricules: List[str]
+    matieres: List[Matiere]
+    note_cc: np.ndarray
+    note_exam: np.ndarray
+
+    @classmethod
+    def depuis_notes(cls, niveau: str, filiere: str, matricules: List[str],
+                     matieres: List[Matiere], notes: Iterable[Note]) -> 'Cohorte':
+        # Ordre des matières de Database.calculer_moyenne_generale (par identifiant)
+        matieres = sorted(matieres, key=lambda m: m.id)
+        lignes = {matricule: i for i, matricule in enumerate(matricules)}
+        colonnes = {matiere.id: j for j, matiere in enumerate(matieres)}
+        forme = (len(matricules), len(matieres), len(TRIMESTRES))
+        note_cc = np.full(forme, np.nan)
+        note_exam = np.full(forme, np.nan)
+        for note in notes:
+            i = lignes.get(note.etudiant_matricule)
+            j = colonnes.get(note.matiere_id)
+            if i is None or j is None or note.note_cc is None or note.note_exam is None:
+                continue
+            note_cc[i, j, note.trimestre - 1] = note.note_cc
+            note_exam[i, j, note.trimestre - 1] = note.note_exam
+        return cls(niveau, filiere, list(matricules), matieres, note_cc, note_exam)
+
+    @classmethod
+    def charger(cls, db, niveau: str, filiere: str) -> 'Cohorte':
+        """Charge une cohorte depuis la base (trois requêtes, quel que soit le nombre d'étudiants)"""
+        matricules = [e.matricule for e in db.get_etudiants_by_niveau_filiere(niveau, filiere)]
+        notes = (
+            note
+            for notes_etudiant in db.get_notes_cohorte(niveau, filiere).values()
+            for notes_matiere in notes_etudiant.values()
+            for note in notes_matiere.values()
+        )
+        return cls.depuis_notes(niveau, filiere, matricules, db.get_matieres(niveau, filiere), notes)
+
+
+@dataclass
+class ResultatsCohorte:
+    """Résultats alignés sur Cohorte.matricules (NaN là où le calcul unitaire ne donne rien)"""
+    matricules: List[str]
+    moyennes_notes: np.ndarray        # (étudiants, matières, 3) : Note.moyenne
+    moyennes_trimestres: np.ndarray   # (étudiants, 3) : moyenne pondérée des notes du trimestre
+    moyennes_annuelles: np.ndarray    # (étudiants,) : calculer_moyenne_annuelle des trimestres
+    moyennes_matieres: np.ndarray     # (étudiants, matières) : calculer_moyenne_annuelle par matière
+    moyennes_generales: np.ndarray    # (étudiants,) : Database.calculer_moyenne_generale
+    credits: np.ndarray
+    mentions: np.ndarray
+    decisions: np.ndarray
+    rangs: np.ndarray
+
+    def resultat(self, index: int) -> Dict[str, object]:
+        """Résultats d'un étudiant sous forme de dictionnaire (pour l'affichage ou l'export)"""
+        return {
+            "matricule": self.matricules[index],
+            "moyennes_trimestres": {
+                t: float(m) for t, m in zip(TRIMESTRES, self.moyennes_trimestres[index]) if not np.isnan(m)
+            },
+            "moyenne_annuelle": float(self.moyennes_annuelles[index]),
+            "moyenne_generale": float(self.moyennes_generales[index]),
+            "credits": int(self.credits[index]),
+            "mention": str(self.mentions[index]),
+            "decision": str(self.decisions[index]),
+            "rang": int(self.rangs[index]),
+        }
+
+
+def _somme_ponderee(valeurs: np.ndarray, coefficients: np.ndarray):
+    """Σ valeur × coefficient et Σ coefficient sur l'axe des matières, en ignorant les NaN.
+
+    Accumulation matière par matière, dans le même ordre que les boucles Python,
+    pour obtenir exactement les mêmes flottants.
+    """
+    total = np.zeros(valeurs.shape[:1] + valeurs.shape[2:])
+    total_coef = np.zeros_like(total)
+    for j, coef in enumerate(coefficients):
+        presente = ~np.isnan(valeurs[:, j])
+        total = total + np.where(presente, valeurs[:, j] * coef, 0.0)
+        total_coef = total_coef + np.where(presente, coef, 0.0)
+    return total, total_coef
+
+
+def calculer_rangs(moyennes: np.ndarray, dense: bool = False) -> np.ndarray:
+    """Rang par moyenne décroissante ; les ex aequo partagent le rang (RANK ou DENSE_RANK)"""
+    if dense:
+        distinctes = np.unique(moyennes)
+        return len(distinctes) - np.searchsorted(distinctes, moyennes, side="left")
+    triees = np.sort(moyennes)
+    return len(moyennes) - np.searchsorted(triees, moyennes, side="right") + 1
+
+
+def calculer(cohorte: Cohorte, dense: bool = False) -> ResultatsCohorte:
+    """Calcule d'un bloc tous les résultats de la cohorte"""
+    coefficients = np.array([m.coefficient for m in cohorte.matieres], dtype=float)
+
+    moyennes_notes = arrondir(0.4 * cohorte.note_cc + 0.6 * cohorte.note_exam)
+
+    total, total_coef = _somme_ponderee(moyennes_notes, coefficients)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        moyennes_trimestres = arrondir(np.where(total_coef > 0, total / total_coef, np.nan))
+
+    t1, t2, t3 = moyennes_trimestres[:, 0], moyennes_trimestres[:, 1], moyennes_trimestres[:, 2]
+    moyennes_annuelles = arrondir((t1 + t2 + (2 * t3)) / 4)
+    moyennes_annuelles[np.isnan(moyennes_annuelles)] = 0.0
+
+    n1, n2, n3 = moyennes_notes[:, :, 0], moyennes_notes[:, :, 1], moyennes_notes[:, :, 2]
+    moyennes_matieres = arrondir((n1 + n2 + (2 * n3)) / 4)
+
+    total, total_coef = _somme_ponderee(moyennes_matieres, coefficients)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        moyennes_generales = arrondir(np.where(total_coef > 0, total / total_coef, 0.0))
+    admises = np.nan_to_num(moyennes_matieres, nan=-1.0) >= 10
+    credits = (admises * coefficients).sum(axis=1).astype(int)
+
+    mentions = np.select(
+        [moyennes_generales >= seuil for seuil, _ in MENTIONS],
+        [mention for _, mention in MENTIONS],
+        default="Insuffisant",
+    )
+    if cohorte.niveau.lower() == "bac":
+        decisions = np.where(moyennes_generales >= 10, "Admis",
+                             np.where(moyennes_generales >= 7.0, "Contrôle", "Refusé"))
+    else:
+        decisions = np.where(moyennes_generales >= 10, "Admis", "Refusé")
+
+    return ResultatsCohorte(
+        matricules=cohorte.matricules,
+        moyennes_notes=moyennes_notes,
+        moyennes_trimestres=moyennes_trimestres,
+        moyennes_annuelles=moyennes_annuelles,
+        moyennes_matieres=moyennes_matieres,
+        moyennes_generales=moyennes_generales,
+        credits=credits,
+        mentions=mentions,
+        decisions=decisions,
+        rangs=calculer_rangs(moyennes_generales, dense),
+    )
+
+
+def comparer_au_calcul_unitaire(cohorte: Cohorte, resultats: ResultatsCohorte, dense: bool = False) -> List[str]:
+    """Refait le calcul étudiant par étudiant avec le code des modèles et liste les écarts"""
+    ecarts = []
+    generales = []
+    for i, matricule in enumerate(cohorte.matricules):
+        totaux = {t: 0 for t in TRIMESTRES}
+        coefs = {t: 0 for t in TRIMESTRES}
+        total_points = total_coef = credits = 0
+        for j, matiere in enumerate(cohorte.matieres):
+            moyennes_matiere = {}
+            for t in TRIMESTRES:
+                cc, exam = cohorte.note_cc[i, j, t - 1], cohorte.note_exam[i, j, t - 1]
+                if np.isnan(cc) or np.isnan(exam):
+                    continue
+                note = Note(None, matricule, matiere.id, float(cc), float(exam), t)
+                moyennes_matiere[t] = note.moyenne
+                totaux[t] += note.moyenne * matiere.coefficient
+                coefs[t] += matiere.coefficient
+            if len(moyennes_matiere) == 3:
+                moyenne_matiere = ResultatEtudiant.calculer_moyenne_annuelle(moyennes_matiere)
+                total_points += moyenne_matiere * matiere.coefficient
+                total_coef += matiere.coefficient
+                if moyenne_matiere >= 10:
+                    credits += matiere.coefficient
+        trimestres = {t: round(totaux[t] / coefs[t], 2) for t in TRIMESTRES if coefs[t] > 0}
+        generale = round(total_points / total_coef, 2) if total_coef else 0.0
+        generales.append(generale)
+
+        attendu = {
+            "matricule": matricule,
+            "moyennes_trimestres": trimestres,
+            "moyenne_annuelle": ResultatEtudiant.calculer_moyenne_annuelle(trimestres),
+            "moyenne_generale": generale,
+            "credits": credits,
+            "mention": ResultatEtudiant.calculer_mention(generale),
+            "decision": ResultatEtudiant.calculer_decision(generale, cohorte.niveau),
+        }
+        obtenu = resultats.resultat(i)
+        for cle, valeur in attendu.items():
+            if obtenu[cle] != valeur:
+                ecarts.append(f"{matricule} {cle}: attendu {valeur!r}, obtenu {obtenu[cle]!r}")
+
+    # Rang = 1 + nombre de moyennes (distinctes si dense) strictement supérieures
+    triees = sorted(set(generales) if dense else generales)
+    for i, generale in enumerate(generales):
+        rang = len(triees) - bisect.bisect_right(triees, generale) + 1
+        if resultats.rangs[i] != rang:
+            ecarts.append(f"{cohorte.matricules[i]} rang: attendu {rang}, obtenu {resultats.rangs[i]}")
+    return ecarts
+
+
+def _naissances(etudiants: Sequence[Etudiant]) -> np.ndarray:
+    """Dates de naissance en datetime64[D], NaT là où Etudiant.naissance est None"""
+    chaines = np.array([etudiant.date_naissance for etudiant in etudiants], dtype=str)
+    try:
+        naissances = chaines.astype("datetime64[D]")
+        # NumPy accepte des formats que strptime refuse (« 2006-01 ») : ils sont repris un à un
+        if (naissances.astype(str) == chaines).all():
+            return naissances
+    except ValueError:
+        pass
+    return np.array([etudiant.naissance for etudiant in etudiants], dtype="datetime64[D]")
+
+
+def ages(etudiants: Sequence[Etudiant], au: Optional[date] = None) -> np.ndarray:
+    """Âge de chaque étudiant à la date au (aujourd'hui par défaut), comme Etudiant.age_au ;
+    NaN si la date de naissance est invalide"""
+    au = au or date.today()
+    if not etudiants:
+        return np.empty(0)
+    naissances = _naissances(etudiants)
+    invalides = np.isnat(naissances)
+    naissances[invalides] = np.datetime64(au, "D")
+    annees = naissances.astype("datetime64[Y]").astype(int) + 1970
+    debuts_mois = naissances.astype("datetime64[M]")
+    mois = debuts_mois.astype(int) % 12 + 1
+    jours = (naissances - debuts_mois).astype(int) + 1
+    # Un an de moins si l'anniversaire n'est pas encore passé à la date au
+    resultat = (au.year - annees - ((au.month * 100 + au.day) < (mois * 100 + jours))).astype(float)
+    resultat[invalides] = np.nan
+    return resultat
+
+
+def ages_par_classe(etudiants: Sequence[Etudiant], au: Optional[date] = None) -> Dict[Tuple[str, str], Dict[str, float]]:
+    """Effectif, âge moyen, minimum et maximum de chaque classe (niveau, filière) à la date au.
+
+    Les étudiants dont la date de naissance est invalide comptent dans l'effectif, pas dans les âges.
+    """
+    valeurs = ages(etudiants, au)
+    indices = {}
+    codes = np.array([indices.setdefault((e.niveau, e.filiere), len(indices)) for e in etudiants], dtype=int)
+    valides = ~np.isnan(valeurs)
+    effectifs = np.bincount(codes, minlength=len(indices))
+    nombres = np.bincount(codes[valides], minlength=len(indices))
+    sommes = np.bincount(codes[valides], weights=valeurs[valides], minlength=len(indices))
+    minimums = np.full(len(indices), np.inf)
+    maximums = np.full(len(indices), -np.inf)
+    np.minimum.at(minimums, codes[valides], valeurs[valides])
+    np.maximum.at(maximums, codes[valides], valeurs[valides])
+
+    statistiques = {}
+    for classe, i in indices.items():
+        avec_age = nombres[i] > 0
+        statistiques[classe] = {
+            "effectif": int(effectifs[i]),
+            "age_moyen": round(float(sommes[i] / nombres[i]), 2) if avec_age else None,
+            "age_min": int(minimums[i]) if avec_age else None,
+            "age_max": int(maximums[i]) if avec_age else None,
+        }
+    return statistiques
+
+
+def comparer_ages_au_calcul_unitaire(etudiants: Sequence[Etudiant], au: Optional[date] = None) -> List[str]:
+    """Refait le calcul des âges étudiant par étudiant (Etudiant.age_au) et liste les écarts"""
+    au = au or date.today()
+    ecarts = []
+    for etudiant, age in zip(etudiants, ages(etudiants, au)):
+        attendu = etudiant.age_au(au)
+        obtenu = None if np.isnan(age) else int(age)
+        if obtenu != attendu:
+            ecarts.append(f"{etudiant.matricule} âge: attendu {attendu!r}, obtenu {obtenu!r}")
+    return ecarts
@@ -1,175 +1,521 @@
 import sqlite3
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
-from models import Etudiant, Matiere, Note, ResultatEtudiant
+from typing import List, Dict, Optional, Tuple, Iterable, Callable
+from models import Etudiant, Matiere, Note, ResultatEtudiant, RapportImport
 import os
+import atexit
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager, nullcontext
+from metriques import chronometrer_methodes
+from migrations import (appliquer_migrations, requete_recalcul_etudiants, REQUETE_REMPLISSAGE_MOYENNES,
+                        REQUETE_REMPLISSAGE_RECHERCHE, MARQUE_MOYENNES_DIFFEREES)
 
 class DatabaseError(Exception):
     """Classe d'exception personnalisée pour les erreurs de base de données"""
     pass
 
+# Recalcul complet des moyennes d'un niveau/filière à partir des notes brutes :
+# moyenne de chaque note (40% CC + 60% Exam), moyennes trimestrielles pondérées,
+# moyenne annuelle par matière (T1 + T2 + 2×T3) / 4, moyenne générale et crédits.
+# Sert de référence à Database.verifier_moyennes ; en fonctionnement normal ces valeurs
+# sont lues dans moyennes_etudiants, tenue à jour par les déclencheurs (migration 3).
+# arrondi() est la fonction round de Python enregistrée sur la connexion : le round natif
+# de SQLite arrondit autrement les demi-centièmes (14.545 -> 14.55 au lieu de 14.54).
+REQUETE_RECALCUL_MOYENNES = """
+WITH notes_cohorte AS (
+    SELECT n.etudiant_matricule AS matricule,
+           n.matiere_id,
+           n.trimestre,
+           m.coefficient,
+           arrondi(0.4 * n.note_cc + 0.6 * n.note_exam, 2) AS moyenne
+    FROM etudiants e
+    JOIN notes n ON n.etudiant_matricule = e.matricule
+    JOIN matieres m ON m.id = n.matiere_id
+    WHERE e.niveau = :niveau AND e.filiere = :filiere
+      AND n.note_cc IS NOT NULL AND n.note_exam IS NOT NULL
+),
+moyennes_trimestres AS (
+    SELECT matricule,
+           arrondi(sum(CASE WHEN trimestre = 1 THEN moyenne * coefficient END) * 1.0
+                 / sum(CASE WHEN trimestre = 1 THEN coefficient END), 2) AS t1,
+           arrondi(sum(CASE WHEN trimestre = 2 THEN moyenne * coefficient END) * 1.0
+                 / sum(CASE WHEN trimestre = 2 THEN coefficient END), 2) AS t2,
+           arrondi(sum(CASE WHEN trimestre = 3 THEN moyenne * coefficient END) * 1.0
+                 / sum(CASE WHEN trimestre = 3 THEN coefficient END), 2) AS t3
+    FROM notes_cohorte
+    GROUP BY matricule
+),
+moyennes_matieres AS (
+    SELECT matricule,
+           coefficient,
+           arrondi((sum(CASE WHEN trimestre = 1 THEN moyenne END)
+                  + sum(CASE WHEN trimestre = 2 THEN moyenne END)
+                  + 2 * sum(CASE WHEN trimestre = 3 THEN moyenne END)) / 4, 2) AS moyenne
+    FROM notes_cohorte
+    GROUP BY matricule, matiere_id
+    HAVING count(*) = 3
+),
+moyennes_generales AS (
+    SELECT matricule,
+           arrondi(sum(moyenne * coefficient) * 1.0 / sum(coefficient), 2) AS moyenne,
+           sum(CASE WHEN moyenne >= 10 THEN coefficient ELSE 0 END) AS credits
+    FROM moyennes_matieres
+    GROUP BY matricule
+)
+SELECT t.matricule, t.t1, t.t2, t.t3,
+       coalesce(arrondi((t.t1 + t.t2 + 2 * t.t3) / 4, 2), 0.0) AS moyenne_annuelle,
+       coalesce(g.moyenne, 0.0) AS moyenne,
+       coalesce(g.credits, 0) AS credits
+FROM moyennes_trimestres t
+LEFT JOIN moyennes_generales g ON g.matricule = t.matricule
+"""
+
+# Classement d'un niveau/filière à partir des moyennes matérialisées
+REQUETE_CLASSEMENT = """
+SELECT e.matricule, e.nom, e.prenom, e.date_naissance, e.sexe, e.filiere, e.niveau,
+       coalesce(g.moyenne, 0.0) AS moyenne,
+       coalesce(g.credits, 0) AS credits,
+       g.t1, g.t2, g.t3,
+       {fonction_rang}() OVER (ORDER BY coalesce(g.moyenne, 0.0) DESC) AS rang
+FROM etudiants e
+LEFT JOIN moyennes_etudiants g ON g.matricule = e.matricule
+WHERE e.niveau = :niveau AND e.filiere = :filiere
+ORDER BY rang, e.nom, e.prenom
+"""
+
+def _arrondi(valeur, decimales):
+    """round de Python exposé à SQLite (NULL reste NULL)"""
+    if valeur is None:
+        return None
+    return round(valeur, decimales)
+
+# Marque placée devant chaque mot indexé : « ^^du » ne se trouve qu'en début de mot
+MARQUE_DEBUT_MOT = "^^"
+
+def mots_recherche(texte) -> List[str]:
+    """Mots d'un texte en minuscules et sans accents : 'Ben-Salah Élise' -> ['ben', 'salah', 'elise']"""
+    texte = unicodedata.normalize("NFKD", str(texte or ""))
+    texte = "".join(c for c in texte if not unicodedata.combining(c)).casefold()
+    return [mot for mot in re.split(r"[\W_]+", texte) if mot]
+
+def _texte_recherche(texte):
+    """Texte indexé par etudiants_recherche, exposé à SQLite sous le nom texte_recherche"""
+    return " ".join(MARQUE_DEBUT_MOT + mot for mot in mots_recherche(texte))
+
+def _construire_catalogue_matieres():
+    """Catalogue par défaut des matières : (nom, coefficient, niveau, filière)"""
+    matieres = [
+        # 1ère Année Secondaire (Tronc Commun)
+        ('Arabe', 2, '1ère année', 'Tronc Commun'),
+        ('Français', 2, '1ère année', 'Tronc Commun'),
+        ('Anglais', 2, '1ère année', 'Tronc Commun'),
+        ('Mathématiques', 3, '1ère année', 'Tronc Commun'),
+        ('Physique-Chimie', 2, '1ère année', 'Tronc Commun'),
+        ('Sciences de la Vie et de la Terre', 2, '1ère année', 'Tronc Commun'),
+        ('Histoire-Géographie', 1, '1ère année', 'Tronc Commun'),
+        ('Éducation islamique', 1, '1ère année', 'Tronc Commun'),
+        ('Informatique', 1, '1ère année', 'Tronc Commun'),
+        ('Philosophie', 1, '1ère année', 'Tronc Commun'),
+    ]
+
+    # Matières communes pour 2ème année, 3ème année et Bac
+    niveaux = ['2ème année', '3ème année', 'Bac']
+    for niveau in niveaux:
+        # Sciences Expérimentales
+        matieres.extend([
+            ('Arabe', 2, niveau, 'Sciences Expérimentales'),
+            ('Français', 2, niveau, 'Sciences Expérimentales'),
+            ('Anglais', 2, niveau, 'Sciences Expérimentales'),
+            ('Mathématiques', 4, niveau, 'Sciences Expérimentales'),
+            ('Physique-Chimie', 4, niveau, 'Sciences Expérimentales'),
+            ('Sciences de la Vie et de la Terre', 4, niveau, 'Sciences Expérimentales'),
+            ('Philosophie', 1, niveau, 'Sciences Expérimentales'),
+        ])
+
+        # Mathématiques
+        matieres.extend([
+            ('Arabe', 2, niveau, 'Mathématiques'),
+            ('Français', 2, niveau, 'Mathématiques'),
+            ('Anglais', 2, niveau, 'Mathématiques'),
+            ('Mathématiques', 6, niveau, 'Mathématiques'),
+            ('Physique-Chimie', 5, niveau, 'Mathématiques'),
+            ('Sciences Industrielles', 3, niveau, 'Mathématiques'),
+            ('Philosophie', 1, niveau, 'Mathématiques'),
+        ])
+
+        # Lettres
+        matieres.extend([
+            ('Arabe', 4, niveau, 'Lettres'),
+            ('Français', 3, niveau, 'Lettres'),
+            ('Anglais', 2, niveau, 'Lettres'),
+            ('Histoire-Géographie', 3, niveau, 'Lettres'),
+            ('Philosophie', 3, niveau, 'Lettres'),
+            ('Mathématiques', 1, niveau, 'Lettres'),
+        ])
+
+        # Économie et Gestion
+        matieres.extend([
+            ('Arabe', 2, niveau, 'Économie et Gestion'),
+            ('Français', 2, niveau, 'Économie et Gestion'),
+            ('Anglais', 2, niveau, 'Économie et Gestion'),
+            ('Mathématiques', 3, niveau, 'Économie et Gestion'),
+            ('Économie', 4, niveau, 'Économie et Gestion'),
+            ('Gestion', 4, niveau, 'Économie et Gestion'),
+            ('Mathématiques Financières', 3, niveau, 'Économie et Gestion'),
+        ])
+
+        # Technique
+        matieres.extend([
+            ('Arabe', 2, niveau, 'Technique'),
+            ('Français', 2, niveau, 'Technique'),
+            ('Anglais', 2, niveau, 'Technique'),
+            ('Mathématiques', 3, niveau, 'Technique'),
+            ('Physique-Chimie', 2, niveau, 'Technique'),
+            ('Sciences Techniques', 6, niveau, 'Technique'),
+            ('Informatique', 1, niveau, 'Technique'),
+        ])
+
+        # Informatique
+        matieres.extend([
+            ('Arabe', 2, niveau, 'Informatique'),
+            ('Français', 2, niveau, 'Informatique'),
+            ('Anglais', 2, niveau, 'Informatique'),
+            ('Mathématiques', 4, niveau, 'Informatique'),
+            ('Physique', 2, niveau, 'Informatique'),
+            ('Informatique', 6, niveau, 'Informatique'),
+            ('Algorithmes', 3, niveau, 'Informatique'),
+            ('Base de données', 3, niveau, 'Informatique'),
+            ('Programmation', 4, niveau, 'Informatique'),
+        ])
+    return matieres
+
+MATIERES_PAR_DEFAUT = _construire_catalogue_matieres()
+# Empreinte du catalogue : le seed n'est rejoué que si elle change
+EMPREINTE_CATALOGUE = hashlib.sha1(repr(MATIERES_PAR_DEFAUT).encode("utf-8")).hexdigest()
+
+# Profils de performance appliqués à chaque connexion.
+# - interactif : WAL (les lectures ne bloquent plus l'écriture), synchronous=NORMAL
+#   (pas de fsync à chaque commit en WAL, durabilité garantie au checkpoint), checkpoint en tâche de fond
+# - import_massif : synchronisation désactivée et gros cache, pour les imports rejouables
+# - classique : journal rollback historique, à utiliser si la base est sur un partage réseau (WAL non supporté)
+PROFILS = {
+    "interactif": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -8000,            # en Kio
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 1000,
+        "checkpoint_inactivite": 5.0,   # secondes sans écriture avant un checkpoint de fond
+    },
+    "import_massif": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 10000,
+        "checkpoint_inactivite": None,
+    },
+    "classique": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "wal_autocheckpoint": 1000,
+        "checkpoint_inactivite": None,
+    },
+}
+PROFIL_PAR_DEFAUT = "interactif"
+PRAGMAS_PROFIL = ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "wal_autocheckpoint")
+
+
+class _CheckpointInactivite(threading.Thread):
+    """Fil de fond qui vide le WAL dans la base quand aucune écriture n'a eu lieu depuis un moment.
+
+    L'activité est déduite de la date de modification du fichier -wal, ce qui évite
+    d'instrumenter chaque écriture.
+    """
+
+    def __init__(self, db_name: str, delai: float):
+        super().__init__(name="checkpoint-wal", daemon=True)
+        self.db_name = db_name
+        self.delai = delai
+        self._arret = threading.Event()
+
+    def run(self):
+        chemin_wal = self.db_name + "-wal"
+        dernier_checkpoint = 0.0
+        conn = sqlite3.connect(self.db_name)
+        try:
+            while not self._arret.wait(self.delai):
+                try:
+                    modification = os.path.getmtime(chemin_wal)
+                except OSError:
+                    continue
+                inactif = time.time() - modification >= self.delai
+                if inactif and modification > dernier_checkpoint:
+                    # PASSIVE n'attend jamais les lecteurs ni l'écrivain en cours
+                    conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+                    dernier_checkpoint = time.time()
+        except sqlite3.Error:
+            pass  # Le prochain autocheckpoint de SQLite prendra le relais
+        finally:
+            conn.close()
+
+    def arreter(self):
+        self._arret.set()
+        self.join(timeout=1.0)
+
+
+def _convertir_note(valeur, libelle: str) -> Optional[float]:
+    """Convertit une note brute (nombre, texte avec virgule ou vide) en float"""
+    if valeur is None or (isinstance(valeur, str) and not valeur.strip()):
+        return None
+    try:
+        return float(str(valeur).strip().replace(',', '.'))
+    except ValueError:
+        raise ValueError(f"Note {libelle} invalide : {valeur}")
+
+def _preparer_note(element) -> Note:
+    """Construit (et valide) une Note à partir d'une Note ou d'un tuple brut
+    (matricule, matiere_id, note_cc, note_exam, trimestre)"""
+    if isinstance(element, Note):
+        return element
+    matricule, matiere_id, note_cc, note_exam, trimestre = element
+    try:
+        matiere_id = int(matiere_id)
+    except (TypeError, ValueError):
+        raise ValueError(f"Matière inconnue : {matiere_id}")
+    try:
+        trimestre = int(trimestre)
+    except (TypeError, ValueError):
+        raise ValueError(f"Trimestre invalide : {trimestre}")
+    return Note(
+        id=None,
+        etudiant_matricule=str(matricule or '').strip(),
+        matiere_id=matiere_id,
+        note_cc=_convertir_note(note_cc, "CC"),
+        note_exam=_convertir_note(note_exam, "d'examen"),
+        trimestre=trimestre
+    )
+
+class GestionnaireConnexions:
+    """Connexions SQLite partagées par toutes les fenêtres de l'application.
+
+    Un gestionnaire par fichier de base : chaque fil d'exécution reçoit sa propre connexion
+    (créée à la première utilisation). Les utilisateurs (Database) sont comptés par fil : la
+    connexion d'un fil est fermée quand la dernière Database créée dans ce fil est libérée, et
+    toutes les connexions quand le dernier utilisateur se libère ou à la sortie de l'application.
+
+    Les connexions sont rangées par identifiant de fil et non dans un threading.local : PyQt
+    ne conserve pas l'état Python d'un fil de QThreadPool d'une tâche à l'autre, chaque tâche
+    aurait ouvert une connexion jamais refermée.
+    """
+    _gestionnaires: Dict[str, 'GestionnaireConnexions'] = {}
+    _verrou_classe = threading.Lock()
+
+    def __init__(self, db_name: str):
+        self.db_name = db_name
+        self.schema_a_jour = False
+        self.profil = PROFIL_PAR_DEFAUT
+        self._checkpoint: Optional[_CheckpointInactivite] = None
+        self._connexions: Dict[int, sqlite3.Connection] = {}   # par identifiant de fil
+        self._references = 0
+        self._references_fil: Dict[int, int] = {}
+        self._verrou = threading.Lock()
+
+    @classmethod
+    def pour(cls, db_name: str) -> 'GestionnaireConnexions':
+        """Retourne le gestionnaire associé à un fichier de base (créé au besoin)"""
+        cle = db_name if db_name == ':memory:' else os.path.abspath(db_name)
+        with cls._verrou_classe:
+            if cle not in cls._gestionnaires:
+                cls._gestionnaires[cle] = cls(db_name)
+            return cls._gestionnaires[cle]
+
+    @classmethod
+    def fermer_tout(cls):
+        """Ferme toutes les connexions de tous les gestionnaires (sortie de l'application)"""
+        with cls._verrou_classe:
+            gestionnaires = list(cls._gestionnaires.values())
+        for gestionnaire in gestionnaires:
+            gestionnaire.fermer()
+
+    def acquerir(self) -> int:
+        """Compte un utilisateur dans le fil courant ; retourne le fil à passer à liberer"""
+        fil = threading.get_ident()
+        with self._verrou:
+            self._references += 1
+            self._references_fil[fil] = self._references_fil.get(fil, 0) + 1
+        return fil
+
+    def liberer(self, fil: int):
+        conn = None
+        with self._verrou:
+            self._references -= 1
+            dernier = self._references <= 0
+            restantes = self._references_fil.get(fil, 1) - 1
+            if restantes > 0:
+                self._references_fil[fil] = restantes
+            else:
+                # Plus personne dans ce fil (tâche terminée) : sa connexion est fermée
+                self._references_fil.pop(fil, None)
+                conn = self._connexions.pop(fil, None)
+        if dernier:
+            self.fermer()
+        elif conn is not None:
+            conn.close()
+
+    def connexion(self) -> sqlite3.Connection:
+        """Retourne la connexion du fil d'exécution courant"""
+        fil = threading.get_ident()
+        conn = self._connexions.get(fil)
+        if conn is None:
+            # check_same_thread=False uniquement pour permettre la fermeture depuis le fil
+            # principal ; chaque connexion n'est utilisée que par le fil qui l'a créée
+            conn = sqlite3.connect(self.db_name, check_same_thread=False)
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.create_function("arrondi", 2, _arrondi, deterministic=True)
+            conn.create_function("texte_recherche", 1, _texte_recherche, deterministic=True)
+            self._appliquer_pragmas(conn)
+            with self._verrou:
+                self._connexions[fil] = conn
+                self._demarrer_checkpoint()
+        return conn
+
+    def appliquer_profil(self, nom: str):
+        """Change le profil de performance de toutes les connexions ouvertes et à venir"""
+        if nom not in PROFILS:
+            raise DatabaseError(f"Profil inconnu : {nom} (profils disponibles : {', '.join(PROFILS)})")
+        with self._verrou:
+            self.profil = nom
+            connexions = list(self._connexions.values())
+            self._arreter_checkpoint()
+        for conn in connexions:
+            self._appliquer_pragmas(conn)
+        with self._verrou:
+            if self._connexions:
+                self._demarrer_checkpoint()
+
+    def regler_connexion(self, conn: sqlite3.Connection, nom: str):
+        """Applique un profil à une seule connexion, sans changer le profil du gestionnaire"""
+        if nom not in PROFILS:
+            raise DatabaseError(f"Profil inconnu : {nom} (profils disponibles : {', '.join(PROFILS)})")
+        self._appliquer_pragmas(conn, nom)
+
+    def _appliquer_pragmas(self, conn: sqlite3.Connection, nom: Optional[str] = None):
+        reglages = PROFILS[nom or self.profil]
+        if self.db_name == ':memory:':
+            return
+        for pragma in PRAGMAS_PROFIL:
+            # Valeurs internes au module, jamais issues d'une saisie utilisateur
+            conn.execute(f"PRAGMA {pragma} = {reglages[pragma]}").fetchall()
+
+    def _demarrer_checkpoint(self):
+        delai = PROFILS[self.profil]["checkpoint_inactivite"]
+        if delai and self._checkpoint is None and self.db_name != ':memory:':
+            self._checkpoint = _CheckpointInactivite(self.db_name, delai)
+            self._checkpoint.start()
+
+    def _arreter_checkpoint(self):
+        if self._checkpoint is not None:
+            self._checkpoint.arreter()
+            self._checkpoint = None
+
+    def fermer(self):
+        with self._verrou:
+            connexions, self._connexions = self._connexions, {}
+            # Les fils qui reviendraient ensuite recréent leur connexion
+            self._references = 0
+            self._references_fil = {}
+            self._arreter_checkpoint()
+        for conn in connexions.values():
+            conn.close()
+
+
+atexit.register(GestionnaireConnexions.fermer_tout)
+
 class Database:
-    def __init__(self, db_name='etudiants.db'):
+    def __init__(self, db_name='etudiants.db', profil: Optional[str] = None):
+        self._gestionnaire = GestionnaireConnexions.pour(db_name)
+        self._fil = self._gestionnaire.acquerir()
+        self._ferme = False
         try:
-            self.conn = sqlite3.connect(db_name)
-            self.conn.execute("PRAGMA foreign_keys = ON")
-            self.create_tables()
-        except sqlite3.Error as e:
+            if profil is not None:
+                self._gestionnaire.appliquer_profil(profil)
+            if not self._gestionnaire.schema_a_jour:
+                self.create_tables()
+                self._gestionnaire.schema_a_jour = True
+        except (sqlite3.Error, DatabaseError) as e:
+            self.close()
             raise DatabaseError(f"Erreur lors de la connexion à la base de données: {str(e)}")
 
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connexion partagée du fil d'exécution courant"""
+        return self._gestionnaire.connexion()
+
+    @property
+    def profil(self) -> str:
+        return self._gestionnaire.profil
+
+    def appliquer_profil(self, nom: str):
+        """Sélectionne un profil de performance (voir PROFILS)"""
+        self._gestionnaire.appliquer_profil(nom)
+
+    @contextmanager
+    def profil_temporaire(self, nom: str):
+        """Applique un profil à la connexion du fil courant le temps d'un bloc.
+
+        Les connexions des autres fils (la fenêtre principale pendant un import en
+        tâche de fond, par exemple) gardent le profil du gestionnaire.
+        """
+        conn = self.conn
+        self._gestionnaire.regler_connexion(conn, nom)
+        try:
+            yield self
+        finally:
+            self._gestionnaire.regler_connexion(conn, self.profil)
+
     def create_tables(self):
-        # Supprimer les anciennes tables si elles existent
-        self.conn.executescript("""
-            DROP TABLE IF EXISTS notes;
-            DROP TABLE IF EXISTS matieres;
-            DROP TABLE IF EXISTS etudiants;
-        """)
-        
-        queries = [
-            """
-            CREATE TABLE IF NOT EXISTS etudiants (
-                matricule TEXT PRIMARY KEY,
-                nom TEXT NOT NULL CHECK(length(nom) > 0),
-                prenom TEXT NOT NULL CHECK(length(prenom) > 0),
-                date_naissance DATE NOT NULL,
-                sexe TEXT NOT NULL CHECK(sexe IN ('F', 'H')),
-                filiere TEXT NOT NULL,
-                niveau TEXT NOT NULL
-            )
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS matieres (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nom TEXT NOT NULL,
-                coefficient INTEGER NOT NULL CHECK(coefficient > 0),
-                niveau TEXT NOT NULL,
-                filiere TEXT NOT NULL,
-                UNIQUE(nom, niveau, filiere)
-            )
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS notes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                etudiant_matricule TEXT NOT NULL,
-                matiere_id INTEGER NOT NULL,
-                trimestre INTEGER NOT NULL CHECK(trimestre IN (1, 2, 3)),
-                note_cc REAL CHECK(note_cc >= 0 AND note_cc <= 20),
-                note_exam REAL CHECK(note_exam >= 0 AND note_exam <= 20),
-                FOREIGN KEY (etudiant_matricule) REFERENCES etudiants(matricule) ON DELETE CASCADE,
-                FOREIGN KEY (matiere_id) REFERENCES matieres(id) ON DELETE CASCADE,
-                UNIQUE(etudiant_matricule, matiere_id, trimestre)
-            )
-            """
-        ]
-        
+        """Met le schéma à jour (migrations versionnées) puis synchronise le catalogue des matières"""
         try:
-            for query in queries:
-                self.conn.execute(query)
-            self.conn.commit()
-            
-            # Ajouter les matières par défaut
+            appliquer_migrations(self.conn)
             self.ajouter_matieres_par_defaut()
         except sqlite3.Error as e:
             raise DatabaseError(f"Erreur lors de la création des tables: {str(e)}")
 
     def ajouter_matieres_par_defaut(self):
-        matieres = [
-            # 1ère Année Secondaire (Tronc Commun)
-            ('Arabe', 2, '1ère année', 'Tronc Commun'),
-            ('Français', 2, '1ère année', 'Tronc Commun'),
-            ('Anglais', 2, '1ère année', 'Tronc Commun'),
-            ('Mathématiques', 3, '1ère année', 'Tronc Commun'),
-            ('Physique-Chimie', 2, '1ère année', 'Tronc Commun'),
-            ('Sciences de la Vie et de la Terre', 2, '1ère année', 'Tronc Commun'),
-            ('Histoire-Géographie', 1, '1ère année', 'Tronc Commun'),
-            ('Éducation islamique', 1, '1ère année', 'Tronc Commun'),
-            ('Informatique', 1, '1ère année', 'Tronc Commun'),
-            ('Philosophie', 1, '1ère année', 'Tronc Commun'),
-        ]
-
-        # Matières communes pour 2ème année, 3ème année et Bac
-        niveaux = ['2ème année', '3ème année', 'Bac']
-        for niveau in niveaux:
-            # Sciences Expérimentales
-            matieres.extend([
-                ('Arabe', 2, niveau, 'Sciences Expérimentales'),
-                ('Français', 2, niveau, 'Sciences Expérimentales'),
-                ('Anglais', 2, niveau, 'Sciences Expérimentales'),
-                ('Mathématiques', 4, niveau, 'Sciences Expérimentales'),
-                ('Physique-Chimie', 4, niveau, 'Sciences Expérimentales'),
-                ('Sciences de la Vie et de la Terre', 4, niveau, 'Sciences Expérimentales'),
-                ('Philosophie', 1, niveau, 'Sciences Expérimentales'),
-            ])
-
-            # Mathématiques
-            matieres.extend([
-                ('Arabe', 2, niveau, 'Mathématiques'),
-                ('Français', 2, niveau, 'Mathématiques'),
-                ('Anglais', 2, niveau, 'Mathématiques'),
-                ('Mathématiques', 6, niveau, 'Mathématiques'),
-                ('Physique-Chimie', 5, niveau, 'Mathématiques'),
-                ('Sciences Industrielles', 3, niveau, 'Mathématiques'),
-                ('Philosophie', 1, niveau, 'Mathématiques'),
-            ])
-
-            # Lettres
-            matieres.extend([
-                ('Arabe', 4, niveau, 'Lettres'),
-                ('Français', 3, niveau, 'Lettres'),
-                ('Anglais', 2, niveau, 'Lettres'),
-                ('Histoire-Géographie', 3, niveau, 'Lettres'),
-                ('Philosophie', 3, niveau, 'Lettres'),
-                ('Mathématiques', 1, niveau, 'Lettres'),
-            ])
-
-            # Économie et Gestion
-            matieres.extend([
-                ('Arabe', 2, niveau, 'Économie et Gestion'),
-                ('Français', 2, niveau, 'Économie et Gestion'),
-                ('Anglais', 2, niveau, 'Économie et Gestion'),
-                ('Mathématiques', 3, niveau, 'Économie et Gestion'),
-                ('Économie', 4, niveau, 'Économie et Gestion'),
-                ('Gestion', 4, niveau, 'Économie et Gestion'),
-                ('Mathématiques Financières', 3, niveau, 'Économie et Gestion'),
-            ])
-
-            # Technique
-            matieres.extend([
-                ('Arabe', 2, niveau, 'Technique'),
-                ('Français', 2, niveau, 'Technique'),
-                ('Anglais', 2, niveau, 'Technique'),
-                ('Mathématiques', 3, niveau, 'Technique'),
-                ('Physique-Chimie', 2, niveau, 'Technique'),
-                ('Sciences Techniques', 6, niveau, 'Technique'),
-                ('Informatique', 1, niveau, 'Technique'),
-            ])
-
-            # Informatique
-            matieres.extend([
-                ('Arabe', 2, niveau, 'Informatique'),
-                ('Français', 2, niveau, 'Informatique'),
-                ('Anglais', 2, niveau, 'Informatique'),
-                ('Mathématiques', 4, niveau, 'Informatique'),
-                ('Physique', 2, niveau, 'Informatique'),
-                ('Informatique', 6, niveau, 'Informatique'),
-                ('Algorithmes', 3, niveau, 'Informatique'),
-                ('Base de données', 3, niveau, 'Informatique'),
-                ('Programmation', 4, niveau, 'Informatique'),
-            ])
-        
-        query = "INSERT OR IGNORE INTO matieres (nom, coefficient, niveau, filiere) VALUES (?, ?, ?, ?)"
-        try:
-            self.conn.executemany(query, matieres)
-            self.conn.commit()
-        except sqlite3.Error:
-            pass  # Ignorer les erreurs si les matières existent déjà
+        """Insère ou met à jour le catalogue des matières, seulement s'il a changé depuis le dernier seed"""
+        cursor = self.conn.execute("SELECT valeur FROM parametres WHERE cle = 'empreinte_catalogue'")
+        row = cursor.fetchone()
+        if row and row[0] == EMPREINTE_CATALOGUE:
+            return
+
+        query = """
+        INSERT INTO matieres (nom, coefficient, niveau, filiere) VALUES (?, ?, ?, ?)
+        ON CONFLICT(nom, niveau, filiere) DO UPDATE SET coefficient = excluded.coefficient
+        """
+        with self.conn:
+            self.conn.executemany(query, MATIERES_PAR_DEFAUT)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO parametres (cle, valeur) VALUES ('empreinte_catalogue', ?)",
+                (EMPREINTE_CATALOGUE,)
+            )
 
     def get_matieres(self, niveau: str, filiere: str) -> List[Matiere]:
         """Récupère toutes les matières pour un niveau et une filière donnés"""
         query = "SELECT * FROM matieres WHERE niveau = ? AND filiere = ?"
         try:
             cursor = self.conn.execute(query, (niveau, filiere))
-            return [Matiere(*row) for row in cursor.fetchall()]
+            return [Matiere.from_row(row) for row in cursor.fetchall()]
         except sqlite3.Error as e:
             raise DatabaseError(f"Erreur lors de la récupération des matières: {str(e)}")
 
@@ -192,14 +538,154 @@ class Database:
         except sqlite3.Error as e:
             raise DatabaseError(f"Erreur lors de l'ajout de la note: {str(e)}")
 
+    def ajouter_notes_bulk(self, notes: Iterable, taille_lot: int = 500, premier_numero: int = 1,
+                           apres_lot: Optional[Callable[[List[Note]], None]] = None,
+                           niveau: Optional[str] = None, filiere: Optional[str] = None) -> RapportImport:
+        """Ajoute ou met à jour un grand nombre de notes.
+
+        Chaque élément est une Note ou un tuple brut (matricule, matiere_id, note_cc, note_exam, trimestre) ;
+        None est ignoré (ligne vide) mais compte dans la numérotation.
+        Les éléments sont validés par lots de taille_lot puis enregistrés avec executemany, un lot par
+        transaction. Une ligne invalide est consignée dans le rapport (numérotée à partir de
+        premier_numero) sans interrompre l'import. apres_lot reçoit les notes de chaque lot validé.
+        Avec niveau et filiere, seules les matières et les étudiants de cette classe sont acceptés.
+        """
+        query = """
+        INSERT INTO notes (etudiant_matricule, matiere_id, trimestre, note_cc, note_exam)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(etudiant_matricule, matiere_id, trimestre)
+        DO UPDATE SET note_cc = excluded.note_cc, note_exam = excluded.note_exam
+        """
+        rapport = RapportImport()
+        try:
+            if niveau is None:
+                matieres = {row[0] for row in self.conn.execute("SELECT id FROM matieres")}
+            else:
+                matieres = {row[0] for row in self.conn.execute(
+                    "SELECT id FROM matieres WHERE niveau = ? AND filiere = ?", (niveau, filiere))}
+            classe = None if niveau is None else (niveau, filiere)
+            lot = []
+            for numero, element in enumerate(notes, premier_numero):
+                if element is None:
+                    continue  # ligne vide d'un fichier importé
+                try:
+                    lot.append((numero, _preparer_note(element)))
+                except (ValueError, TypeError) as e:
+                    rapport.erreurs.append((numero, str(e)))
+                if len(lot) >= taille_lot:
+                    self._enregistrer_lot_notes(query, lot, matieres, classe, rapport, apres_lot)
+                    lot = []
+            if lot:
+                self._enregistrer_lot_notes(query, lot, matieres, classe, rapport, apres_lot)
+            rapport.erreurs.sort()
+            return rapport
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Erreur lors de l'ajout des notes: {str(e)}")
+
+    def _enregistrer_lot_notes(self, query, lot, matieres, classe, rapport, apres_lot):
+        matricules = {note.etudiant_matricule for _, note in lot}
+        marques = ','.join('?' * len(matricules))
+        existants = {
+            row[0]: (row[1], row[2]) for row in self.conn.execute(
+                f"SELECT matricule, niveau, filiere FROM etudiants WHERE matricule IN ({marques})",
+                tuple(matricules))
+        }
+
+        valides = []
+        for numero, note in lot:
+            if note.etudiant_matricule not in existants:
+                rapport.erreurs.append((numero, f"Étudiant inconnu : {note.etudiant_matricule}"))
+            elif classe is not None and existants[note.etudiant_matricule] != classe:
+                autre = " - ".join(existants[note.etudiant_matricule])
+                rapport.erreurs.append((numero, f"Étudiant d'une autre classe ({autre}) : {note.etudiant_matricule}"))
+            elif note.matiere_id not in matieres:
+                if classe is None:
+                    rapport.erreurs.append((numero, f"Matière inconnue : {note.matiere_id}"))
+                else:
+                    rapport.erreurs.append((numero, f"Matière inconnue en {' - '.join(classe)} : {note.matiere_id}"))
+            else:
+                valides.append((numero, note))
+
+        def parametres(note):
+            return (note.etudiant_matricule, note.matiere_id, note.trimestre, note.note_cc, note.note_exam)
+
+        def recalculer(enregistres):
+            self._recalculer_moyennes_etudiants({note.etudiant_matricule for _, note in enregistres})
+
+        # Les déclencheurs ne recalculent pas l'étudiant à chaque note : une fois par lot suffit
+        valides = self._executer_lot(query, valides, parametres, rapport, recalculer, differer_moyennes=True)
+        rapport.enregistres += len(valides)
+        if apres_lot and valides:
+            apres_lot([note for _, note in valides])
+
+    def _executer_lot(self, query, lot, parametres, rapport, finaliser=None, differer_moyennes=False) -> list:
+        """Exécute un lot (numero, objet) en une transaction et retourne les éléments enregistrés.
+
+        Si une contrainte échoue, le lot est rejoué ligne par ligne pour isoler les lignes fautives.
+        finaliser(enregistres) est appelée dans la même transaction, avant la validation.
+        differer_moyennes suspend le recalcul des étudiants dans les déclencheurs de notes.
+        """
+        differer = self._moyennes_differees if differer_moyennes else nullcontext
+        try:
+            with self.conn, differer():
+                self.conn.executemany(query, [parametres(objet) for _, objet in lot])
+                if finaliser and lot:
+                    finaliser(lot)
+            return lot
+        except sqlite3.IntegrityError:
+            retenus = []
+            with self.conn:
+                self.conn.execute("BEGIN")
+                with differer():
+                    for numero, objet in lot:
+                        try:
+                            self.conn.execute("SAVEPOINT ligne")
+                            self.conn.execute(query, parametres(objet))
+                            self.conn.execute("RELEASE ligne")
+                            retenus.append((numero, objet))
+                        except sqlite3.IntegrityError as e:
+                            self.conn.execute("ROLLBACK TO ligne")
+                            self.conn.execute("RELEASE ligne")
+                            if "UNIQUE constraint failed: etudiants.matricule" in str(e):
+                                message = "Un étudiant avec ce matricule existe déjà"
+                            else:
+                                message = f"Contrainte non respectée : {str(e)}"
+                            rapport.erreurs.append((numero, message))
+                    if finaliser and retenus:
+                        finaliser(retenus)
+            return retenus
+
+    @contextmanager
+    def _moyennes_differees(self):
+        """Suspend, dans la transaction en cours, le recalcul des moyennes par étudiant dans les
+        déclencheurs de notes ; l'appelant recalcule lui-même les étudiants touchés.
+
+        La marque est une ligne de parametres retirée avant la validation (ou annulée avec la
+        transaction en cas d'erreur) : les autres connexions ne la voient jamais.
+        """
+        self.conn.execute("INSERT OR REPLACE INTO parametres (cle, valeur) VALUES (?, '1')",
+                          (MARQUE_MOYENNES_DIFFEREES,))
+        yield
+        self.conn.execute("DELETE FROM parametres WHERE cle = ?", (MARQUE_MOYENNES_DIFFEREES,))
+
+    def _recalculer_moyennes_etudiants(self, matricules):
+        """Recalcule moyennes_etudiants pour des matricules (dans la transaction en cours)"""
+        cible = "(SELECT value FROM json_each(:matricules))"
+        for instruction in requete_recalcul_etudiants(cible).split(";"):
+            if instruction.strip():
+                self.conn.execute(instruction, {"matricules": json.dumps(sorted(matricules))})
+
     def get_notes_etudiant(self, matricule: str) -> Dict[int, Dict[int, Note]]:
         """Récupère toutes les notes d'un étudiant, organisées par matière et trimestre"""
-        query = "SELECT * FROM notes WHERE etudiant_matricule = ? ORDER BY matiere_id, trimestre"
+        query = """
+        SELECT id, etudiant_matricule, matiere_id, note_cc, note_exam, trimestre
+        FROM notes WHERE etudiant_matricule = ? ORDER BY matiere_id, trimestre
+        """
         try:
             cursor = self.conn.execute(query, (matricule,))
             notes = {}
             for row in cursor.fetchall():
-                note = Note(*row)
+                note = Note.from_row(row)
                 if note.matiere_id not in notes:
                     notes[note.matiere_id] = {}
                 notes[note.matiere_id][note.trimestre] = note
@@ -208,78 +694,133 @@ class Database:
             raise DatabaseError(f"Erreur lors de la récupération des notes: {str(e)}")
 
     def calculer_moyenne_generale(self, matricule: str) -> Tuple[float, int]:
-        """Calcule la moyenne générale et le nombre de crédits obtenus"""
+        """Retourne la moyenne générale et le nombre de crédits obtenus (moyennes matérialisées)"""
+        query = "SELECT moyenne, credits FROM moyennes_etudiants WHERE matricule = ?"
         try:
-            notes_par_matiere = self.get_notes_etudiant(matricule)
-            if not notes_par_matiere:
-                return 0.0, 0
-
-            total_points = 0
-            total_coef = 0
-            credits = 0
-            
-            for matiere_id, notes_trimestres in notes_par_matiere.items():
-                # Récupérer le coefficient de la matière
-                cursor = self.conn.execute("SELECT coefficient FROM matieres WHERE id = ?", (matiere_id,))
-                coef = cursor.fetchone()[0]
-                
-                # Calculer la moyenne annuelle de la matière
-                moyennes_trimestres = {}
-                for trim, note in notes_trimestres.items():
-                    if note.moyenne is not None:
-                        moyennes_trimestres[trim] = note.moyenne
-                
-                if len(moyennes_trimestres) == 3:  # Si on a les notes des 3 trimestres
-                    moyenne_matiere = ResultatEtudiant.calculer_moyenne_annuelle(moyennes_trimestres)
-                    total_points += moyenne_matiere * coef
-                    total_coef += coef
-                    if moyenne_matiere >= 10:
-                        credits += coef
-            
-            if total_coef == 0:
+            row = self.conn.execute(query, (matricule,)).fetchone()
+            if row is None:
                 return 0.0, 0
-                
-            return round(total_points / total_coef, 2), credits
+            return row[0], row[1]
         except sqlite3.Error as e:
             raise DatabaseError(f"Erreur lors du calcul de la moyenne: {str(e)}")
 
-    def get_classement(self, niveau: str, filiere: str) -> List[ResultatEtudiant]:
-        """Récupère le classement des étudiants par niveau et filière"""
+    def get_notes_cohorte(self, niveau: str, filiere: str) -> Dict[str, Dict[str, Dict[int, Note]]]:
+        """Récupère en une requête les notes de tous les étudiants d'un niveau et d'une filière,
+        organisées par matricule, matière et trimestre"""
+        query = """
+        SELECT n.id, n.etudiant_matricule, n.matiere_id, n.note_cc, n.note_exam, n.trimestre
+        FROM etudiants e
+        JOIN notes n ON n.etudiant_matricule = e.matricule
+        WHERE e.niveau = ? AND e.filiere = ?
+        """
+        try:
+            cursor = self.conn.execute(query, (niveau, filiere))
+            notes = {}
+            # Ligne par ligne : les tuples lus ne s'accumulent pas à côté des notes
+            for row in cursor:
+                note = Note.from_row(row)
+                notes.setdefault(note.etudiant_matricule, {}) \
+                     .setdefault(str(note.matiere_id), {})[note.trimestre] = note
+            return notes
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Erreur lors de la récupération des notes: {str(e)}")
+
+    def get_classement(self, niveau: str, filiere: str, dense: bool = False) -> List[ResultatEtudiant]:
+        """Récupère le classement des étudiants par niveau et filière.
+
+        Moyennes et crédits sont lus dans moyennes_etudiants, tenue à jour par des déclencheurs ;
+        les rangs sont calculés par la même requête. Les ex aequo partagent le même rang (RANK), ou des rangs consécutifs si dense=True (DENSE_RANK).
+        """
+        query = REQUETE_CLASSEMENT.format(fonction_rang="DENSE_RANK" if dense else "RANK")
         try:
-            # Récupérer tous les étudiants du niveau et de la filière
-            etudiants = self.get_etudiants_by_niveau_filiere(niveau, filiere)
+            cursor = self.conn.execute(query, {"niveau": niveau, "filiere": filiere})
+            lignes = cursor.fetchall()
+            notes = self.get_notes_cohorte(niveau, filiere) if lignes else {}
+
             resultats = []
-            
-            for etudiant in etudiants:
-                moyenne, credits = self.calculer_moyenne_generale(etudiant.matricule)
-                notes = {str(note.matiere_id): note for note in self.get_notes_etudiant(etudiant.matricule)}
-                
+            for row in lignes:
+                etudiant = Etudiant.from_row(row[:7])
+                moyenne, credits = row[7], row[8]
                 resultats.append(ResultatEtudiant(
                     etudiant=etudiant,
-                    notes=notes,
+                    notes=notes.get(etudiant.matricule, {}),
                     moyenne_generale=moyenne,
-                    rang=0,  # Sera calculé après le tri
+                    rang=row[12],
                     mention=ResultatEtudiant.calculer_mention(moyenne),
-                    credits=credits
+                    credits=credits,
+                    moyennes_trimestres={
+                        trim: moy for trim, moy in zip((1, 2, 3), row[9:12]) if moy is not None
+                    }
                 ))
-            
-            # Trier par moyenne décroissante
-            resultats.sort(key=lambda x: x.moyenne_generale, reverse=True)
-            
-            # Attribuer les rangs
-            for i, resultat in enumerate(resultats, 1):
-                resultat.rang = i
-            
             return resultats
         except sqlite3.Error as e:
             raise DatabaseError(f"Erreur lors de la récupération du classement: {str(e)}")
 
+    def verifier_moyennes(self) -> List[str]:
+        """Compare les moyennes matérialisées à un recalcul complet depuis les notes.
+
+        Retourne la liste des écarts (vide si les tables moyennes et moyennes_etudiants sont cohérentes).
+        """
+        ecarts = []
+        try:
+            query = """
+            SELECT n.etudiant_matricule, n.matiere_id, n.trimestre,
+                   arrondi(0.4 * n.note_cc + 0.6 * n.note_exam, 2), mo.moyenne
+            FROM notes n
+            LEFT JOIN moyennes mo ON mo.etudiant_matricule = n.etudiant_matricule
+                AND mo.matiere_id = n.matiere_id AND mo.trimestre = n.trimestre
+            WHERE n.note_cc IS NOT NULL AND n.note_exam IS NOT NULL
+              AND mo.moyenne IS NOT arrondi(0.4 * n.note_cc + 0.6 * n.note_exam, 2)
+            UNION ALL
+            SELECT mo.etudiant_matricule, mo.matiere_id, mo.trimestre, NULL, mo.moyenne
+            FROM moyennes mo
+            WHERE NOT EXISTS (
+                SELECT 1 FROM notes n
+                WHERE n.etudiant_matricule = mo.etudiant_matricule AND n.matiere_id = mo.matiere_id
+                  AND n.trimestre = mo.trimestre AND n.note_cc IS NOT NULL AND n.note_exam IS NOT NULL
+            )
+            """
+            for matricule, matiere_id, trimestre, attendue, stockee in self.conn.execute(query):
+                ecarts.append(f"{matricule} matière {matiere_id} T{trimestre} : "
+                              f"moyenne attendue {attendue}, stockée {stockee}")
+
+            stockees_query = """
+            SELECT g.matricule, g.t1, g.t2, g.t3, g.moyenne_annuelle, g.moyenne, g.credits
+            FROM etudiants e
+            JOIN moyennes_etudiants g ON g.matricule = e.matricule
+            WHERE e.niveau = :niveau AND e.filiere = :filiere
+            """
+            cohortes = self.conn.execute("SELECT DISTINCT niveau, filiere FROM etudiants").fetchall()
+            for niveau, filiere in cohortes:
+                parametres = {"niveau": niveau, "filiere": filiere}
+                attendues = {row[0]: row[1:] for row in self.conn.execute(REQUETE_RECALCUL_MOYENNES, parametres)}
+                stockees = {row[0]: row[1:] for row in self.conn.execute(stockees_query, parametres)}
+                for matricule in sorted(set(attendues) | set(stockees)):
+                    if attendues.get(matricule) != stockees.get(matricule):
+                        ecarts.append(f"{matricule} : attendu {attendues.get(matricule)}, "
+                                      f"stocké {stockees.get(matricule)}")
+            return ecarts
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Erreur lors de la vérification des moyennes: {str(e)}")
+
+    def reconstruire_moyennes(self):
+        """Recalcule entièrement les tables moyennes et moyennes_etudiants depuis les notes"""
+        try:
+            with self.conn:
+                self.conn.execute("DELETE FROM moyennes")
+                self.conn.execute(REQUETE_REMPLISSAGE_MOYENNES)
+                for instruction in requete_recalcul_etudiants("(SELECT matricule FROM etudiants)").split(";"):
+                    if instruction.strip():
+                        self.conn.execute(instruction)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Erreur lors de la reconstruction des moyennes: {str(e)}")
+
     def get_etudiants_by_niveau_filiere(self, niveau: str, filiere: str) -> List[Etudiant]:
         """Récupère tous les étudiants d'un niveau et d'une filière donnés"""
         query = "SELECT * FROM etudiants WHERE niveau = ? AND filiere = ? ORDER BY nom, prenom"
         try:
             cursor = self.conn.execute(query, (niveau, filiere))
-            return [Etudiant(*row) for row in cursor.fetchall()]
+            return [Etudiant.from_row(row) for row in cursor]
         except sqlite3.Error as e:
             raise DatabaseError(f"Erreur lors de la récupération des étudiants: {str(e)}")
 
@@ -310,6 +851,7 @@ class Database:
                     etudiant.filiere,
                     etudiant.niveau
                 ))
+                self._indexer_en_attente()
             return True
         except sqlite3.IntegrityError as e:
             if "CHECK constraint failed" in str(e):
@@ -318,6 +860,51 @@ class Database:
         except sqlite3.Error as e:
             raise DatabaseError(f"Erreur lors de l'ajout de l'étudiant: {str(e)}")
 
+    def ajouter_etudiants_bulk(self, etudiants: Iterable, taille_lot: int = 1000, premier_numero: int = 1,
+                               apres_lot: Optional[Callable[[List[Etudiant]], None]] = None) -> RapportImport:
+        """Ajoute un grand nombre d'étudiants déjà validés, par lots de taille_lot (une transaction par lot).
+
+        Les éléments None sont ignorés mais comptent dans la numérotation ; un matricule déjà pris
+        est consigné dans le rapport sans interrompre l'import. apres_lot reçoit les étudiants
+        de chaque lot enregistré.
+        """
+        query = "INSERT INTO etudiants VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+        def parametres(etudiant):
+            return (
+                etudiant.matricule,
+                etudiant.nom.strip(),
+                etudiant.prenom.strip(),
+                etudiant.date_naissance,
+                etudiant.sexe,
+                etudiant.filiere,
+                etudiant.niveau
+            )
+
+        rapport = RapportImport()
+
+        def enregistrer(lot):
+            enregistres = self._executer_lot(query, lot, parametres, rapport, lambda _: self._indexer_en_attente())
+            rapport.enregistres += len(enregistres)
+            if apres_lot and enregistres:
+                apres_lot([etudiant for _, etudiant in enregistres])
+
+        try:
+            lot = []
+            for numero, etudiant in enumerate(etudiants, premier_numero):
+                if etudiant is None:
+                    continue
+                lot.append((numero, etudiant))
+                if len(lot) >= taille_lot:
+                    enregistrer(lot)
+                    lot = []
+            if lot:
+                enregistrer(lot)
+            rapport.erreurs.sort()
+            return rapport
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Erreur lors de l'ajout des étudiants: {str(e)}")
+
     def supprimer_etudiant(self, matricule):
         if not matricule:
             raise DatabaseError("Le matricule ne peut pas être vide")
@@ -333,36 +920,34 @@ class Database:
             raise DatabaseError(f"Erreur lors de la suppression de l'étudiant: {str(e)}")
 
     def modifier_etudiant(self, etudiant):
-        """Modifie un étudiant dans etudiants.txt selon son matricule"""
+        """Modifie un étudiant selon son matricule ; retourne False s'il n'existe pas"""
         if not etudiant or not etudiant.matricule:
             return False
-        if not os.path.exists('etudiants.txt'):
-            return False
-        lignes = []
-        trouve = False
-        with open('etudiants.txt', 'r', encoding='utf-8') as f:
-            for ligne in f:
-                donnees = ligne.strip().split('|')
-                if len(donnees) == 7 and donnees[0] == etudiant.matricule:
-                    # Remplacer la ligne par les nouvelles données
-                    lignes.append('|'.join([
-                        etudiant.matricule,
-                        etudiant.nom,
-                        etudiant.prenom,
-                        etudiant.date_naissance,
-                        etudiant.sexe,
-                        etudiant.filiere,
-                        etudiant.niveau
-                    ]))
-                    trouve = True
-                else:
-                    lignes.append(ligne.strip())
-        if not trouve:
-            return False
-        with open('etudiants.txt', 'w', encoding='utf-8') as f:
-            for l in lignes:
-                f.write(l + '\n')
-        return True
+        if not self.valider_date(etudiant.date_naissance):
+            raise DatabaseError("La date de naissance n'est pas valide")
+
+        query = """
+        UPDATE etudiants
+        SET nom = ?, prenom = ?, date_naissance = ?, sexe = ?, filiere = ?, niveau = ?
+        WHERE matricule = ?
+        """
+        try:
+            with self.conn:
+                cursor = self.conn.execute(query, (
+                    etudiant.nom.strip(),
+                    etudiant.prenom.strip(),
+                    etudiant.date_naissance,
+                    etudiant.sexe,
+                    etudiant.filiere,
+                    etudiant.niveau,
+                    etudiant.matricule
+                ))
+                self._indexer_en_attente()
+                return cursor.rowcount > 0
+        except sqlite3.IntegrityError:
+            raise DatabaseError("Les données ne respectent pas les contraintes de validation")
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Erreur lors de la modification de l'étudiant: {str(e)}")
 
     def rechercher_etudiant(self, matricule):
         if not matricule:
@@ -373,27 +958,106 @@ class Database:
             cursor = self.conn.execute(query, (matricule,))
             row = cursor.fetchone()
             if row:
-                return Etudiant(*row)
+                return Etudiant.from_row(row)
             return None
         except sqlite3.Error as e:
             raise DatabaseError(f"Erreur lors de la recherche de l'étudiant: {str(e)}")
 
+    def rechercher_etudiants(self, terme: str, limite: int = 500) -> List[Etudiant]:
+        """Recherche par matricule, nom ou prénom, sans tenir compte des accents ni de la casse.
+
+        Chaque mot du terme doit apparaître dans l'un des champs : comme sous-chaîne à partir
+        de trois caractères, comme début de mot en deçà. Les résultats sont classés par
+        pertinence : matricule exact, puis tous les mots trouvés en début de mot, puis les
+        autres correspondances ; par nom et prénom dans chaque groupe. Chaque groupe est lu
+        dans l'ordre de l'index et s'arrête à la limite : aucune correspondance n'est notée
+        ni triée au-delà de ce qui est retourné.
+        """
+        mots = mots_recherche(terme)
+        if not mots:
+            return []
+        groupes = [[MARQUE_DEBUT_MOT + mot for mot in mots],
+                   [mot if len(mot) >= 3 else MARQUE_DEBUT_MOT + mot for mot in mots]]
+        if groupes[1] == groupes[0]:
+            groupes.pop()
+        exact_query = "SELECT * FROM etudiants WHERE matricule = ?"
+        query = """
+        SELECT e.matricule, e.nom, e.prenom, e.date_naissance, e.sexe, e.filiere, e.niveau
+        FROM etudiants_recherche r
+        JOIN etudiants e ON e.rowid = r.rowid
+        WHERE etudiants_recherche MATCH ?
+        LIMIT ?
+        """
+        try:
+            if self.conn.execute("SELECT 1 FROM recherche_a_indexer LIMIT 1").fetchone():
+                # Étudiants écrits hors de l'application depuis la dernière recherche
+                with self.conn:
+                    self._indexer_en_attente()
+            resultats = {row[0]: row for row in self.conn.execute(exact_query, (terme.strip(),))}
+            for phrases in groupes:
+                if len(resultats) >= limite:
+                    break
+                # Chaque mot est une phrase entre guillemets ; les phrases sont combinées par ET
+                requete = " ".join('"' + phrase.replace('"', '""') + '"' for phrase in phrases)
+                # Les lignes déjà retenues peuvent revenir : elles ne comptent pas dans la limite
+                cursor = self.conn.execute(query, (requete, limite + len(resultats)))
+                nouvelles = [row for row in cursor.fetchall() if row[0] not in resultats]
+                nouvelles.sort(key=lambda row: (row[1], row[2]))
+                for row in nouvelles[:limite - len(resultats)]:
+                    resultats[row[0]] = row
+            return [Etudiant.from_row(row) for row in resultats.values()]
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Erreur lors de la recherche des étudiants: {str(e)}")
+
+    def reconstruire_recherche(self):
+        """Reconstruit l'index de recherche depuis la table etudiants (après un VACUUM par exemple)"""
+        try:
+            with self.conn:
+                self.conn.execute("DELETE FROM etudiants_recherche")
+                self.conn.execute("DELETE FROM recherche_a_indexer")
+                self.conn.execute(REQUETE_REMPLISSAGE_RECHERCHE)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Erreur lors de la reconstruction de l'index de recherche: {str(e)}")
+
+    def _indexer_en_attente(self):
+        """Indexe les étudiants mis en attente par les déclencheurs (dans la transaction en cours).
+
+        Les déclencheurs n'appellent aucune fonction Python : la normalisation texte_recherche()
+        est faite ici. Une ligne d'index restée sur un rowid en attente est remplacée.
+        """
+        self.conn.execute("DELETE FROM etudiants_recherche WHERE rowid IN "
+                          "(SELECT etudiant_rowid FROM recherche_a_indexer)")
+        self.conn.execute("""
+        INSERT INTO etudiants_recherche (rowid, matricule, nom, prenom)
+        SELECT e.rowid, texte_recherche(e.matricule), texte_recherche(e.nom), texte_recherche(e.prenom)
+        FROM recherche_a_indexer a
+        JOIN etudiants e ON e.rowid = a.etudiant_rowid
+        """)
+        self.conn.execute("DELETE FROM recherche_a_indexer")
+
     def get_all_etudiants(self):
         try:
             cursor = self.conn.execute("""
                 SELECT * FROM etudiants 
                 ORDER BY nom, prenom
             """)
-            return [Etudiant(*row) for row in cursor.fetchall()]
+            return [Etudiant.from_row(row) for row in cursor]
         except sqlite3.Error as e:
             raise DatabaseError(f"Erreur lors de la récupération des étudiants: {str(e)}")
 
     def close(self):
+        """Libère la connexion partagée ; elle est fermée quand plus personne ne l'utilise"""
+        if getattr(self, '_ferme', True):
+            return
+        self._ferme = True
         try:
-            if self.conn:
-                self.conn.close()
+            self._gestionnaire.liberer(self._fil)
         except sqlite3.Error as e:
             raise DatabaseError(f"Erreur lors de la fermeture de la connexion: {str(e)}")
 
     def __del__(self):
-        self.close()
\ No newline at end of file
+        self.close()
+
+
+# Durée de chaque appel, par méthode (« db.get_classement ») et pour toute la base (« db »)
+chronometrer_methodes(Database, "db", exclure={"close", "valider_date", "appliquer_profil", "profil_temporaire"})
@@ -0,0 +1,236 @@
+"""Export de tableaux de résultats vers des fichiers XLSX ou CSV, ligne par ligne.
+
+Les lignes sont écrites au fur et à mesure qu'elles sont produites : la mémoire utilisée
+ne dépend pas du nombre de lignes, et le calcul d'une ligne se recouvre avec l'écriture
+des précédentes. Le fichier est écrit sous un nom temporaire puis renommé : un export
+interrompu ne laisse pas de fichier partiel.
+
+Le classeur XLSX est écrit par openpyxl en mode write_only. Le CSV (séparateur « ; »,
+UTF-8 avec BOM, lisible directement par Excel et par l'import) est bien plus rapide ;
+il est retenu pour les gros exports (voir format_export).
+
+L'export de toute l'école (exporter_ecole) traite chaque classe (niveau, filière) dans un
+processus distinct : le calcul des moyennes, en Python pur, profite ainsi de tous les cœurs.
+"""
+import csv
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from journal_notes import JournalNotes, moyennes_trimestres
+from models import Etudiant, ResultatEtudiant
+
+
+class ExportationError(Exception):
+    """Classe d'exception personnalisée pour les exports impossibles"""
+    pass
+
+
+# Au-delà de ce nombre de lignes, l'export se fait en CSV (50 fois plus rapide que le XLSX)
+SEUIL_CSV = 20000
+# Limite de lignes d'une feuille Excel (en-tête compris)
+LIGNES_MAX_XLSX = 1048576
+
+ENTETES_MOYENNES = ("Matricule", "Nom", "Prénom", "Niveau", "Filière", "Moyenne T1", "Moyenne T2",
+                    "Moyenne T3", "Moyenne Générale", "Mention", "Décision")
+ENTETES_TOUS_LES_ETUDIANTS = ("Matricule", "Nom", "Prénom", "Date de naissance", "Sexe", "Niveau", "Filière",
+                              "Moyenne T1", "Moyenne T2", "Moyenne T3", "Moyenne Générale", "Mention", "Décision")
+ENTETES_SYNTHESE = ("Niveau", "Filière", "Effectif", "Moyenne de la classe", "Meilleure moyenne", "Admis",
+                    "Taux de réussite (%)", "Fichier")
+
+
+def format_export(nombre_lignes: int) -> str:
+    """Format retenu pour un export d'environ nombre_lignes lignes : "xlsx" ou "csv" """
+    return "csv" if nombre_lignes > SEUIL_CSV else "xlsx"
+
+
+class _EcrivainCSV:
+    def __init__(self, chemin: str):
+        self._fichier = open(chemin, "w", encoding="utf-8-sig", newline="")
+        self._ecrivain = csv.writer(self._fichier, delimiter=";")
+
+    def ecrire(self, ligne: Sequence):
+        self._ecrivain.writerow(ligne)
+
+    def fermer(self):
+        self._fichier.close()
+
+    def abandonner(self):
+        self._fichier.close()
+
+
+class _EcrivainXLSX:
+    def __init__(self, chemin: str, feuille: str):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise ExportationError("Le module openpyxl est nécessaire pour écrire les fichiers Excel")
+        self._chemin = chemin
+        self._classeur = Workbook(write_only=True)
+        self._feuille = self._classeur.create_sheet(feuille[:31])  # 31 caractères au plus
+        self._lignes = 0
+
+    def ecrire(self, ligne: Sequence):
+        self._lignes += 1
+        if self._lignes > LIGNES_MAX_XLSX:
+            raise ExportationError(f"Plus de {LIGNES_MAX_XLSX} lignes : exportez au format CSV")
+        self._feuille.append(ligne)
+
+    def fermer(self):
+        self._classeur.save(self._chemin)
+
+    def abandonner(self):
+        # Le mode write_only garde les lignes dans un fichier temporaire, supprimé à la fermeture
+        self._feuille.close()
+
+
+def exporter_lignes(chemin: str, entetes: Sequence[str], lignes: Iterable[Sequence],
+                    feuille: str = "Export", total: int = 0,
+                    progression: Optional[Callable[[int, int], None]] = None, pas: int = 500) -> int:
+    """Écrit l'en-tête puis les lignes dans chemin (.xlsx ou .csv selon l'extension).
+
+    progression(ecrites, total) est appelée toutes les pas lignes ; une exception qu'elle lève
+    (annulation d'une tâche de fond) interrompt l'export sans laisser de fichier.
+    Retourne le nombre de lignes de données écrites.
+    """
+    extension = os.path.splitext(chemin)[1].lower()
+    temporaire = chemin + ".tmp"
+    if extension == ".xlsx":
+        ecrivain = _EcrivainXLSX(temporaire, feuille)
+    elif extension == ".csv":
+        ecrivain = _EcrivainCSV(temporaire)
+    else:
+        raise ExportationError(f"Format d'export non pris en charge : {extension or chemin}")
+
+    ecrites = 0
+    try:
+        ecrivain.ecrire(entetes)
+        for ligne in lignes:
+            ecrivain.ecrire(ligne)
+            ecrites += 1
+            if progression is not None and ecrites % pas == 0:
+                progression(ecrites, total)
+        ecrivain.fermer()
+        os.replace(temporaire, chemin)
+    except BaseException:
+        ecrivain.abandonner()
+        if os.path.exists(temporaire):
+            os.remove(temporaire)
+        raise
+    return ecrites
+
+
+def colonnes_moyennes(moyennes_trim: Dict[int, float], niveau: str) -> tuple:
+    """Colonnes calculées d'une ligne d'export : T1, T2, T3, moyenne générale, mention, décision"""
+    moyenne_generale = 0.0
+    if all(trim in moyennes_trim for trim in [1, 2, 3]):
+        moyenne_generale = (moyennes_trim[1] + moyennes_trim[2] + (2 * moyennes_trim[3])) / 4
+    return (
+        moyennes_trim.get(1, 0.0),
+        moyennes_trim.get(2, 0.0),
+        moyennes_trim.get(3, 0.0),
+        moyenne_generale,
+        ResultatEtudiant.calculer_mention(moyenne_generale),
+        ResultatEtudiant.calculer_decision(moyenne_generale, niveau),
+    )
+
+
+def classes_ecole(chemin_etudiants: str = 'etudiants.txt') -> Dict[Tuple[str, str], List[List[str]]]:
+    """Lignes du fichier des étudiants regroupées par (niveau, filière), dans l'ordre de Etudiant.FILIERES"""
+    classes = {(niveau, filiere): [] for niveau, filieres in Etudiant.FILIERES.items() for filiere in filieres}
+    if os.path.exists(chemin_etudiants):
+        with open(chemin_etudiants, 'r', encoding='utf-8') as f:
+            for ligne in f:
+                champs = ligne.strip().split('|')
+                if len(champs) == 7:
+                    lignes = classes.get((champs[6], champs[5]))
+                    if lignes is not None:
+                        lignes.append(champs)
+    return classes
+
+
+def exporter_classe(niveau: str, filiere: str, lignes: List[List[str]], coefficients: Dict[str, int],
+                    chemin: str) -> Tuple[int, float, float, int]:
+    """Écrit le fichier d'une classe (dans un processus du pool) ; retourne effectif, moyenne, meilleure moyenne, admis.
+
+    lignes : champs de etudiants.txt ; les notes sont lues dans le journal de la classe.
+    """
+    journal = JournalNotes.pour(niveau, filiere)
+    generales = []
+    admis = 0
+
+    def produire():
+        nonlocal admis
+        for matricule, nom, prenom, date_naissance, sexe, _, _ in lignes:
+            colonnes = colonnes_moyennes(moyennes_trimestres(journal.notes_etudiant(matricule), coefficients), niveau)
+            generales.append(colonnes[3])
+            admis += colonnes[5] == "Admis"
+            yield (matricule, nom, prenom, date_naissance, sexe, niveau, filiere, *colonnes)
+
+    exporter_lignes(chemin, ENTETES_TOUS_LES_ETUDIANTS, produire(), feuille=f"{niveau} - {filiere}")
+    return len(generales), sum(generales) / len(generales), max(generales), admis
+
+
+def exporter_ecole(db, dossier: str, chemin_etudiants: str = 'etudiants.txt', processus: Optional[int] = None,
+                   progression: Optional[Callable[[int, int], None]] = None) -> Optional[str]:
+    """Exporte toute l'école dans un nouveau dossier : un fichier par classe (niveau, filière),
+    calculés en parallèle dans un pool de processus, puis une synthèse (synthese.xlsx).
+
+    processus : taille du pool (nombre de cœurs par défaut). progression(classes faites, total)
+    est appelée à chaque classe terminée ; une exception qu'elle lève annule les classes non
+    commencées et supprime le dossier. Retourne le chemin de la synthèse, ou None sans étudiant.
+    """
+    classes = {cle: lignes for cle, lignes in classes_ecole(chemin_etudiants).items() if lignes}
+    if not classes:
+        return None
+    # Importés ici : seul cet export en a besoin, et ils allongent le démarrage de l'application
+    import multiprocessing
+    import shutil
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    coefficients = {
+        (niveau, filiere): {m.nom: m.coefficient for m in db.get_matieres(niveau, filiere)}
+        for niveau, filiere in classes
+    }
+
+    os.makedirs(dossier)
+    try:
+        resultats = {}
+        # « spawn » : l'appelant est en général un fil d'une application Qt, qu'un fork copierait mal
+        with ProcessPoolExecutor(max_workers=processus, mp_context=multiprocessing.get_context("spawn")) as pool:
+            # Les plus grandes classes d'abord : ce sont elles qui fixent la durée totale
+            travaux = {}
+            for (niveau, filiere), lignes in sorted(classes.items(), key=lambda classe: -len(classe[1])):
+                chemin = os.path.join(dossier, f"{niveau}_{filiere}.{format_export(len(lignes))}")
+                travail = pool.submit(exporter_classe, niveau, filiere, lignes,
+                                      coefficients[(niveau, filiere)], chemin)
+                travaux[travail] = (niveau, filiere, chemin)
+            try:
+                for fait, travail in enumerate(as_completed(travaux), 1):
+                    resultats[travaux[travail]] = travail.result()
+                    if progression is not None:
+                        progression(fait, len(travaux))
+            except BaseException:
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+
+        def lignes_synthese():
+            total_effectif = total_admis = 0
+            total_moyennes = 0.0
+            meilleure = 0.0
+            ordre = {cle: rang for rang, cle in enumerate(classes)}
+            for (niveau, filiere, chemin), (effectif, moyenne, maximum, admis) in sorted(
+                    resultats.items(), key=lambda resultat: ordre[resultat[0][:2]]):
+                total_effectif += effectif
+                total_admis += admis
+                total_moyennes += moyenne * effectif
+                meilleure = max(meilleure, maximum)
+                yield (niveau, filiere, effectif, round(moyenne, 2), maximum, admis,
+                       round(100 * admis / effectif, 1), os.path.basename(chemin))
+            yield ("Ensemble", "", total_effectif, round(total_moyennes / total_effectif, 2), meilleure,
+                   total_admis, round(100 * total_admis / total_effectif, 1), "")
+
+        synthese = os.path.join(dossier, "synthese.xlsx")
+        exporter_lignes(synthese, ENTETES_SYNTHESE, lignes_synthese(), feuille="Synthèse")
+        return synthese
+    except BaseException:
+        shutil.rmtree(dossier, ignore_errors=True)
+        raise
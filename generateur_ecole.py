@@ -0,0 +1,164 @@
+"""Génération d'écoles synthétiques reproductibles pour les mesures de performance.
+
+Une école est écrite dans un dossier comme l'application l'attend dans son dossier courant :
+etudiants.txt, un journal notes_{niveau}_{filiere}.txt par classe et etudiants.db (étudiants,
+notes, moyennes et index de recherche tenus à jour par les déclencheurs). Une même graine
+donne toujours les mêmes fichiers.
+
+Les données imitent un lycée : classes de tailles inégales (le tronc commun est le plus
+chargé), noms et prénoms répétés, âges selon le niveau avec des redoublants, notes autour
+du niveau propre à chaque élève, quelques notes manquantes. Les classes dont le catalogue
+n'a aucune matière n'ont pas de notes, comme dans l'application.
+
+Usage : python generateur_ecole.py DOSSIER [--etudiants N] [--graine G]
+"""
+import argparse
+import os
+import random
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+from database import Database
+from journal_notes import JournalNotes, nom_fichier_notes
+from models import Etudiant
+
+TAILLES = (1000, 10000, 100000)
+
+# Année de la rentrée : les âges ne dépendent pas de la date de génération
+ANNEE_SCOLAIRE = 2025
+AGE_NIVEAU = {"1ère année": 15, "2ème année": 16, "3ème année": 17, "Bac": 18}
+POIDS_NIVEAU = {"1ère année": 30, "2ème année": 26, "3ème année": 23, "Bac": 21}
+POIDS_FILIERE = {"Tronc Commun": 1, "Lettres": 3, "Economie-Gestion": 4, "Science": 5, "Informatique": 3,
+                 "Mathématique": 2, "Technique": 2}
+TAUX_REDOUBLANTS = 0.15
+TAUX_NOTES_MANQUANTES = 0.02
+LOT_ETUDIANTS = 1000  # étudiants générés puis enregistrés ensemble
+
+NOMS = [
+    "Ben Ali", "Trabelsi", "Gharbi", "Hammami", "Jlassi", "Mejri", "Bouazizi", "Sassi", "Ayari", "Dridi",
+    "Karoui", "Chaabane", "Mansouri", "Bouzid", "Haddad", "Khelifi", "Rekik", "Feki", "Zouari", "Masmoudi",
+    "Jebali", "Ghanmi", "Ferchichi", "Ben Salah", "Ben Ammar", "Chebbi", "Ouertani", "Mathlouthi", "Abidi",
+    "Hamdi", "Saidi", "Riahi", "Baccouche", "Kammoun", "Ellouze", "Mzali", "Ben Youssef", "Nasri", "Toumi",
+    "Ben Hamida", "Dhaouadi", "Guesmi", "Labidi", "Amri", "Slimani", "Jaziri", "Belhadj", "Ben Romdhane",
+    "Hédhili", "Lefèvre", "Bérard", "Mœller",
+]
+PRENOMS = {
+    "F": ["Amira", "Yasmine", "Sarra", "Mariem", "Rim", "Nour", "Emna", "Ines", "Inès", "Salma", "Chaima",
+          "Eya", "Fatma", "Hiba", "Khadija", "Lina", "Malek", "Nesrine", "Oumaima", "Rania", "Sirine",
+          "Wiem", "Zeineb", "Aïcha", "Hélène", "Syrine", "Asma", "Manel", "Dorra", "Olfa"],
+    "H": ["Mohamed", "Ahmed", "Youssef", "Amine", "Aziz", "Bilel", "Firas", "Hamza", "Houssem", "Iyed",
+          "Karim", "Mehdi", "Nader", "Omar", "Rayen", "Seif", "Skander", "Walid", "Yassine", "Zied",
+          "Anis", "Chédly", "Elyes", "Fedi", "Ghassen", "Hédi", "Malek", "Oussama", "Slim", "Taha"],
+}
+
+
+def _classes() -> List[Tuple[str, str]]:
+    return [(niveau, filiere) for niveau, filieres in Etudiant.FILIERES.items() for filiere in filieres]
+
+
+def _poids_classes() -> List[float]:
+    """Part de l'effectif de chaque classe : poids du niveau réparti selon les filières du niveau"""
+    poids = []
+    for niveau, filiere in _classes():
+        total_filieres = sum(POIDS_FILIERE[f] for f in Etudiant.FILIERES[niveau])
+        poids.append(POIDS_NIVEAU[niveau] * POIDS_FILIERE[filiere] / total_filieres)
+    return poids
+
+
+def _etudiant(aleatoire: random.Random, numero: int, niveau: str, filiere: str) -> Etudiant:
+    sexe = aleatoire.choice("FH")
+    age = AGE_NIVEAU[niveau]
+    if aleatoire.random() < TAUX_REDOUBLANTS:
+        age += aleatoire.choice((1, 1, 2))
+    # Âge atteint dans l'année civile de la rentrée
+    naissance = f"{ANNEE_SCOLAIRE - age}-{aleatoire.randint(1, 12):02d}-{aleatoire.randint(1, 28):02d}"
+    return Etudiant(f"ETU{numero:07d}", aleatoire.choice(NOMS), aleatoire.choice(PRENOMS[sexe]), naissance,
+                    sexe, filiere, niveau)
+
+
+def _note(aleatoire: random.Random, moyenne: float) -> float:
+    """Note au quart de point entre 0 et 20"""
+    return min(20.0, max(0.0, round(aleatoire.gauss(moyenne, 2.0) * 4) / 4))
+
+
+def _notes(aleatoire: random.Random, matricule: str, matieres) -> List[Tuple[str, int, str, int, float, float]]:
+    """(matricule, id matière, nom matière, trimestre, CC, examen) d'un étudiant"""
+    niveau_eleve = aleatoire.gauss(11.0, 3.0)
+    notes = []
+    for matiere in matieres:
+        niveau_matiere = niveau_eleve + aleatoire.gauss(0.0, 1.5)
+        for trimestre in (1, 2, 3):
+            if aleatoire.random() < TAUX_NOTES_MANQUANTES:
+                continue
+            # Le contrôle continu est en moyenne plus favorable que l'examen
+            notes.append((matricule, matiere.id, matiere.nom, trimestre,
+                          _note(aleatoire, niveau_matiere + 1.0), _note(aleatoire, niveau_matiere - 0.5)))
+    return notes
+
+
+def generer_ecole(dossier: str, nombre_etudiants: int, graine: int = 0,
+                  progression: Optional[Callable[[int, int], None]] = None) -> Dict[Tuple[str, str], int]:
+    """Écrit une école de nombre_etudiants étudiants dans dossier (créé au besoin) ; retourne l'effectif par classe.
+
+    Refuse d'écraser les données d'une école existante (FileExistsError).
+    progression(etudiants écrits, total) est appelée après chaque lot.
+    """
+    os.makedirs(dossier, exist_ok=True)
+    chemin_etudiants = os.path.join(dossier, "etudiants.txt")
+    for nom in ("etudiants.txt", "etudiants.db"):
+        if os.path.exists(os.path.join(dossier, nom)):
+            raise FileExistsError(f"{os.path.join(dossier, nom)} existe déjà")
+
+    aleatoire = random.Random(graine)
+    classes = _classes()
+    affectations = aleatoire.choices(classes, weights=_poids_classes(), k=nombre_etudiants)
+    effectifs = {classe: 0 for classe in classes}
+
+    db = Database(os.path.join(dossier, "etudiants.db"))
+    try:
+        matieres = {classe: db.get_matieres(*classe) for classe in classes}
+        journaux = {classe: JournalNotes.pour_fichier(os.path.join(dossier, nom_fichier_notes(*classe)))
+                    for classe in classes}
+        with db.profil_temporaire("import_massif"), open(chemin_etudiants, "w", encoding="utf-8") as fichier:
+            for debut in range(0, nombre_etudiants, LOT_ETUDIANTS):
+                etudiants = [_etudiant(aleatoire, numero, *affectations[numero])
+                             for numero in range(debut, min(debut + LOT_ETUDIANTS, nombre_etudiants))]
+                notes = {classe: [] for classe in classes}
+                for etudiant in etudiants:
+                    classe = (etudiant.niveau, etudiant.filiere)
+                    effectifs[classe] += 1
+                    fichier.write("|".join((etudiant.matricule, etudiant.nom, etudiant.prenom,
+                                            etudiant.date_naissance, etudiant.sexe, etudiant.filiere,
+                                            etudiant.niveau)) + "\n")
+                    notes[classe].extend(_notes(aleatoire, etudiant.matricule, matieres[classe]))
+
+                db.ajouter_etudiants_bulk(etudiants)
+                db.ajouter_notes_bulk((matricule, matiere_id, cc, examen, trimestre)
+                                      for notes_classe in notes.values()
+                                      for matricule, matiere_id, _, trimestre, cc, examen in notes_classe)
+                for classe, notes_classe in notes.items():
+                    if notes_classe:
+                        journaux[classe].ajouter(((matricule, nom_matiere, trimestre), (cc, examen))
+                                                 for matricule, _, nom_matiere, trimestre, cc, examen in notes_classe)
+                if progression is not None:
+                    progression(debut + len(etudiants), nombre_etudiants)
+    finally:
+        db.close()
+    return effectifs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dossier")
+    parser.add_argument("--etudiants", type=int, default=TAILLES[0])
+    parser.add_argument("--graine", type=int, default=0)
+    args = parser.parse_args()
+    try:
+        effectifs = generer_ecole(args.dossier, args.etudiants, args.graine,
+                                  progression=lambda fait, total: print(f"\r{fait}/{total} étudiants", end=""))
+    except FileExistsError as e:
+        print(f"Erreur : {e}")
+        sys.exit(1)
+    print()
+    for (niveau, filiere), effectif in effectifs.items():
+        print(f"{niveau:<12} {filiere:<18} {effectif:>7}")
@@ -0,0 +1,212 @@
+"""Import de feuilles de notes et de listes d'étudiants depuis des fichiers CSV ou XLSX"""
+import csv
+import itertools
+import os
+import unicodedata
+from datetime import date, datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+from database import Database
+from models import Etudiant, EtudiantError, Note, RapportImport
+
+
+class ImportationError(Exception):
+    """Classe d'exception personnalisée pour les fichiers d'import illisibles"""
+    pass
+
+
+# Noms de colonnes acceptés (après normalisation) -> nom interne
+ALIAS_COLONNES = {
+    "matricule": "matricule",
+    "matiere": "matiere",
+    "note_cc": "note_cc",
+    "cc": "note_cc",
+    "note_exam": "note_exam",
+    "note_examen": "note_exam",
+    "exam": "note_exam",
+    "examen": "note_exam",
+    "trimestre": "trimestre",
+    "nom": "nom",
+    "prenom": "prenom",
+    "date_naissance": "date_naissance",
+    "date_de_naissance": "date_naissance",
+    "sexe": "sexe",
+    "filiere": "filiere",
+    "niveau": "niveau",
+}
+COLONNES_NOTES = ("matricule", "matiere", "note_cc", "note_exam", "trimestre")
+COLONNES_ETUDIANTS = ("nom", "prenom", "date_naissance", "sexe", "filiere", "niveau")
+
+
+def normaliser(texte) -> str:
+    """Minuscules, sans accents ni espaces superflus : 'Matière ' -> 'matiere'"""
+    texte = unicodedata.normalize("NFKD", str(texte or "")).encode("ascii", "ignore").decode("ascii")
+    return "_".join(texte.lower().split())
+
+
+def lire_lignes(chemin: str) -> Iterator[List]:
+    """Parcourt un fichier CSV ou XLSX ligne par ligne, sans le charger entièrement.
+
+    La première ligne produite est l'en-tête.
+    """
+    extension = os.path.splitext(chemin)[1].lower()
+    if extension == ".xlsx":
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ImportationError("Le module openpyxl est nécessaire pour lire les fichiers Excel")
+        classeur = load_workbook(chemin, read_only=True, data_only=True)
+        try:
+            for ligne in classeur.active.iter_rows(values_only=True):
+                yield list(ligne)
+        finally:
+            classeur.close()
+    elif extension in (".csv", ".txt"):
+        with open(chemin, "r", encoding="utf-8-sig", newline="") as f:
+            echantillon = f.read(4096)
+            f.seek(0)
+            try:
+                dialecte = csv.Sniffer().sniff(echantillon, delimiters=";,\t")
+            except csv.Error:
+                dialecte = csv.excel
+            for ligne in csv.reader(f, dialecte):
+                yield ligne
+    else:
+        raise ImportationError(f"Format de fichier non pris en charge : {extension or chemin}")
+
+
+def lire_enregistrements(chemin: str, colonnes_requises) -> Iterator[Dict[str, object]]:
+    """Parcourt les lignes de données sous forme de dictionnaires indexés par nom de colonne interne"""
+    lignes = lire_lignes(chemin)
+    try:
+        entete = next(lignes)
+    except StopIteration:
+        raise ImportationError("Le fichier est vide")
+    colonnes = [ALIAS_COLONNES.get(normaliser(nom), normaliser(nom)) for nom in entete]
+    manquantes = [nom for nom in colonnes_requises if nom not in colonnes]
+    if manquantes:
+        raise ImportationError(f"Colonnes manquantes : {', '.join(manquantes)}")
+    for ligne in lignes:
+        if not any(valeur not in (None, "") for valeur in ligne):
+            yield None  # ligne vide : ignorée mais comptée pour garder les numéros de ligne
+            continue
+        yield dict(zip(colonnes, ligne))
+
+
+def importer_notes(chemin: str, db: Database, niveau: str, filiere: str, taille_lot: int = 500,
+                   apres_lot: Optional[Callable[[List[Note]], None]] = None) -> RapportImport:
+    """Importe une feuille de notes (matricule, matière, note CC, note examen, trimestre)
+    pour un niveau et une filière. La matière peut être donnée par son nom ou son identifiant ;
+    les lignes d'une matière ou d'un étudiant d'une autre classe sont rejetées.
+
+    Les erreurs du rapport sont numérotées selon les lignes du fichier (l'en-tête est la ligne 1).
+    """
+    matieres = {}
+    for matiere in db.get_matieres(niveau, filiere):
+        matieres[normaliser(matiere.nom)] = matiere.id
+        matieres[str(matiere.id)] = matiere.id
+
+    def elements():
+        for enregistrement in lire_enregistrements(chemin, COLONNES_NOTES):
+            if enregistrement is None:
+                yield None
+                continue
+            matiere = enregistrement["matiere"]
+            yield (
+                enregistrement["matricule"],
+                matieres.get(normaliser(matiere), matiere),
+                enregistrement["note_cc"],
+                enregistrement["note_exam"],
+                enregistrement["trimestre"],
+            )
+
+    with db.profil_temporaire("import_massif"):
+        return db.ajouter_notes_bulk(elements(), taille_lot=taille_lot, premier_numero=2, apres_lot=apres_lot,
+                                     niveau=niveau, filiere=filiere)
+
+
+def generateur_matricules() -> Callable[[], str]:
+    """Retourne une fonction produisant des matricules uniques pour un import.
+
+    Même préfixe horodaté que GestionEtudiantsApp.generer_matricule, suivi d'un compteur :
+    les matricules d'un import ne se chevauchent ni entre eux ni avec les ajouts unitaires.
+    """
+    prefixe = f"ETU{datetime.now().strftime('%y%m%d%H%M%S')}"
+    compteur = itertools.count(1)
+    return lambda: f"{prefixe}{next(compteur):05d}"
+
+
+def _normaliser_date(valeur) -> str:
+    """Accepte les dates Excel, YYYY-MM-DD ou JJ/MM/AAAA et retourne YYYY-MM-DD"""
+    if isinstance(valeur, datetime):
+        return valeur.date().isoformat()
+    if isinstance(valeur, date):
+        return valeur.isoformat()
+    texte = str(valeur or "").strip()
+    if len(texte) == 10 and texte[2] == "/" and texte[5] == "/":
+        return f"{texte[6:]}-{texte[3:5]}-{texte[:2]}"
+    return texte
+
+
+def importer_etudiants(chemin: str, db: Database, taille_lot: int = 1000,
+                       progression: Optional[Callable[[int, int], None]] = None,
+                       fichier_txt: Optional[str] = "etudiants.txt") -> RapportImport:
+    """Importe une liste d'étudiants (nom, prénom, date de naissance, sexe, filière, niveau,
+    matricule facultatif) en flux continu.
+
+    Les lignes sont validées au fil de la lecture, les matricules manquants sont attribués,
+    et les étudiants sont enregistrés par lots de taille_lot, chaque lot étant aussi ajouté
+    à fichier_txt. progression(lignes_lues, etudiants_enregistres) est appelée après chaque lot.
+    """
+    niveaux = {normaliser(niveau): niveau for niveau in Etudiant.NIVEAUX}
+    filieres = {
+        (niveau, normaliser(filiere)): filiere
+        for niveau, liste in Etudiant.FILIERES.items() for filiere in liste
+    }
+    nouveau_matricule = generateur_matricules()
+    erreurs = []
+    lues = 0
+    enregistres = 0
+
+    def elements():
+        nonlocal lues
+        for numero, enregistrement in enumerate(lire_enregistrements(chemin, COLONNES_ETUDIANTS), 2):
+            lues += 1
+            if enregistrement is None:
+                yield None
+                continue
+            niveau = niveaux.get(normaliser(enregistrement["niveau"]), str(enregistrement["niveau"] or ""))
+            filiere = filieres.get((niveau, normaliser(enregistrement["filiere"])),
+                                   str(enregistrement["filiere"] or ""))
+            try:
+                yield Etudiant(
+                    matricule=str(enregistrement.get("matricule") or "").strip() or nouveau_matricule(),
+                    nom=str(enregistrement["nom"] or "").strip(),
+                    prenom=str(enregistrement["prenom"] or "").strip(),
+                    date_naissance=_normaliser_date(enregistrement["date_naissance"]),
+                    sexe=str(enregistrement["sexe"] or "").strip().upper(),
+                    filiere=filiere,
+                    niveau=niveau
+                )
+            except EtudiantError as e:
+                erreurs.append((numero, str(e)))
+                yield None
+
+    def apres_lot(etudiants):
+        nonlocal enregistres
+        if fichier_txt:
+            with open(fichier_txt, "a", encoding="utf-8") as f:
+                f.writelines(
+                    f"{e.matricule}|{e.nom}|{e.prenom}|{e.date_naissance}|{e.sexe}|{e.filiere}|{e.niveau}\n"
+                    for e in etudiants
+                )
+        enregistres += len(etudiants)
+        if progression:
+            progression(lues, enregistres)
+
+    with db.profil_temporaire("import_massif"):
+        rapport = db.ajouter_etudiants_bulk(elements(), taille_lot=taille_lot, premier_numero=2, apres_lot=apres_lot)
+    if progression:
+        progression(lues, enregistres)
+    rapport.erreurs = sorted(rapport.erreurs + erreurs)
+    return rapport
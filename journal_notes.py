@@ -0,0 +1,280 @@
+"""Journal des notes d'un niveau et d'une filière (notes_{niveau}_{filiere}.txt).
+
+Chaque enregistrement est ajouté en fin de fichier avec un numéro de séquence :
+    sequence|matricule|matiere|note_cc|note_exam|trimestre
+Le dernier enregistrement d'un triplet (matricule, matière, trimestre) l'emporte ; des notes
+vides marquent une suppression. Les lignes historiques à 5 champs (sans séquence) restent
+lisibles et sont considérées comme les plus anciennes.
+
+Une sauvegarde coûte donc un simple ajout, quelle que soit la taille du fichier. Le compactage
+réécrit l'état courant dans un fichier temporaire puis le substitue atomiquement à l'original.
+
+Les lectures passent par un index en mémoire (matricule -> trimestre -> matière -> notes),
+construit une fois par fichier et reconstruit seulement si (mtime, taille) du fichier change
+hors de ce processus ; les ajouts faits par le processus le mettent à jour directement.
+"""
+import os
+import threading
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+# Compacter quand les enregistrements périmés dépassent ce nombre et le nombre d'enregistrements vivants
+SEUIL_COMPACTAGE = 500
+
+Cle = Tuple[str, str, int]                   # (matricule, matière, trimestre)
+Valeur = Tuple[float, float]                 # (note CC, note examen)
+Index = Dict[str, Dict[int, Dict[str, Valeur]]]
+
+
+def nom_fichier_notes(niveau: str, filiere: str) -> str:
+    return f"notes_{niveau}_{filiere}.txt"
+
+
+def _lire_enregistrement(ligne: str) -> Optional[Tuple[int, Cle, Optional[Valeur]]]:
+    """Décode une ligne ; retourne None si elle est illisible (ligne tronquée par un arrêt brutal)"""
+    parts = ligne.rstrip("\n").split("|")
+    try:
+        if len(parts) == 6:
+            sequence = int(parts[0])
+            parts = parts[1:]
+        elif len(parts) == 5:
+            sequence = 0
+        else:
+            return None
+        matricule, matiere, note_cc, note_exam, trimestre = parts
+        cle = (matricule, matiere, int(trimestre))
+        if note_cc == "" and note_exam == "":
+            return sequence, cle, None
+        return sequence, cle, (float(note_cc), float(note_exam))
+    except ValueError:
+        return None
+
+
+def _signature(chemin: str) -> Optional[Tuple[int, int]]:
+    """(mtime en ns, taille) du fichier, ou None s'il n'existe pas"""
+    try:
+        stat = os.stat(chemin)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _indexer(index: Index, cle: Cle, valeur: Optional[Valeur]):
+    matricule, matiere, trimestre = cle
+    if valeur is not None:
+        index.setdefault(matricule, {}).setdefault(trimestre, {})[matiere] = valeur
+        return
+    notes_trimestre = index.get(matricule, {}).get(trimestre)
+    if notes_trimestre is not None:
+        notes_trimestre.pop(matiere, None)
+
+
+def moyennes_trimestres(notes: Dict[int, Dict[str, Valeur]], coefficients: Dict[str, int]) -> Dict[int, float]:
+    """Moyennes des trois trimestres d'un étudiant à partir de ses notes du journal (0.0 sans note).
+
+    Moyenne d'une note : 40 % CC + 60 % examen ; une matière sans coefficient connu compte pour 1.
+    """
+    moyennes = {1: 0.0, 2: 0.0, 3: 0.0}
+    coefs = {1: 0, 2: 0, 3: 0}
+    totaux = {1: 0.0, 2: 0.0, 3: 0.0}
+    for trimestre, notes_trimestre in notes.items():
+        if trimestre not in totaux:
+            continue
+        for matiere, (note_cc, note_exam) in notes_trimestre.items():
+            moyenne = 0.4 * note_cc + 0.6 * note_exam
+            coef = coefficients.get(matiere, 1)
+            totaux[trimestre] += moyenne * coef
+            coefs[trimestre] += coef
+    for t in [1, 2, 3]:
+        if coefs[t] > 0:
+            moyennes[t] = round(totaux[t] / coefs[t], 2)
+    return moyennes
+
+
+class JournalNotes:
+    """Fichier de notes en ajout seul ; une instance par fichier (voir JournalNotes.pour)"""
+    _journaux: Dict[str, 'JournalNotes'] = {}
+    _verrou_classe = threading.Lock()
+
+    def __init__(self, chemin: str):
+        self.chemin = chemin
+        self._verrou = threading.RLock()
+        self._sequence: Optional[int] = None
+        self._ajouts_depuis_compactage = 0
+        self._index: Optional[Index] = None
+        self._signature: Optional[Tuple[int, int]] = None
+
+    @classmethod
+    def pour(cls, niveau: str, filiere: str) -> 'JournalNotes':
+        return cls.pour_fichier(nom_fichier_notes(niveau, filiere))
+
+    @classmethod
+    def pour_fichier(cls, chemin: str) -> 'JournalNotes':
+        cle = os.path.abspath(chemin)
+        with cls._verrou_classe:
+            if cle not in cls._journaux:
+                cls._journaux[cle] = cls(chemin)
+            return cls._journaux[cle]
+
+    # Lecture
+
+    def enregistrements(self) -> Iterator[Tuple[int, Cle, Optional[Valeur]]]:
+        """Parcourt les enregistrements lisibles dans l'ordre du fichier"""
+        if not os.path.exists(self.chemin):
+            return
+        with open(self.chemin, "r", encoding="utf-8") as f:
+            for ligne in f:
+                enregistrement = _lire_enregistrement(ligne)
+                if enregistrement is not None:
+                    yield enregistrement
+
+    def _etat_complet(self, matricule: Optional[str] = None) -> Tuple[Dict[Cle, Tuple[int, Optional[Valeur]]], int]:
+        """Dernier enregistrement de chaque triplet (suppressions comprises) et nombre d'enregistrements lus"""
+        etat: Dict[Cle, Tuple[int, Optional[Valeur]]] = {}
+        total = 0
+        for sequence, cle, valeur in self.enregistrements():
+            if matricule is not None and cle[0] != matricule:
+                continue
+            total += 1
+            precedent = etat.get(cle)
+            if precedent is None or sequence >= precedent[0]:
+                etat[cle] = (sequence, valeur)
+        return etat, total
+
+    def etat(self, matricule: Optional[str] = None) -> Dict[Cle, Valeur]:
+        """État courant des notes (dernier enregistrement gagnant), éventuellement pour un seul étudiant"""
+        etat, _ = self._etat_complet(matricule)
+        return {cle: valeur for cle, (_, valeur) in etat.items() if valeur is not None}
+
+    def index(self) -> Index:
+        """Index matricule -> trimestre -> matière -> (CC, examen), à ne pas modifier.
+
+        Reconstruit si le fichier a changé depuis la dernière lecture ou écriture du processus.
+        """
+        with self._verrou:
+            signature = _signature(self.chemin)
+            if self._index is None or signature != self._signature:
+                etat, _ = self._etat_complet()
+                self._remplacer_index(etat, signature)
+            return self._index
+
+    def _remplacer_index(self, etat: Dict[Cle, Tuple[int, Optional[Valeur]]],
+                         signature: Optional[Tuple[int, int]]):
+        index: Index = {}
+        for cle, (_, valeur) in etat.items():
+            _indexer(index, cle, valeur)
+        self._index = index
+        self._signature = signature
+
+    def notes_etudiant(self, matricule: str) -> Dict[int, Dict[str, Valeur]]:
+        """Notes d'un étudiant : trimestre -> matière -> (CC, examen), à ne pas modifier"""
+        return self.index().get(matricule, {})
+
+    # Écriture
+
+    def _derniere_sequence(self) -> int:
+        """Lit la séquence du dernier enregistrement complet, sans parcourir tout le fichier"""
+        if not os.path.exists(self.chemin):
+            return 0
+        with open(self.chemin, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            taille = f.tell()
+            f.seek(max(0, taille - 4096))
+            fin = f.read().decode("utf-8", errors="ignore").splitlines()
+        for ligne in reversed(fin):
+            enregistrement = _lire_enregistrement(ligne)
+            if enregistrement is not None and enregistrement[0] > 0:
+                return enregistrement[0]
+        # Fin de fichier sans séquence (format historique) : repartir du nombre de lignes
+        with open(self.chemin, "r", encoding="utf-8") as f:
+            return sum(1 for _ in f)
+
+    def ajouter(self, enregistrements: Iterable[Tuple[Cle, Optional[Valeur]]]):
+        """Ajoute des enregistrements (valeur None = suppression) en fin de journal"""
+        with self._verrou:
+            if self._sequence is None:
+                self._sequence = self._derniere_sequence()
+            lignes = []
+            ecrits = []
+            for (matricule, matiere, trimestre), valeur in enregistrements:
+                self._sequence += 1
+                if valeur is None:
+                    lignes.append(f"{self._sequence}|{matricule}|{matiere}|||{trimestre}\n")
+                else:
+                    # Les notes sont conservées telles qu'elles seront relues du fichier
+                    valeur = (float(f"{valeur[0]:.2f}"), float(f"{valeur[1]:.2f}"))
+                    lignes.append(f"{self._sequence}|{matricule}|{matiere}|{valeur[0]:.2f}|{valeur[1]:.2f}|{trimestre}\n")
+                ecrits.append(((matricule, matiere, int(trimestre)), valeur))
+            if not lignes:
+                return
+            # L'index reste valable seulement s'il reflétait le fichier juste avant cet ajout
+            index_a_jour = self._index is not None and _signature(self.chemin) == self._signature
+            with open(self.chemin, "a+b") as f:
+                # Une ligne tronquée par un arrêt brutal ne doit pas absorber le prochain ajout
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+                f.write("".join(lignes).encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+            self._ajouts_depuis_compactage += len(lignes)
+            if index_a_jour:
+                for cle, valeur in ecrits:
+                    _indexer(self._index, cle, valeur)
+                self._signature = _signature(self.chemin)
+            else:
+                self._index = None
+
+    def enregistrer_trimestre(self, matricule: str, trimestre: int, notes: Dict[str, Valeur],
+                              matieres_effacees: Iterable[str] = ()):
+        """Enregistre les notes d'un étudiant pour un trimestre et efface les matières sans note"""
+        enregistrements = [((matricule, matiere, trimestre), valeur) for matiere, valeur in notes.items()]
+        enregistrements += [((matricule, matiere, trimestre), None)
+                            for matiere in matieres_effacees if matiere not in notes]
+        self.ajouter(enregistrements)
+
+    # Compactage
+
+    def compacter(self) -> int:
+        """Réécrit le journal avec son seul état courant (écriture temporaire + renommage atomique).
+
+        Retourne le nombre d'enregistrements périmés supprimés.
+        """
+        with self._verrou:
+            etat, total = self._etat_complet()
+            self._ajouts_depuis_compactage = 0
+            vivants = sorted(
+                (sequence, cle, valeur) for cle, (sequence, valeur) in etat.items() if valeur is not None
+            )
+            if total == len(vivants):
+                return 0
+
+            temporaire = self.chemin + ".tmp"
+            with open(temporaire, "w", encoding="utf-8") as f:
+                # Séquences renumérotées en conservant l'ordre relatif des enregistrements
+                for sequence, (_, (matricule, matiere, trimestre), (note_cc, note_exam)) in enumerate(vivants, 1):
+                    f.write(f"{sequence}|{matricule}|{matiere}|{note_cc:.2f}|{note_exam:.2f}|{trimestre}\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporaire, self.chemin)
+            self._sequence = len(vivants)
+            self._remplacer_index(etat, _signature(self.chemin))
+            return total - len(vivants)
+
+    def compacter_si_necessaire(self, seuil: int = SEUIL_COMPACTAGE) -> int:
+        """Compacte si le journal contient plus d'enregistrements périmés que de vivants (et au moins seuil).
+
+        Le fichier n'est relu que s'il a reçu des ajouts depuis la dernière vérification
+        (ou à la première vérification du processus).
+        """
+        with self._verrou:
+            if self._ajouts_depuis_compactage == 0 and self._sequence is not None:
+                return 0
+            etat, total = self._etat_complet()
+            vivants = sum(1 for _, valeur in etat.values() if valeur is not None)
+            if total - vivants > max(seuil, vivants):
+                return self.compacter()
+            self._ajouts_depuis_compactage = 0
+            if self._sequence is None:
+                self._sequence = self._derniere_sequence()
+            return 0
@@ -1,23 +1,58 @@
 import sys
 import os
 from datetime import datetime
-from PyQt5.QtWidgets import QApplication, QMainWindow, QMessageBox, QTableWidgetItem, QPushButton, QDialog
-from PyQt5.QtCore import QDate, Qt
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QMessageBox, QPushButton, QDialog,
+                             QFileDialog, QProgressDialog, QLabel, QShortcut)
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtCore import QDate, Qt, QTimer
 from ui_main_window import Ui_MainWindow
-from database import Database
+from database import Database, GestionnaireConnexions
 from models import Etudiant
-from notes_window import NotesWindow
 from modifier_etudiant_window import ModifierEtudiantWindow
+from importation import importer_etudiants
+from modeles_qt import EtudiantsTableModel, EtudiantsFiltreModel
+from taches import GestionnaireTaches
+from recherche import CacheRecherche
+from metriques import registre
+
+def importer_etudiants_tache(controle, db, chemin):
+    """Import d'une liste d'étudiants dans un fil du pool ; l'annulation prend effet après le lot en cours"""
+    return importer_etudiants(chemin, db, progression=controle.progression)
+
+
+def rechercher_etudiants_tache(controle, db, terme):
+    """Recherche dans un fil du pool ; une recherche plus récente annule celle-ci"""
+    return db.rechercher_etudiants(terme)
+
+
+def lire_etudiants_txt():
+    """Lignes complètes (7 champs) du fichier texte, sans créer d'objet Etudiant"""
+    if not os.path.exists('etudiants.txt'):
+        return []
+    with registre.mesurer("fichiers.lecture_etudiants"), open('etudiants.txt', 'r', encoding='utf-8') as f:
+        # Découper chaque ligne en utilisant le séparateur |
+        return [donnees for donnees in (ligne.strip().split('|') for ligne in f) if len(donnees) == 7]
+
 
 class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
     def __init__(self):
         super().__init__()
         self.setupUi(self)
         self.db = Database()
+        self.cache_recherche = CacheRecherche()
+        # Recherche lancée quand la saisie marque une pause
+        self.timer_recherche = QTimer(self)
+        self.timer_recherche.setSingleShot(True)
+        self.timer_recherche.setInterval(250)
         self.setup_ui()
         self.setup_connections()
         self.current_matricule = None
         self.notes_window = None
+        self.taches = GestionnaireTaches(self)
+        self.tache_import = None
+        self.source_etudiants = None
+        self.panneau_metriques = None
+        self.setup_metriques()
         # Charger les étudiants depuis le fichier texte au démarrage
         self.charger_etudiants_txt()
         # Charger tous les étudiants au démarrage
@@ -29,17 +64,14 @@ class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
         self.prenom_input.setPlaceholderText("Entrez le prénom...")
         self.matricule_search.setPlaceholderText("Rechercher par matricule, nom ou prénom...")
         
-        # Configuration des en-têtes du tableau
-        self.table_etudiants.setColumnCount(7)
-        self.table_etudiants.setHorizontalHeaderLabels([
-            "Matricule",
-            "Nom",
-            "Prénom",
-            "Date de naissance",
-            "Sexe",
-            "Filière",
-            "Niveau"
-        ])
+        # Modèle du tableau : les en-têtes viennent du modèle, le tri et le filtre du proxy
+        self.modele_etudiants = EtudiantsTableModel(self)
+        self.proxy_etudiants = EtudiantsFiltreModel(self)
+        self.proxy_etudiants.setSourceModel(self.modele_etudiants)
+        self.table_etudiants.setModel(self.proxy_etudiants)
+        # Aucun tri au départ : l'ordre de chargement est conservé jusqu'au clic sur un en-tête
+        self.table_etudiants.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table_etudiants.setSortingEnabled(True)
         # Ajuster la taille des colonnes
         self.table_etudiants.horizontalHeader().setStretchLastSection(True)
         self.table_etudiants.setColumnWidth(0, 120)  # Matricule
@@ -91,13 +123,59 @@ class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
         self.btn_notes.setEnabled(True)  # Toujours actif
         self.buttons_layout.addWidget(self.btn_notes)
 
+        # Bouton d'import d'une promotion entière (CSV ou Excel)
+        self.btn_importer = QPushButton("Importer Étudiants")
+        self.buttons_layout.addWidget(self.btn_importer)
+
+    def setup_metriques(self):
+        """Latences de la base dans la barre d'état, instantanés périodiques, panneau Ctrl+Maj+M"""
+        self.label_metriques = QLabel()
+        self.statusBar().addPermanentWidget(self.label_metriques)
+        self.version_metriques = None
+        self.timer_metriques = QTimer(self)
+        self.timer_metriques.timeout.connect(self.afficher_metriques)
+        self.timer_metriques.start(2000)
+        # Un instantané par minute dans metriques.jsonl (rien n'est écrit si rien n'a changé)
+        self.timer_instantanes = QTimer(self)
+        self.timer_instantanes.timeout.connect(self.ecrire_instantane_metriques)
+        self.timer_instantanes.start(60000)
+        QShortcut(QKeySequence("Ctrl+Shift+M"), self, activated=self.ouvrir_panneau_metriques)
+
+    def afficher_metriques(self):
+        if registre.version == self.version_metriques:
+            return
+        self.version_metriques = registre.version
+        duree = registre.duree("db")
+        if duree:
+            self.label_metriques.setText(f"Base : p50 {duree['p50_ms']:.1f} ms · p95 {duree['p95_ms']:.1f} ms "
+                                         f"({duree['appels']} appels)")
+
+    def ecrire_instantane_metriques(self):
+        try:
+            registre.ecrire_instantane()
+        except OSError as e:
+            registre.erreur("instantane_metriques", f"Impossible d'écrire les métriques : {e}")
+
+    def ouvrir_panneau_metriques(self):
+        # Outil de développement : chargé seulement s'il est ouvert
+        from panneau_metriques import PanneauMetriques
+        if self.panneau_metriques is None:
+            self.panneau_metriques = PanneauMetriques(self)
+        self.panneau_metriques.show()
+        self.panneau_metriques.raise_()
+        self.panneau_metriques.activateWindow()
+
     def setup_connections(self):
         self.btn_ajouter.clicked.connect(self.ajouter_etudiant)
         self.btn_modifier.clicked.connect(self.modifier_etudiant)
         self.btn_supprimer.clicked.connect(self.supprimer_etudiant)
         self.btn_actualiser.clicked.connect(self.charger_etudiants)
         self.btn_rechercher.clicked.connect(self.rechercher_etudiant)
-        self.table_etudiants.itemSelectionChanged.connect(self.selection_changed)
+        self.matricule_search.returnPressed.connect(self.rechercher_etudiant)
+        # textEdited : saisie de l'utilisateur seulement, pas le setText de remplir_formulaire
+        self.matricule_search.textEdited.connect(self.timer_recherche.start)
+        self.timer_recherche.timeout.connect(lambda: self.lancer_recherche(explicite=False))
+        self.table_etudiants.selectionModel().selectionChanged.connect(self.selection_changed)
         
         # Connexions pour la validation en temps réel
         self.nom_input.textChanged.connect(self.valider_champs)
@@ -107,6 +185,7 @@ class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
         self.niveau_combo.currentTextChanged.connect(self.niveau_change)
         self.filiere_combo.currentTextChanged.connect(self.filtrer_etudiants)
         self.btn_notes.clicked.connect(self.ouvrir_gestion_notes)
+        self.btn_importer.clicked.connect(self.importer_etudiants)
 
     def niveau_change(self, niveau):
         try:
@@ -118,7 +197,7 @@ class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
             self.filiere_combo.setCurrentIndex(0)
             self.filtrer_etudiants()
         except Exception as e:
-            print(f"Erreur dans niveau_change: {str(e)}")
+            registre.erreur("niveau_change", f"Erreur dans niveau_change: {str(e)}")
             QMessageBox.critical(self, "Erreur", f"Erreur lors du changement de niveau : {str(e)}")
 
     def filtrer_etudiants(self):
@@ -127,31 +206,31 @@ class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
         filiere = self.filiere_combo.currentText()
         
         if not niveau or not filiere:
-            self.table_etudiants.setRowCount(0)
-            self.table_etudiants.setHorizontalHeaderLabels([
-                "Matricule", "Nom", "Prénom", "Date de naissance", "Sexe", "Filière", "Niveau"
-            ])
+            # État transitoire (liste des filières en cours de remplissage) : le tableau est laissé tel quel
             self.statusBar().showMessage("Veuillez sélectionner un niveau et une filière", 3000)
             return
 
+        # Le filtre porte sur les étudiants de la base, rechargés seulement s'ils ne sont pas déjà affichés
+        # (ou si un chargement en cours remplacerait l'affichage filtré)
+        if self.source_etudiants != "base" or self.taches.en_cours("etudiants"):
+            self.charger_source("base", self.appliquer_filtre)
+        else:
+            self.appliquer_filtre()
+
+    def appliquer_filtre(self):
+        """Filtre les étudiants affichés selon le niveau et la filière sélectionnés"""
+        niveau = self.niveau_combo.currentText()
+        filiere = self.filiere_combo.currentText()
         try:
-            tous_etudiants = self.db.get_all_etudiants()
-            etudiants_filtres = [
-                etudiant for etudiant in tous_etudiants
-                if etudiant.niveau == niveau and etudiant.filiere == filiere
-            ]
-            self.table_etudiants.setRowCount(len(etudiants_filtres))
-            self.table_etudiants.setHorizontalHeaderLabels([
-                "Matricule", "Nom", "Prénom", "Date de naissance", "Sexe", "Filière", "Niveau"
-            ])
-            for row, etudiant in enumerate(etudiants_filtres):
-                self.afficher_etudiant(row, etudiant)
-            if etudiants_filtres:
-                self.statusBar().showMessage(f"{len(etudiants_filtres)} étudiant(s) trouvé(s) pour {niveau} - {filiere}", 3000)
+            with registre.mesurer("ui.filtrage_tableau"):
+                self.proxy_etudiants.definir_filtre(niveau, filiere)
+            nombre = self.proxy_etudiants.rowCount()
+            if nombre:
+                self.statusBar().showMessage(f"{nombre} étudiant(s) trouvé(s) pour {niveau} - {filiere}", 3000)
             else:
                 self.statusBar().showMessage(f"Aucun étudiant trouvé pour {niveau} - {filiere}", 3000)
         except Exception as e:
-            print(f"Erreur dans filtrer_etudiants: {str(e)}")
+            registre.erreur("filtrer_etudiants", f"Erreur dans filtrer_etudiants: {str(e)}")
             QMessageBox.critical(self, "Erreur", f"Impossible de filtrer les étudiants: {str(e)}")
             self.statusBar().showMessage("Erreur lors du filtrage des étudiants", 3000)
 
@@ -165,7 +244,7 @@ class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
             self.btn_modifier.setEnabled(nom_valide and prenom_valide)
 
     def selection_changed(self):
-        selected = self.table_etudiants.selectedItems()
+        selected = self.table_etudiants.selectionModel().selectedRows()
         if selected:
             row = selected[0].row()
             self.remplir_formulaire(row)
@@ -179,7 +258,7 @@ class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
             self.btn_notes.setEnabled(True)  # Toujours actif, même sans sélection
 
     def remplir_formulaire(self, row):
-        self.current_matricule = self.table_etudiants.item(row, 0).text()
+        self.current_matricule = self.proxy_etudiants.matricule(row)
         etudiant = self.db.rechercher_etudiant(self.current_matricule)
         if etudiant:
             self.matricule_search.setText(self.current_matricule)
@@ -227,46 +306,46 @@ class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
     def sauvegarder_etudiant_txt(self, etudiant):
         """Sauvegarde les informations d'un étudiant dans un fichier texte"""
         try:
-            with open('etudiants.txt', 'a', encoding='utf-8') as f:  # mode append
+            with registre.mesurer("fichiers.ecriture_etudiants"), open('etudiants.txt', 'a', encoding='utf-8') as f:  # mode append
                 ligne = f"{etudiant.matricule}|{etudiant.nom}|{etudiant.prenom}|{etudiant.date_naissance}|{etudiant.sexe}|{etudiant.filiere}|{etudiant.niveau}\n"
                 f.write(ligne)
             print(f"Étudiant sauvegardé dans etudiants.txt: {etudiant.nom} {etudiant.prenom}")
         except Exception as e:
-            print(f"Erreur lors de la sauvegarde dans le fichier texte: {str(e)}")
+            registre.erreur("sauvegarde_txt", f"Erreur lors de la sauvegarde dans le fichier texte: {str(e)}")
             QMessageBox.warning(self, "Avertissement", "Impossible de sauvegarder dans le fichier texte")
 
     def charger_etudiants_txt(self):
-        """Charge et affiche les étudiants depuis le fichier texte"""
-        try:
-            self.table_etudiants.setRowCount(0)
-            if not os.path.exists('etudiants.txt'):
-                return
-                
-            with open('etudiants.txt', 'r', encoding='utf-8') as f:
-                lignes = f.readlines()
-                
-            self.table_etudiants.setRowCount(len(lignes))
-            for row, ligne in enumerate(lignes):
-                # Découper la ligne en utilisant le séparateur |
-                donnees = ligne.strip().split('|')
-                if len(donnees) == 7:  # Vérifier que nous avons toutes les données
-                    matricule, nom, prenom, date_naissance, sexe, filiere, niveau = donnees
-                    etudiant = Etudiant(
-                        matricule=matricule,
-                        nom=nom,
-                        prenom=prenom,
-                        date_naissance=date_naissance,
-                        sexe=sexe,
-                        filiere=filiere,
-                        niveau=niveau
-                    )
-                    self.afficher_etudiant(row, etudiant)
-                    
-            self.statusBar().showMessage(f"{len(lignes)} étudiant(s) chargé(s) depuis le fichier texte", 3000)
-        except Exception as e:
-            print(f"Erreur lors du chargement du fichier texte: {str(e)}")
+        """Charge et affiche les étudiants depuis le fichier texte (en tâche de fond)"""
+        def afficher():
+            self.proxy_etudiants.definir_filtre()
+            nombre = self.modele_etudiants.rowCount()
+            if nombre:
+                self.statusBar().showMessage(f"{nombre} étudiant(s) chargé(s) depuis le fichier texte", 3000)
+
+        def echec(erreur):
+            registre.erreur("chargement_txt", f"Erreur lors du chargement du fichier texte: {erreur}")
             QMessageBox.critical(self, "Erreur", "Impossible de charger le fichier texte des étudiants")
 
+        self.charger_source("txt", afficher, echec)
+
+    def charger_source(self, source, puis, echec=None):
+        """Charge les étudiants de la base ("base") ou du fichier texte ("txt") hors du fil de
+        l'interface, les affiche, puis appelle puis(). Un nouveau chargement annule le précédent."""
+        if source == "base":
+            fonction = lambda controle, db: db.get_all_etudiants()
+        else:
+            fonction = lambda controle: lire_etudiants_txt()
+
+        def termine(etudiants):
+            self.afficher_etudiants(etudiants, source)
+            puis()
+
+        if echec is None:
+            echec = lambda erreur: QMessageBox.critical(
+                self, "Erreur", f"Impossible de charger les étudiants: {erreur}")
+        self.statusBar().showMessage("Chargement des étudiants...")
+        self.taches.soumettre(fonction, cle="etudiants", avec_base=source == "base", termine=termine, echec=echec)
+
     def ajouter_etudiant(self):
         if not self.valider_formulaire():
             return
@@ -283,8 +362,11 @@ class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
             )
 
             if self.db.ajouter_etudiant(etudiant):
+                self.cache_recherche.vider()
                 # Sauvegarder dans le fichier texte
                 self.sauvegarder_etudiant_txt(etudiant)
+                # Une ligne de plus dans le modèle, sans recharger la liste
+                self.modele_etudiants.ajouter_etudiant(etudiant)
                 
                 QMessageBox.information(self, "Succès", "Étudiant ajouté avec succès!")
                 self.effacer_formulaire()
@@ -304,17 +386,72 @@ class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Une erreur est survenue: {str(e)}")
 
+    def importer_etudiants(self):
+        """Importe une liste d'étudiants en tâche de fond, avec suivi de progression et annulation"""
+        if self.tache_import is not None:
+            QMessageBox.information(self, "Information", "Un import est déjà en cours")
+            return
+        chemin, _ = QFileDialog.getOpenFileName(
+            self, "Importer des étudiants", "", "Listes d'étudiants (*.csv *.xlsx)")
+        if not chemin:
+            return
+
+        self.progression_import = QProgressDialog("Import des étudiants...", "Annuler", 0, 0, self)
+        self.progression_import.setWindowTitle("Import")
+        self.progression_import.setWindowModality(Qt.WindowModal)
+        self.progression_import.show()
+
+        self.btn_importer.setEnabled(False)
+        self.tache_import = self.taches.soumettre(
+            importer_etudiants_tache, chemin, cle="import", avec_base=True,
+            progression=self.import_progression, termine=self.import_termine,
+            echec=self.import_echec, annulee=self.import_annule)
+        self.progression_import.canceled.connect(self.tache_import.annuler)
+        self.tache_import.signaux.fini.connect(self.import_fini)
+
+    def import_fini(self):
+        # Des lots ont pu être enregistrés, que l'import ait abouti, échoué ou été annulé
+        self.cache_recherche.vider()
+        self.tache_import = None
+        self.progression_import.close()
+        self.btn_importer.setEnabled(True)
+
+    def import_progression(self, lues, enregistres):
+        self.progression_import.setLabelText(f"{enregistres} étudiant(s) importé(s) sur {lues} ligne(s) lue(s)...")
+        self.statusBar().showMessage(f"Import en cours : {enregistres} étudiant(s)")
+
+    def import_termine(self, rapport):
+        self.charger_etudiants()
+        message = f"{rapport.enregistres} étudiant(s) importé(s) sur {rapport.total}."
+        if rapport.erreurs:
+            details = "\n".join(f"Ligne {numero} : {erreur}" for numero, erreur in rapport.erreurs[:10])
+            if len(rapport.erreurs) > 10:
+                details += f"\n... et {len(rapport.erreurs) - 10} autre(s) erreur(s)"
+            QMessageBox.warning(self, "Import terminé avec des erreurs", f"{message}\n\n{details}")
+        else:
+            QMessageBox.information(self, "Succès", message)
+        self.statusBar().showMessage(message, 5000)
+
+    def import_annule(self):
+        # Les lots déjà validés restent en base et dans le fichier texte
+        self.charger_etudiants()
+        self.statusBar().showMessage("Import annulé", 3000)
+
+    def import_echec(self, erreur):
+        QMessageBox.critical(self, "Erreur", f"Erreur lors de l'import des étudiants : {erreur}")
+        self.statusBar().showMessage("Échec de l'import", 3000)
+
     def mettre_a_jour_fichier_txt(self):
         """Met à jour le fichier texte avec tous les étudiants actuels"""
         try:
             etudiants = self.db.get_all_etudiants()
-            with open('etudiants.txt', 'w', encoding='utf-8') as f:
+            with registre.mesurer("fichiers.ecriture_etudiants"), open('etudiants.txt', 'w', encoding='utf-8') as f:
                 for etudiant in etudiants:
                     ligne = f"{etudiant.matricule}|{etudiant.nom}|{etudiant.prenom}|{etudiant.date_naissance}|{etudiant.sexe}|{etudiant.filiere}|{etudiant.niveau}\n"
                     f.write(ligne)
             print("Fichier texte mis à jour avec succès")
         except Exception as e:
-            print(f"Erreur lors de la mise à jour du fichier texte: {str(e)}")
+            registre.erreur("mise_a_jour_txt", f"Erreur lors de la mise à jour du fichier texte: {str(e)}")
             QMessageBox.warning(self, "Avertissement", "Impossible de mettre à jour le fichier texte")
 
     def modifier_etudiant(self):
@@ -336,6 +473,7 @@ class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
                 niveau=donnees["niveau"]
             )
             if self.db.modifier_etudiant(nouvel_etudiant):
+                self.cache_recherche.vider()
                 self.mettre_a_jour_fichier_txt()
                 QMessageBox.information(self, "Succès", "Étudiant modifié avec succès!")
                 self.charger_etudiants()
@@ -359,10 +497,11 @@ class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
             try:
                 # Supprimer l'étudiant de la base
                 if self.db.supprimer_etudiant(self.current_matricule):
+                    self.cache_recherche.vider()
                     # Mettre à jour le fichier texte
                     self.mettre_a_jour_fichier_txt()
-                    # Mettre à jour la table et effacer le formulaire
-                    self.charger_etudiants()
+                    # Retirer la ligne de la table et effacer le formulaire
+                    self.modele_etudiants.retirer_etudiant(self.current_matricule)
                     self.effacer_formulaire()
                     QMessageBox.information(self, "Succès", "Étudiant supprimé avec succès!")
                 else:
@@ -371,84 +510,78 @@ class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
                 QMessageBox.critical(self, "Erreur", f"Une erreur est survenue: {str(e)}")
 
     def rechercher_etudiant(self):
-        """Recherche un étudiant par matricule, nom ou prénom dans le fichier texte"""
+        """Recherche des étudiants par matricule, nom ou prénom (bouton ou touche Entrée)"""
+        self.timer_recherche.stop()
+        self.lancer_recherche(explicite=True)
+
+    def lancer_recherche(self, explicite):
+        """Recherche le terme saisi : depuis le cache si possible, sinon dans la base en tâche de fond.
+
+        explicite : demandée par l'utilisateur (messages et remplissage du formulaire) plutôt
+        que déclenchée par une pause de la saisie (barre de statut seulement).
+        """
         terme = self.matricule_search.text().strip()
         if not terme:
-            self.filtrer_etudiants()
-            self.statusBar().showMessage("Veuillez entrer un terme de recherche", 3000)
+            self.taches.annuler("recherche")
+            if explicite or self.source_etudiants == "recherche":
+                self.filtrer_etudiants()
+            if explicite:
+                self.statusBar().showMessage("Veuillez entrer un terme de recherche", 3000)
             return
 
-        try:
-            if not os.path.exists('etudiants.txt'):
-                QMessageBox.information(self, "Information", "Aucun étudiant trouvé (fichier manquant)")
-                self.statusBar().showMessage("Aucun étudiant trouvé", 3000)
-                self.effacer_formulaire()
-                return
-
-            etudiants_trouves = []
-            with open('etudiants.txt', 'r', encoding='utf-8') as f:
-                for ligne in f:
-                    donnees = ligne.strip().split('|')
-                    if len(donnees) == 7:
-                        matricule, nom, prenom, date_naissance, sexe, filiere, niveau = donnees
-                        if (terme.lower() in matricule.lower() or
-                            terme.lower() in nom.lower() or
-                            terme.lower() in prenom.lower()):
-                            etudiant = Etudiant(
-                                matricule=matricule,
-                                nom=nom,
-                                prenom=prenom,
-                                date_naissance=date_naissance,
-                                sexe=sexe,
-                                filiere=filiere,
-                                niveau=niveau
-                            )
-                            etudiants_trouves.append(etudiant)
-
-            self.table_etudiants.setRowCount(0)
-            if etudiants_trouves:
-                self.table_etudiants.setRowCount(len(etudiants_trouves))
-                self.table_etudiants.setHorizontalHeaderLabels([
-                    "Matricule", "Nom", "Prénom", "Date de naissance", "Sexe", "Filière", "Niveau"
-                ])
-                for row, etudiant in enumerate(etudiants_trouves):
-                    self.afficher_etudiant(row, etudiant)
-                if len(etudiants_trouves) == 1:
-                    self.remplir_formulaire(0)
-                self.statusBar().showMessage(f"{len(etudiants_trouves)} étudiant(s) trouvé(s) pour '{terme}'", 3000)
-            else:
-                QMessageBox.information(self, "Information", "Aucun étudiant trouvé")
-                self.statusBar().showMessage("Aucun étudiant trouvé", 3000)
-                self.effacer_formulaire()
-        except Exception as e:
-            QMessageBox.critical(self, "Erreur", f"Erreur lors de la recherche : {str(e)}")
+        etudiants = self.cache_recherche.chercher(terme)
+        if etudiants is not None:
+            self.taches.annuler("recherche")
+            self.afficher_resultats_recherche(terme, etudiants, explicite)
+            return
+
+        generation = self.cache_recherche.generation
+
+        def termine(etudiants):
+            # Cache vidé pendant la requête : ces résultats sont peut-être déjà périmés
+            if self.cache_recherche.generation == generation:
+                self.cache_recherche.enregistrer(terme, etudiants)
+            self.afficher_resultats_recherche(terme, etudiants, explicite)
+
+        def echec(erreur):
+            if explicite:
+                QMessageBox.critical(self, "Erreur", f"Erreur lors de la recherche : {erreur}")
             self.statusBar().showMessage("Erreur lors de la recherche", 3000)
 
+        self.taches.soumettre(rechercher_etudiants_tache, terme, cle="recherche", avec_base=True,
+                              termine=termine, echec=echec)
+
+    def afficher_resultats_recherche(self, terme, etudiants, explicite=True):
+        """Affiche les résultats dans leur ordre de pertinence"""
+        self.taches.annuler("etudiants")
+        self.afficher_etudiants(etudiants, "recherche")
+        self.proxy_etudiants.definir_filtre()
+        self.table_etudiants.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        if etudiants:
+            if len(etudiants) == 1 and explicite:
+                self.remplir_formulaire(0)
+            self.statusBar().showMessage(f"{len(etudiants)} étudiant(s) trouvé(s) pour '{terme}'", 3000)
+        elif explicite:
+            QMessageBox.information(self, "Information", "Aucun étudiant trouvé")
+            self.statusBar().showMessage("Aucun étudiant trouvé", 3000)
+            self.effacer_formulaire()
+        else:
+            self.statusBar().showMessage(f"Aucun étudiant trouvé pour '{terme}'", 3000)
+
     def charger_etudiants(self):
-        """Charge tous les étudiants sans filtre"""
-        try:
-            etudiants = self.db.get_all_etudiants()
-            self.table_etudiants.setRowCount(len(etudiants))
-            for row, etudiant in enumerate(etudiants):
-                self.afficher_etudiant(row, etudiant)
-            self.statusBar().showMessage(f"{len(etudiants)} étudiant(s) chargé(s)", 3000)
-        except Exception as e:
-            QMessageBox.critical(self, "Erreur", f"Impossible de charger les étudiants: {str(e)}")
-
-    def afficher_etudiant(self, row, etudiant):
-        items = [
-            QTableWidgetItem(etudiant.matricule),
-            QTableWidgetItem(etudiant.nom),
-            QTableWidgetItem(etudiant.prenom),
-            QTableWidgetItem(etudiant.date_naissance),
-            QTableWidgetItem(etudiant.sexe),
-            QTableWidgetItem(etudiant.filiere),
-            QTableWidgetItem(etudiant.niveau)
-        ]
-        
-        for col, item in enumerate(items):
-            item.setFlags(item.flags() & ~Qt.ItemIsEditable)  # Rendre les cellules non éditables
-            self.table_etudiants.setItem(row, col, item)
+        """Charge tous les étudiants sans filtre (en tâche de fond)"""
+        def afficher():
+            self.proxy_etudiants.definir_filtre()
+            self.statusBar().showMessage(f"{self.modele_etudiants.rowCount()} étudiant(s) chargé(s)", 3000)
+
+        self.charger_source("base", afficher)
+
+    def afficher_etudiants(self, etudiants, source):
+        """Remplace le contenu du tableau ; source ("base", "txt" ou "recherche") indique d'où viennent les lignes"""
+        with registre.mesurer("ui.remplissage_tableau"):
+            self.modele_etudiants.definir_etudiants(etudiants)
+        registre.compter("ui.lignes_affichees", len(etudiants))
+        self.source_etudiants = source
 
     def generer_matricule(self):
         return f"ETU{datetime.now().strftime('%y%m%d%H%M%S')}"
@@ -471,6 +604,8 @@ class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
     def ouvrir_gestion_notes(self):
         niveau = self.niveau_combo.currentText()
         filiere = self.filiere_combo.currentText()
+        # Chargée à la première ouverture : son module et l'export ne pèsent pas sur le démarrage
+        from notes_window import NotesWindow
         self.notes_window = NotesWindow(
             matricule=self.current_matricule,
             niveau=niveau,
@@ -482,11 +617,20 @@ class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
         self.notes_window.activateWindow()
 
     def closeEvent(self, event):
+        # Arrêter les tâches en cours (un import s'arrête après son lot courant)
+        self.timer_recherche.stop()
+        self.timer_metriques.stop()
+        self.timer_instantanes.stop()
+        self.taches.annuler_tout()
+        self.taches.attendre()
         # Fermer proprement la base de données
         if self.db:
             self.db.close()
         if self.notes_window:
             self.notes_window.close()
+        if self.panneau_metriques:
+            self.panneau_metriques.close()
+        self.ecrire_instantane_metriques()
         super().closeEvent(event)
 
     def showEvent(self, event):
@@ -516,6 +660,8 @@ class GestionEtudiantsApp(QMainWindow, Ui_MainWindow):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    # Fermeture déterministe des connexions partagées avec la base
+    app.aboutToQuit.connect(GestionnaireConnexions.fermer_tout)
     window = GestionEtudiantsApp()
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
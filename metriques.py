@@ -0,0 +1,178 @@
+"""Registre des métriques de l'application : compteurs, durées et erreurs des chemins critiques.
+
+Mesurer coûte deux appels à time.perf_counter et un ajout sous verrou : les méthodes de
+Database (chronometrer_methodes), les lectures et écritures de fichiers et le remplissage
+des tableaux sont mesurés en permanence, depuis n'importe quel fil. Les centiles (p50, p95)
+sont calculés à la demande sur les ECHANTILLONS dernières durées de chaque métrique.
+
+Un instantané (compteurs, résumé des durées, dernières erreurs) peut être ajouté à un
+fichier JSON lines, une ligne par instantané, pour l'analyse hors ligne.
+"""
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+ECHANTILLONS = 1024      # durées conservées par métrique pour les centiles
+ERREURS_CONSERVEES = 50
+FICHIER_METRIQUES = "metriques.jsonl"
+
+
+class Duree:
+    """Durées d'une métrique : totaux depuis le démarrage et dernières valeurs (en secondes)"""
+
+    def __init__(self):
+        self.nombre = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.valeurs = deque(maxlen=ECHANTILLONS)
+
+    def ajouter(self, secondes: float):
+        self.nombre += 1
+        self.total += secondes
+        if secondes > self.maximum:
+            self.maximum = secondes
+        self.valeurs.append(secondes)
+
+    def resume(self) -> Dict[str, float]:
+        """Nombre d'appels et durées en millisecondes ; p50 et p95 sur les dernières valeurs"""
+        valeurs = sorted(self.valeurs)
+
+        def centile(q):
+            # Rang le plus proche : la valeur sous laquelle se trouvent q % des mesures
+            return valeurs[max(0, -(-len(valeurs) * q // 100) - 1)] * 1000 if valeurs else 0.0
+
+        return {
+            "appels": self.nombre,
+            "total_ms": round(self.total * 1000, 3),
+            "p50_ms": round(centile(50), 3),
+            "p95_ms": round(centile(95), 3),
+            "max_ms": round(self.maximum * 1000, 3),
+        }
+
+
+class Registre:
+    """Compteurs, durées et erreurs ; toutes les méthodes peuvent être appelées depuis n'importe quel fil"""
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._compteurs: Dict[str, int] = {}
+        self._durees: Dict[str, Duree] = {}
+        self._erreurs = deque(maxlen=ERREURS_CONSERVEES)
+        self._version = 0            # incrémentée à chaque enregistrement
+        self._version_ecrite = -1    # version du dernier instantané écrit
+        self.debut = datetime.now()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def compter(self, nom: str, n: int = 1):
+        with self._verrou:
+            self._compteurs[nom] = self._compteurs.get(nom, 0) + n
+            self._version += 1
+
+    def enregistrer(self, nom: str, secondes: float, *agregats: str):
+        """Ajoute une durée à la métrique nom et à chaque métrique agrégée (« db » pour toutes les méthodes)"""
+        with self._verrou:
+            for cle in (nom, *agregats):
+                try:
+                    self._durees[cle].ajouter(secondes)
+                except KeyError:
+                    duree = self._durees[cle] = Duree()
+                    duree.ajouter(secondes)
+            self._version += 1
+
+    @contextmanager
+    def mesurer(self, nom: str, *agregats: str):
+        """Mesure la durée du bloc ; une exception le traversant est aussi comptée (nom.erreurs)"""
+        debut = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.compter(f"{nom}.erreurs")
+            raise
+        finally:
+            self.enregistrer(nom, time.perf_counter() - debut, *agregats)
+
+    def erreur(self, nom: str, message: str):
+        """Consigne une erreur rattrapée par l'application ; le message est aussi affiché comme avant"""
+        print(message)
+        with self._verrou:
+            self._compteurs[f"erreurs.{nom}"] = self._compteurs.get(f"erreurs.{nom}", 0) + 1
+            self._erreurs.append((datetime.now().isoformat(timespec="seconds"), nom, message))
+            self._version += 1
+
+    def duree(self, nom: str) -> Optional[Dict[str, float]]:
+        """Résumé d'une métrique de durée (voir Duree.resume), None si elle n'a jamais été mesurée"""
+        with self._verrou:
+            duree = self._durees.get(nom)
+            return duree.resume() if duree is not None else None
+
+    def instantane(self) -> dict:
+        with self._verrou:
+            return {
+                "horodatage": datetime.now().isoformat(timespec="seconds"),
+                "depuis": self.debut.isoformat(timespec="seconds"),
+                "compteurs": dict(sorted(self._compteurs.items())),
+                "durees": {nom: duree.resume() for nom, duree in sorted(self._durees.items())},
+                "erreurs": [list(erreur) for erreur in self._erreurs],
+            }
+
+    def ecrire_instantane(self, chemin: str = FICHIER_METRIQUES) -> bool:
+        """Ajoute un instantané au fichier JSON lines s'il y a du nouveau depuis le précédent"""
+        version = self._version
+        if version == self._version_ecrite:
+            return False
+        ligne = json.dumps(self.instantane(), ensure_ascii=False)
+        with open(chemin, "a", encoding="utf-8") as f:
+            f.write(ligne + "\n")
+        self._version_ecrite = version
+        return True
+
+    def reinitialiser(self):
+        with self._verrou:
+            self._compteurs.clear()
+            self._durees.clear()
+            self._erreurs.clear()
+            self._version += 1
+            self.debut = datetime.now()
+
+
+registre = Registre()
+
+
+def chronometrer_methodes(classe, prefixe: str, exclure: Iterable[str] = ()):
+    """Mesure chaque appel des méthodes publiques de classe sous « prefixe.méthode » et « prefixe »"""
+    exclues = set(exclure)
+    for nom, methode in inspect.getmembers(classe, inspect.isfunction):
+        if nom.startswith("_") or nom in exclues:
+            continue
+
+        def envelopper(methode, metrique):
+            # Équivalent de registre.mesurer sans gestionnaire de contexte : certaines méthodes
+            # sont appelées des milliers de fois par opération
+            @functools.wraps(methode)
+            def appel(*args, **kwargs):
+                debut = time.perf_counter()
+                try:
+                    return methode(*args, **kwargs)
+                except BaseException:
+                    registre.compter(f"{metrique}.erreurs")
+                    raise
+                finally:
+                    registre.enregistrer(metrique, time.perf_counter() - debut, prefixe)
+            return appel
+
+        setattr(classe, nom, envelopper(methode, f"{prefixe}.{nom}"))
+
+
+def lignes_tableau(instantane: dict) -> List[tuple]:
+    """(métrique, appels, p50, p95, max, total) des durées d'un instantané, les plus coûteuses d'abord"""
+    return sorted(((nom, d["appels"], d["p50_ms"], d["p95_ms"], d["max_ms"], d["total_ms"])
+                   for nom, d in instantane["durees"].items()), key=lambda ligne: -ligne[5])
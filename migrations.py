@@ -0,0 +1,390 @@
+import sqlite3
+from typing import Callable, List, Tuple
+
+
+def arrondi_python(expression: str) -> str:
+    """round(expression, 2) par arrondi(), le round de Python que Database enregistre sur chaque connexion"""
+    return f"arrondi({expression}, 2)"
+
+
+def arrondi_sql(expression: str) -> str:
+    """round(expression, 2) de Python écrit en SQL intégré, pour une expression positive ou NULL.
+
+    round() de SQLite arrondit la forme décimale au plus loin de zéro (0,015 -> 0,02) ; celui
+    de Python arrondit la valeur binaire exacte (0,015 -> 0,01). Même méthode que
+    calcul_vectorise.arrondir : le produit par 100 est calculé sans erreur (découpage de
+    Dekker), ce qui situe exactement la valeur par rapport au demi-centième ; les cas exactement
+    à mi-chemin vont au pair. CAST AS INTEGER tient lieu de floor (valeurs positives).
+    L'expression est répétée : les agrégats identiques ne sont calculés qu'une fois par SQLite.
+    """
+    valeur = f"({expression})"
+    produit = f"({valeur} * 100)"
+    c = f"(134217729.0 * {valeur})"
+    haut = f"({c} - ({c} - {valeur}))"
+    erreur = f"(({haut} * 100 - {produit}) + ({valeur} - {haut}) * 100)"
+    entier = f"CAST({produit} AS INTEGER)"
+    ecart = f"(({produit} - {entier} - 0.5) + {erreur})"
+    return f"(({entier} + ({ecart} > 0 OR ({ecart} = 0 AND {entier} % 2 = 1))) / 100.0)"
+
+
+def requete_recalcul_etudiants(cible: str, arrondi: Callable[[str], str] = arrondi_python) -> str:
+    """Instructions (séparées par ;) recalculant les lignes de moyennes_etudiants des matricules
+    de cible, une expression d'ensemble SQL : '(NEW.etudiant_matricule)', '(SELECT ...)'.
+
+    Même calcul que Database.calculer_moyenne_generale et que le classement : moyennes
+    trimestrielles pondérées, moyenne annuelle (T1 + T2 + 2×T3) / 4, moyenne générale sur les
+    matières notées aux trois trimestres, crédits. arrondi écrit le round de Python : par
+    défaut la fonction arrondi() des connexions de Database, arrondi_sql dans les déclencheurs.
+    Un étudiant supprimé n'est pas recréé (jointure etudiants).
+    """
+    t1, t2, t3 = (arrondi(f"sum(CASE WHEN mo.trimestre = {trimestre} THEN mo.moyenne * m.coefficient END) * 1.0\n"
+                          f"                         / sum(CASE WHEN mo.trimestre = {trimestre} THEN m.coefficient END)")
+                  for trimestre in (1, 2, 3))
+    annuelle_matiere = arrondi("(sum(CASE WHEN mo.trimestre = 1 THEN mo.moyenne END)\n"
+                               "                              + sum(CASE WHEN mo.trimestre = 2 THEN mo.moyenne END)\n"
+                               "                              + 2 * sum(CASE WHEN mo.trimestre = 3 THEN mo.moyenne END)) / 4")
+    return f"""
+        DELETE FROM moyennes_etudiants WHERE matricule IN {cible};
+        INSERT INTO moyennes_etudiants (matricule, t1, t2, t3, moyenne_annuelle, moyenne, credits)
+        SELECT t.matricule, t.t1, t.t2, t.t3,
+               coalesce({arrondi("(t.t1 + t.t2 + 2 * t.t3) / 4")}, 0.0),
+               coalesce(g.moyenne, 0.0),
+               coalesce(g.credits, 0)
+        FROM (
+            SELECT mo.etudiant_matricule AS matricule,
+                   {t1} AS t1,
+                   {t2} AS t2,
+                   {t3} AS t3
+            FROM moyennes mo
+            JOIN matieres m ON m.id = mo.matiere_id
+            WHERE mo.etudiant_matricule IN {cible}
+            GROUP BY mo.etudiant_matricule
+        ) t
+        JOIN etudiants e ON e.matricule = t.matricule
+        LEFT JOIN (
+            SELECT matricule,
+                   {arrondi("sum(moyenne * coefficient) * 1.0 / sum(coefficient)")} AS moyenne,
+                   sum(CASE WHEN moyenne >= 10 THEN coefficient ELSE 0 END) AS credits
+            FROM (
+                SELECT mo.etudiant_matricule AS matricule,
+                       m.coefficient,
+                       {annuelle_matiere} AS moyenne
+                FROM moyennes mo
+                JOIN matieres m ON m.id = mo.matiere_id
+                WHERE mo.etudiant_matricule IN {cible}
+                GROUP BY mo.etudiant_matricule, mo.matiere_id
+                HAVING count(*) = 3
+            )
+            GROUP BY matricule
+        ) g ON g.matricule = t.matricule;
+    """
+
+
+# Moyennes de toutes les notes complètes (remplissage initial ou reconstruction de la table moyennes)
+REQUETE_REMPLISSAGE_MOYENNES = """
+INSERT OR REPLACE INTO moyennes (etudiant_matricule, matiere_id, trimestre, moyenne)
+SELECT etudiant_matricule, matiere_id, trimestre, arrondi(0.4 * note_cc + 0.6 * note_exam, 2)
+FROM notes
+WHERE note_cc IS NOT NULL AND note_exam IS NOT NULL
+"""
+
+
+# Index de recherche de tous les étudiants (migration 4 et Database.reconstruire_recherche)
+REQUETE_REMPLISSAGE_RECHERCHE = """
+INSERT INTO etudiants_recherche (rowid, matricule, nom, prenom)
+SELECT rowid, texte_recherche(matricule), texte_recherche(nom), texte_recherche(prenom)
+FROM etudiants
+"""
+
+
+def _indexer_etudiant(etudiant: str) -> str:
+    """Ajoute la ligne etudiant (NEW) à l'index de recherche"""
+    return f"""
+        INSERT INTO etudiants_recherche (rowid, matricule, nom, prenom)
+        VALUES ({etudiant}.rowid, texte_recherche({etudiant}.matricule),
+                texte_recherche({etudiant}.nom), texte_recherche({etudiant}.prenom));
+    """
+
+
+def _enregistrer_moyenne(note: str, arrondi: Callable[[str], str] = arrondi_python) -> str:
+    """Remplace dans moyennes la moyenne de la ligne de notes note (NEW) ; aucune ligne si une note manque"""
+    return f"""
+        DELETE FROM moyennes
+        WHERE ({note}.note_cc IS NULL OR {note}.note_exam IS NULL)
+          AND etudiant_matricule = {note}.etudiant_matricule
+          AND matiere_id = {note}.matiere_id AND trimestre = {note}.trimestre;
+        INSERT OR REPLACE INTO moyennes (etudiant_matricule, matiere_id, trimestre, moyenne)
+        SELECT {note}.etudiant_matricule, {note}.matiere_id, {note}.trimestre,
+               {arrondi(f"0.4 * {note}.note_cc + 0.6 * {note}.note_exam")}
+        WHERE {note}.note_cc IS NOT NULL AND {note}.note_exam IS NOT NULL;
+    """
+
+
+def _supprimer_moyenne(note: str) -> str:
+    return f"""
+        DELETE FROM moyennes
+        WHERE etudiant_matricule = {note}.etudiant_matricule
+          AND matiere_id = {note}.matiere_id AND trimestre = {note}.trimestre;
+    """
+
+
+# Marque de la migration 5 : présente dans parametres pendant la transaction d'un lot d'import,
+# jamais validée (Database.ajouter_notes_bulk la retire avant la fin de sa transaction)
+MARQUE_MOYENNES_DIFFEREES = "moyennes_differees"
+DIFFEREES_SQL = f"EXISTS (SELECT 1 FROM parametres WHERE cle = '{MARQUE_MOYENNES_DIFFEREES}')"
+
+
+def _declencheurs_notes(nom: str, evenement: str, moyennes: str, cible: str,
+                        differees: str = "moyennes_differees()",
+                        arrondi: Callable[[str], str] = arrondi_python) -> List[str]:
+    """Paire de déclencheurs sur notes pour un événement.
+
+    Le premier met à jour moyennes et recalcule les étudiants de cible. Le second, actif
+    quand la condition differees est vraie (import en masse), met seulement à jour
+    moyennes : l'import recalcule chaque étudiant une fois par lot. Les conditions WHEN
+    sont exclusives, l'ordre de déclenchement est donc indifférent.
+    """
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {nom} {evenement} ON notes
+        WHEN NOT {differees}
+        BEGIN
+            {moyennes}
+            {requete_recalcul_etudiants(cible, arrondi)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {nom}_differe {evenement} ON notes
+        WHEN {differees}
+        BEGIN
+            {moyennes}
+        END
+        """,
+    ]
+
+
+def _declencheurs_moyennes(differees: str = "moyennes_differees()",
+                           arrondi: Callable[[str], str] = arrondi_python) -> List[str]:
+    """Déclencheurs qui tiennent moyennes et moyennes_etudiants à jour (migrations 3 et 5)"""
+    return [
+        *_declencheurs_notes("trg_notes_insert", "AFTER INSERT",
+                             _enregistrer_moyenne("NEW", arrondi),
+                             "(NEW.etudiant_matricule)", differees, arrondi),
+        *_declencheurs_notes("trg_notes_update",
+                             "AFTER UPDATE OF etudiant_matricule, matiere_id, trimestre, note_cc, note_exam",
+                             _supprimer_moyenne("OLD") + _enregistrer_moyenne("NEW", arrondi),
+                             "(OLD.etudiant_matricule, NEW.etudiant_matricule)", differees, arrondi),
+        *_declencheurs_notes("trg_notes_delete", "AFTER DELETE",
+                             _supprimer_moyenne("OLD"),
+                             "(OLD.etudiant_matricule)", differees, arrondi),
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_matieres_coefficient AFTER UPDATE OF coefficient ON matieres
+        WHEN NEW.coefficient <> OLD.coefficient
+        BEGIN
+            {requete_recalcul_etudiants("(SELECT etudiant_matricule FROM moyennes WHERE matiere_id = NEW.id)", arrondi)}
+        END
+        """,
+    ]
+
+
+# Chaque migration est (version, description, instructions SQL).
+# La version appliquée est conservée dans PRAGMA user_version : une base déjà à jour
+# ne coûte qu'une lecture de ce pragma au démarrage.
+# Ne jamais modifier une migration déjà publiée : ajouter une nouvelle version.
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "Schéma initial", [
+        """
+        CREATE TABLE IF NOT EXISTS etudiants (
+            matricule TEXT PRIMARY KEY,
+            nom TEXT NOT NULL CHECK(length(nom) > 0),
+            prenom TEXT NOT NULL CHECK(length(prenom) > 0),
+            date_naissance DATE NOT NULL,
+            sexe TEXT NOT NULL CHECK(sexe IN ('F', 'H')),
+            filiere TEXT NOT NULL,
+            niveau TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS matieres (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL,
+            coefficient INTEGER NOT NULL CHECK(coefficient > 0),
+            niveau TEXT NOT NULL,
+            filiere TEXT NOT NULL,
+            UNIQUE(nom, niveau, filiere)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS notes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            etudiant_matricule TEXT NOT NULL,
+            matiere_id INTEGER NOT NULL,
+            trimestre INTEGER NOT NULL CHECK(trimestre IN (1, 2, 3)),
+            note_cc REAL CHECK(note_cc >= 0 AND note_cc <= 20),
+            note_exam REAL CHECK(note_exam >= 0 AND note_exam <= 20),
+            FOREIGN KEY (etudiant_matricule) REFERENCES etudiants(matricule) ON DELETE CASCADE,
+            FOREIGN KEY (matiere_id) REFERENCES matieres(id) ON DELETE CASCADE,
+            UNIQUE(etudiant_matricule, matiere_id, trimestre)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS parametres (
+            cle TEXT PRIMARY KEY,
+            valeur TEXT NOT NULL
+        )
+        """,
+    ]),
+    (2, "Index des chemins d'accès fréquents", [
+        # get_etudiants_by_niveau_filiere et classement : filtre (niveau, filiere), tri (nom, prenom)
+        "CREATE INDEX IF NOT EXISTS idx_etudiants_niveau_filiere ON etudiants(niveau, filiere, nom, prenom)",
+        # get_all_etudiants : tri (nom, prenom) sans B-tree temporaire
+        "CREATE INDEX IF NOT EXISTS idx_etudiants_nom ON etudiants(nom, prenom)",
+        # get_matieres : filtre (niveau, filiere) ; l'index UNIQUE commence par nom
+        "CREATE INDEX IF NOT EXISTS idx_matieres_niveau_filiere ON matieres(niveau, filiere)",
+        # ON DELETE CASCADE depuis matieres ; les accès par étudiant utilisent
+        # l'index UNIQUE(etudiant_matricule, matiere_id, trimestre)
+        "CREATE INDEX IF NOT EXISTS idx_notes_matiere ON notes(matiere_id)",
+    ]),
+    (3, "Moyennes matérialisées maintenues par déclencheurs", [
+        # Moyenne de chaque note (40% CC + 60% Exam) : une ligne par (étudiant, matière, trimestre)
+        """
+        CREATE TABLE IF NOT EXISTS moyennes (
+            etudiant_matricule TEXT NOT NULL,
+            matiere_id INTEGER NOT NULL,
+            trimestre INTEGER NOT NULL,
+            moyenne REAL NOT NULL,
+            PRIMARY KEY (etudiant_matricule, matiere_id, trimestre)
+        ) WITHOUT ROWID
+        """,
+        # Déclencheur sur matieres.coefficient : retrouver les étudiants notés dans la matière
+        "CREATE INDEX IF NOT EXISTS idx_moyennes_matiere ON moyennes(matiere_id)",
+        # Agrégats par étudiant : moyennes trimestrielles, annuelle, générale et crédits
+        """
+        CREATE TABLE IF NOT EXISTS moyennes_etudiants (
+            matricule TEXT PRIMARY KEY REFERENCES etudiants(matricule) ON DELETE CASCADE,
+            t1 REAL,
+            t2 REAL,
+            t3 REAL,
+            moyenne_annuelle REAL NOT NULL,
+            moyenne REAL NOT NULL,
+            credits INTEGER NOT NULL
+        )
+        """,
+        *_declencheurs_moyennes(),
+        # Remplissage initial à partir des notes existantes
+        REQUETE_REMPLISSAGE_MOYENNES,
+    ] + [
+        instruction for instruction in requete_recalcul_etudiants("(SELECT matricule FROM etudiants)").split(";")
+        if instruction.strip()
+    ]),
+    (4, "Index de recherche plein texte des étudiants", [
+        # Matricule, nom et prénom normalisés par texte_recherche() (fonction Python enregistrée
+        # sur chaque connexion) : minuscules, sans accents, chaque mot précédé de la marque de
+        # début « ^^ ». Le tokenizer trigram sert les recherches de sous-chaîne d'au moins trois
+        # caractères ; la marque rend indexables les débuts de mot d'un ou deux caractères.
+        # La ligne d'index porte le rowid de l'étudiant. etudiants n'a pas de clé INTEGER
+        # PRIMARY KEY : après un VACUUM, Database.reconstruire_recherche réaligne l'index.
+        "CREATE VIRTUAL TABLE IF NOT EXISTS etudiants_recherche USING fts5(matricule, nom, prenom, tokenize = 'trigram')",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_etudiants_recherche_insert AFTER INSERT ON etudiants
+        BEGIN
+            {_indexer_etudiant("NEW")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_etudiants_recherche_update AFTER UPDATE OF matricule, nom, prenom ON etudiants
+        BEGIN
+            DELETE FROM etudiants_recherche WHERE rowid = OLD.rowid;
+            {_indexer_etudiant("NEW")}
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_etudiants_recherche_delete AFTER DELETE ON etudiants
+        BEGIN
+            DELETE FROM etudiants_recherche WHERE rowid = OLD.rowid;
+        END
+        """,
+        REQUETE_REMPLISSAGE_RECHERCHE,
+    ]),
+    (5, "Déclencheurs des moyennes en SQL intégré", [
+        # Ceux de la migration 3 appelaient arrondi() et moyennes_differees(), fonctions Python
+        # que seules les connexions de Database connaissent : toute écriture dans notes ou
+        # matieres depuis un autre outil (sqlite3 en ligne de commande, script) échouait avec
+        # « no such function ». Les mêmes déclencheurs n'utilisent plus que du SQL intégré :
+        # arrondi_sql reproduit exactement le round de Python, et l'import en masse signale le
+        # recalcul différé par une ligne de parametres posée et retirée dans sa transaction.
+        # Les requêtes que seul Database exécute (remplissage, recalcul par lot) gardent arrondi().
+        *(f"DROP TRIGGER IF EXISTS {nom}" for nom in (
+            "trg_notes_insert", "trg_notes_insert_differe", "trg_notes_update", "trg_notes_update_differe",
+            "trg_notes_delete", "trg_notes_delete_differe", "trg_matieres_coefficient")),
+        *_declencheurs_moyennes(DIFFEREES_SQL, arrondi_sql),
+    ]),
+    (6, "Déclencheurs de l'index de recherche en SQL intégré", [
+        # Même problème pour ceux de la migration 4, qui appelaient texte_recherche() : une
+        # écriture dans etudiants depuis un autre outil échouait. La normalisation (accents,
+        # casse, débuts de mot) reste en Python ; les déclencheurs retirent seulement la ligne
+        # d'index périmée et mettent l'étudiant en attente. Database indexe la file dans la
+        # transaction de ses propres écritures, et avant chaque recherche pour les écritures
+        # extérieures. Limite : FTS5 avec le tokenizer trigram reste nécessaire pour lire
+        # etudiants_recherche ou écrire dans etudiants.
+        """
+        CREATE TABLE IF NOT EXISTS recherche_a_indexer (
+            etudiant_rowid INTEGER PRIMARY KEY
+        )
+        """,
+        "DROP TRIGGER IF EXISTS trg_etudiants_recherche_insert",
+        "DROP TRIGGER IF EXISTS trg_etudiants_recherche_update",
+        "DROP TRIGGER IF EXISTS trg_etudiants_recherche_delete",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_etudiants_recherche_insert AFTER INSERT ON etudiants
+        BEGIN
+            INSERT OR IGNORE INTO recherche_a_indexer (etudiant_rowid) VALUES (NEW.rowid);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_etudiants_recherche_update AFTER UPDATE OF matricule, nom, prenom ON etudiants
+        BEGIN
+            DELETE FROM etudiants_recherche WHERE rowid = OLD.rowid;
+            INSERT OR IGNORE INTO recherche_a_indexer (etudiant_rowid) VALUES (NEW.rowid);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_etudiants_recherche_delete AFTER DELETE ON etudiants
+        BEGIN
+            DELETE FROM etudiants_recherche WHERE rowid = OLD.rowid;
+            DELETE FROM recherche_a_indexer WHERE etudiant_rowid = OLD.rowid;
+        END
+        """,
+    ]),
+]
+
+VERSION_SCHEMA = MIGRATIONS[-1][0]
+
+
+def version_courante(conn: sqlite3.Connection) -> int:
+    """Retourne la version du schéma enregistrée dans la base"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def appliquer_migrations(conn: sqlite3.Connection) -> int:
+    """Applique les migrations manquantes, chacune dans sa propre transaction.
+
+    Retourne le nombre de migrations appliquées (0 si la base est déjà à jour).
+    """
+    version = version_courante(conn)
+    appliquees = 0
+    for numero, description, instructions in MIGRATIONS:
+        if numero <= version:
+            continue
+        try:
+            conn.execute("BEGIN")
+            for instruction in instructions:
+                conn.execute(instruction)
+            # PRAGMA n'accepte pas de paramètre lié ; numero est un entier interne
+            conn.execute(f"PRAGMA user_version = {int(numero)}")
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise sqlite3.Error(f"Migration {numero} ({description}) échouée: {str(e)}") from e
+        appliquees += 1
+    return appliquees
@@ -0,0 +1,424 @@
+"""Modèles et délégués Qt des tableaux de l'application (architecture modèle/vue).
+
+Les étudiants sont rangés colonne par colonne dans des listes de chaînes, sans objet
+par cellule ni par ligne ; les valeurs répétées (sexe, filière, niveau, dates) sont
+partagées. La vue ne demande que les cellules visibles : afficher 100 000 étudiants
+ne coûte que le remplissage de sept listes. Le tri et le filtrage (niveau, filière,
+terme recherché) passent par un modèle proxy, sans toucher aux données.
+
+Le classement de la fenêtre des notes formate ses cellules à la demande, et sa colonne
+Action est dessinée par un délégué : aucun widget par ligne.
+"""
+import bisect
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from PyQt5.QtCore import QAbstractProxyModel, QAbstractTableModel, QEvent, QModelIndex, QRectF, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter, QPainterPath
+from PyQt5.QtWidgets import QStyle, QStyledItemDelegate
+
+from models import Etudiant, ResultatEtudiant
+
+COLONNES = ["Matricule", "Nom", "Prénom", "Date de naissance", "Sexe", "Filière", "Niveau"]
+COL_MATRICULE, COL_NOM, COL_PRENOM, COL_DATE, COL_SEXE, COL_FILIERE, COL_NIVEAU = range(len(COLONNES))
+
+# Colonnes dont les valeurs se répètent beaucoup : une seule chaîne par valeur distincte
+COLONNES_PARTAGEES = (COL_DATE, COL_SEXE, COL_FILIERE, COL_NIVEAU)
+
+
+def _ligne(etudiant) -> Sequence[str]:
+    """Accepte un Etudiant ou une ligne (matricule, nom, prénom, date, sexe, filière, niveau)"""
+    if isinstance(etudiant, Etudiant):
+        return (etudiant.matricule, etudiant.nom, etudiant.prenom, etudiant.date_naissance,
+                etudiant.sexe, etudiant.filiere, etudiant.niveau)
+    return etudiant
+
+
+class EtudiantsTableModel(QAbstractTableModel):
+    """Table des étudiants en lecture seule, stockée par colonnes"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._colonnes: List[List[str]] = [[] for _ in COLONNES]
+        self._valeurs_partagees = {col: {} for col in COLONNES_PARTAGEES}
+
+    # Interface QAbstractTableModel
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._colonnes[COL_MATRICULE])
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLONNES)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self._colonnes[index.column()][index.row()]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return COLONNES[section]
+        return section + 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    # Données
+
+    def _partager(self, col: int, valeurs: Iterable[str]) -> List[str]:
+        partagees = self._valeurs_partagees.get(col)
+        if partagees is None:
+            return list(valeurs)
+        return [partagees.setdefault(valeur, valeur) for valeur in valeurs]
+
+    def definir_etudiants(self, etudiants: Iterable):
+        """Remplace tout le contenu (Etudiant ou lignes de 7 valeurs)"""
+        lignes = [_ligne(etudiant) for etudiant in etudiants]
+        self.beginResetModel()
+        # Transposition en C : une liste par colonne
+        colonnes = zip(*lignes) if lignes else ([] for _ in COLONNES)
+        self._colonnes = [self._partager(col, valeurs) for col, valeurs in enumerate(colonnes)]
+        self.endResetModel()
+
+    def ajouter_etudiant(self, etudiant):
+        """Ajoute une ligne en fin de table sans réinitialiser la vue"""
+        ligne = len(self._colonnes[COL_MATRICULE])
+        self.beginInsertRows(QModelIndex(), ligne, ligne)
+        for col, valeur in enumerate(_ligne(etudiant)):
+            self._colonnes[col].extend(self._partager(col, [valeur]))
+        self.endInsertRows()
+
+    def ligne_matricule(self, matricule: str) -> int:
+        """Numéro de ligne d'un matricule, -1 s'il n'est pas affiché"""
+        try:
+            return self._colonnes[COL_MATRICULE].index(matricule)
+        except ValueError:
+            return -1
+
+    def retirer_etudiant(self, matricule: str) -> bool:
+        ligne = self.ligne_matricule(matricule)
+        if ligne < 0:
+            return False
+        self.beginRemoveRows(QModelIndex(), ligne, ligne)
+        for colonne in self._colonnes:
+            del colonne[ligne]
+        self.endRemoveRows()
+        return True
+
+    def valeur(self, ligne: int, colonne: int) -> str:
+        return self._colonnes[colonne][ligne]
+
+    def colonne(self, colonne: int) -> List[str]:
+        """Valeurs d'une colonne, à ne pas modifier"""
+        return self._colonnes[colonne]
+
+
+class EtudiantsFiltreModel(QAbstractProxyModel):
+    """Vue triée et filtrée (niveau, filière, terme contenu dans le matricule, le nom ou le prénom).
+
+    QSortFilterProxyModel appelle du Python pour chaque ligne filtrée et chaque comparaison
+    du tri (une dizaine de secondes pour trier 100 000 lignes). Ici la correspondance
+    ligne affichée -> ligne source est une liste calculée d'un bloc sur les colonnes du
+    modèle source, avec filtres en compréhension et tri par sorted().
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.niveau: Optional[str] = None
+        self.filiere: Optional[str] = None
+        self.terme = ""
+        self.colonne_tri = -1
+        self.ordre_tri = Qt.AscendingOrder
+        self._lignes: List[int] = []               # ligne affichée -> ligne source
+        self._positions: Optional[Dict[int, int]] = None   # inverse, construit à la demande
+        self._retrait = None
+
+    def setSourceModel(self, modele):
+        ancien = self.sourceModel()
+        if ancien is not None:
+            ancien.modelAboutToBeReset.disconnect(self.beginResetModel)
+            ancien.modelReset.disconnect(self._source_reinitialisee)
+            ancien.rowsInserted.disconnect(self._lignes_inserees)
+            ancien.rowsAboutToBeRemoved.disconnect(self._lignes_a_retirer)
+            ancien.rowsRemoved.disconnect(self._lignes_retirees)
+        self.beginResetModel()
+        super().setSourceModel(modele)
+        modele.modelAboutToBeReset.connect(self.beginResetModel)
+        modele.modelReset.connect(self._source_reinitialisee)
+        modele.rowsInserted.connect(self._lignes_inserees)
+        modele.rowsAboutToBeRemoved.connect(self._lignes_a_retirer)
+        modele.rowsRemoved.connect(self._lignes_retirees)
+        self._recalculer()
+        self.endResetModel()
+
+    # Filtre et tri
+
+    def definir_filtre(self, niveau: Optional[str] = None, filiere: Optional[str] = None, terme: str = ""):
+        """Filtre sur le niveau et la filière (None = tous) et sur un terme contenu"""
+        self.beginResetModel()
+        self.niveau = niveau or None
+        self.filiere = filiere or None
+        self.terme = terme.strip().lower()
+        self._recalculer()
+        self.endResetModel()
+
+    def _acceptees(self, debut: int = 0, fin: Optional[int] = None) -> List[int]:
+        """Lignes source de [debut, fin) qui passent le filtre"""
+        source = self.sourceModel()
+        lignes = range(debut, source.rowCount() if fin is None else fin)
+        if self.niveau is not None:
+            niveaux = source.colonne(COL_NIVEAU)
+            lignes = [i for i in lignes if niveaux[i] == self.niveau]
+        if self.filiere is not None:
+            filieres = source.colonne(COL_FILIERE)
+            lignes = [i for i in lignes if filieres[i] == self.filiere]
+        if self.terme:
+            terme = self.terme
+            matricules, noms, prenoms = (source.colonne(c) for c in (COL_MATRICULE, COL_NOM, COL_PRENOM))
+            lignes = [i for i in lignes
+                      if terme in matricules[i].lower() or terme in noms[i].lower() or terme in prenoms[i].lower()]
+        return list(lignes)
+
+    def _trier(self, lignes: List[int]) -> List[int]:
+        if self.colonne_tri < 0:
+            return lignes
+        colonne = self.sourceModel().colonne(self.colonne_tri)
+        return sorted(lignes, key=colonne.__getitem__, reverse=self.ordre_tri == Qt.DescendingOrder)
+
+    def _recalculer(self):
+        self._lignes = self._trier(self._acceptees()) if self.sourceModel() is not None else []
+        self._positions = None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Tri demandé par l'en-tête de la vue ; la sélection suit les lignes déplacées"""
+        self.layoutAboutToBeChanged.emit()
+        anciens = self.persistentIndexList()
+        sources = [self._lignes[index.row()] for index in anciens]
+        self.colonne_tri = column
+        self.ordre_tri = order
+        self._lignes = self._trier(self._lignes if column >= 0 else sorted(self._lignes))
+        self._positions = None
+        positions = self._inverse()
+        self.changePersistentIndexList(
+            anciens, [self.index(positions[ligne], index.column()) for ligne, index in zip(sources, anciens)])
+        self.layoutChanged.emit()
+
+    def _inverse(self) -> Dict[int, int]:
+        if self._positions is None:
+            self._positions = {ligne: position for position, ligne in enumerate(self._lignes)}
+        return self._positions
+
+    # Suivi du modèle source
+
+    def _source_reinitialisee(self):
+        self._recalculer()
+        self.endResetModel()
+
+    def _lignes_inserees(self, parent, debut, fin):
+        if fin + 1 < self.sourceModel().rowCount():
+            # Insertion au milieu : toutes les lignes source suivantes sont décalées
+            self.beginResetModel()
+            self._recalculer()
+            self.endResetModel()
+            return
+        for ligne in self._acceptees(debut, fin + 1):
+            if self.colonne_tri < 0:
+                position = len(self._lignes)
+            else:
+                # Position du nouvel étudiant dans l'ordre de tri courant
+                colonne = self.sourceModel().colonne(self.colonne_tri)
+                cles = [colonne[i] for i in self._lignes]
+                if self.ordre_tri == Qt.DescendingOrder:
+                    position = len(cles) - bisect.bisect_left(cles[::-1], colonne[ligne])
+                else:
+                    position = bisect.bisect_right(cles, colonne[ligne])
+            self.beginInsertRows(QModelIndex(), position, position)
+            self._lignes.insert(position, ligne)
+            self._positions = None
+            self.endInsertRows()
+
+    def _lignes_a_retirer(self, parent, debut, fin):
+        positions = [p for p, ligne in enumerate(self._lignes) if debut <= ligne <= fin]
+        if len(positions) == 1:
+            self.beginRemoveRows(QModelIndex(), positions[0], positions[0])
+        elif positions:
+            self.beginResetModel()
+        self._retrait = positions
+
+    def _lignes_retirees(self, parent, debut, fin):
+        positions, self._retrait = self._retrait, None
+        decalage = fin - debut + 1
+        self._lignes = [ligne - decalage if ligne > fin else ligne
+                        for ligne in self._lignes if not debut <= ligne <= fin]
+        self._positions = None
+        if len(positions) == 1:
+            self.endRemoveRows()
+        elif positions:
+            self.endResetModel()
+
+    # Interface QAbstractProxyModel
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < len(self._lignes) and 0 <= column < len(COLONNES)):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._lignes)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLONNES)
+
+    def mapToSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self._lignes[index.row()], index.column())
+
+    def mapFromSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        position = self._inverse().get(index.row())
+        return QModelIndex() if position is None else self.index(position, index.column())
+
+    def data(self, index, role=Qt.DisplayRole):
+        # Accès direct aux colonnes, sans passer par mapToSource pour chaque cellule visible
+        if role == Qt.DisplayRole and index.isValid():
+            return self.sourceModel().valeur(self._lignes[index.row()], index.column())
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal:
+            return self.sourceModel().headerData(section, orientation, role)
+        return section + 1 if role == Qt.DisplayRole else None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def matricule(self, ligne: int) -> str:
+        """Matricule affiché à une ligne de la vue"""
+        return self.data(self.index(ligne, COL_MATRICULE))
+
+
+COLONNES_CLASSEMENT = [
+    "Matricule", "Nom", "Prénom", "Date de naissance", "Sexe",
+    "Moyenne T1", "Moyenne T2", "Moyenne T3",
+    "Moyenne Générale", "Mention", "Décision", "Rang", "Action"
+]
+COL_RANG, COL_ACTION = 11, 12
+
+
+class ClassementTableModel(QAbstractTableModel):
+    """Classement d'une classe (liste de ResultatEtudiant, une par ligne), en lecture seule.
+
+    La liste est partagée avec NotesWindow : toute modification passe par les méthodes
+    ci-dessous pour que la vue soit prévenue.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.classement: List[ResultatEtudiant] = []
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.classement)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLONNES_CLASSEMENT)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        resultat = self.classement[index.row()]
+        etudiant = resultat.etudiant
+        col = index.column()
+        if col < 5:
+            return (etudiant.matricule, etudiant.nom, etudiant.prenom, etudiant.date_naissance, etudiant.sexe)[col]
+        if col < 8:
+            return f"{resultat.moyennes_trimestres.get(col - 4, 0.0):.2f}"
+        if col == 8:
+            return f"{resultat.moyenne_generale:.2f}"
+        if col == 9:
+            return resultat.mention
+        if col == 10:
+            return ResultatEtudiant.calculer_decision(resultat.moyenne_generale, etudiant.niveau)
+        if col == COL_RANG:
+            return str(resultat.rang)
+        return "Gérer les notes"
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return COLONNES_CLASSEMENT[section]
+        return section + 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def definir_classement(self, classement: List[ResultatEtudiant]):
+        self.beginResetModel()
+        self.classement = classement
+        self.endResetModel()
+
+    def remplacer(self, ancien: int, nouveau: int, resultat: ResultatEtudiant):
+        """Remplace le résultat de la ligne ancien et le place à la ligne nouveau"""
+        if nouveau != ancien:
+            # Destination exprimée avant retrait de la ligne, comme le veut beginMoveRows
+            destination = nouveau + 1 if nouveau > ancien else nouveau
+            self.beginMoveRows(QModelIndex(), ancien, ancien, QModelIndex(), destination)
+            del self.classement[ancien]
+            self.classement.insert(nouveau, resultat)
+            self.endMoveRows()
+        else:
+            self.classement[nouveau] = resultat
+        self.dataChanged.emit(self.index(nouveau, 0), self.index(nouveau, COL_RANG))
+
+    def rangs_modifies(self, debut: int, fin: int):
+        """Prévient la vue que les rangs des lignes debut <= ligne < fin ont changé"""
+        if debut < fin:
+            self.dataChanged.emit(self.index(debut, COL_RANG), self.index(fin - 1, COL_RANG))
+
+
+class BoutonDelegue(QStyledItemDelegate):
+    """Dessine le texte de la cellule comme un bouton et émet clique(ligne) au clic.
+
+    Remplace un QPushButton par ligne (setCellWidget) : rien n'est créé par ligne, le
+    bouton n'existe que le temps de peindre les cellules visibles.
+    """
+    clique = pyqtSignal(int)
+
+    COULEUR = QColor("#2196F3")
+    COULEUR_SURVOL = QColor("#1976D2")
+    MARGE = 4
+
+    def _rectangle(self, option) -> QRectF:
+        return QRectF(option.rect.adjusted(self.MARGE, self.MARGE, -self.MARGE, -self.MARGE))
+
+    def paint(self, painter, option, index):
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        chemin = QPainterPath()
+        chemin.addRoundedRect(self._rectangle(option), 3, 3)
+        survol = option.state & QStyle.State_MouseOver
+        painter.fillPath(chemin, self.COULEUR_SURVOL if survol else self.COULEUR)
+        painter.setPen(Qt.white)
+        painter.drawText(self._rectangle(option), Qt.AlignCenter, index.data())
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            if self._rectangle(option).contains(event.pos()):
+                self.clique.emit(index.row())
+                return True
+        return super().editorEvent(event, model, option, index)
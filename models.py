@@ -1,13 +1,19 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, date
-from typing import Optional, List, Dict
+from sys import intern
+from typing import Optional, List, Dict, Tuple
 from decimal import Decimal
 
+# Étudiants, notes et matières sont créés par centaines de milliers (classements, exports) :
+# leurs classes ont des __slots__ et les chaînes répétées (niveau, filière, date, matricule
+# d'une note...) sont partagées avec sys.intern. from_row construit un objet depuis une ligne
+# déjà validée à l'enregistrement (base SQLite, etudiants.txt) sans la revalider.
+
 class EtudiantError(Exception):
     """Classe d'exception personnalisée pour les erreurs de validation d'étudiant"""
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Matiere:
     id: int
     nom: str
@@ -18,8 +24,19 @@ class Matiere:
     def __post_init__(self):
         if self.coefficient <= 0:
             raise ValueError("Le coefficient doit être supérieur à 0")
+        self.niveau = intern(self.niveau)
+        self.filiere = intern(self.filiere)
 
-@dataclass
+    @classmethod
+    def from_row(cls, row) -> 'Matiere':
+        """Matière d'une ligne (id, nom, coefficient, niveau, filiere) de la table matieres, sans validation"""
+        matiere = object.__new__(cls)
+        matiere.id, matiere.nom, matiere.coefficient, niveau, filiere = row
+        matiere.niveau = intern(niveau)
+        matiere.filiere = intern(filiere)
+        return matiere
+
+@dataclass(slots=True)
 class Note:
     id: Optional[int]
     etudiant_matricule: str
@@ -35,6 +52,17 @@ class Note:
             raise ValueError("La note d'examen doit être comprise entre 0 et 20")
         if self.trimestre not in [1, 2, 3]:
             raise ValueError("Le trimestre doit être 1, 2 ou 3")
+        if isinstance(self.etudiant_matricule, str):
+            self.etudiant_matricule = intern(self.etudiant_matricule)
+
+    @classmethod
+    def from_row(cls, row) -> 'Note':
+        """Note d'une ligne (id, etudiant_matricule, matiere_id, note_cc, note_exam, trimestre)
+        de la table notes, sans validation"""
+        note = object.__new__(cls)
+        note.id, matricule, note.matiere_id, note.note_cc, note.note_exam, note.trimestre = row
+        note.etudiant_matricule = intern(matricule)
+        return note
     
     @property
     def moyenne(self) -> Optional[float]:
@@ -43,7 +71,7 @@ class Note:
             return None
         return round(0.4 * self.note_cc + 0.6 * self.note_exam, 2)
 
-@dataclass
+@dataclass(slots=True)
 class ResultatEtudiant:
     etudiant: 'Etudiant'
     notes: Dict[str, Dict[int, Note]]  # Dictionnaire matière -> {trimestre -> note}
@@ -51,6 +79,7 @@ class ResultatEtudiant:
     rang: int
     mention: str
     credits: int
+    moyennes_trimestres: Dict[int, float] = field(default_factory=dict)  # trimestre -> moyenne
     
     @staticmethod
     def calculer_mention(moyenne: float) -> str:
@@ -64,6 +93,13 @@ class ResultatEtudiant:
             return "Passable"
         else:
             return "Insuffisant"
+
+    @staticmethod
+    def calculer_decision(moyenne: float, niveau: str) -> str:
+        """Admis, Refusé, ou Contrôle pour un Bac entre 7 et 10"""
+        if niveau.lower() == "bac" and 7.0 <= moyenne < 10.0:
+            return "Contrôle"
+        return "Admis" if moyenne >= 10 else "Refusé"
             
     @staticmethod
     def calculer_moyenne_annuelle(notes_trimestres: Dict[int, float]) -> float:
@@ -75,6 +111,16 @@ class ResultatEtudiant:
         return round((notes_trimestres[1] + notes_trimestres[2] + (2 * notes_trimestres[3])) / 4, 2)
 
 @dataclass
+class RapportImport:
+    """Bilan d'un import en masse : lignes enregistrées et erreurs (numéro de ligne, message)"""
+    enregistres: int = 0
+    erreurs: List[Tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return self.enregistres + len(self.erreurs)
+
+@dataclass(slots=True)
 class Etudiant:
     matricule: str
     nom: str
@@ -83,6 +129,9 @@ class Etudiant:
     sexe: str
     filiere: str
     niveau: str
+    # Date de naissance analysée et la chaîne dont elle vient (voir naissance)
+    _naissance: Optional[date] = field(default=None, init=False, repr=False, compare=False)
+    _naissance_source: Optional[str] = field(default=None, init=False, repr=False, compare=False)
 
     NIVEAUX = [
         "1ère année", "2ème année", "3ème année", "Bac"
@@ -115,6 +164,27 @@ class Etudiant:
     
     def __post_init__(self):
         self.valider()
+        self.nom = intern(self.nom)
+        self.prenom = intern(self.prenom)
+        self.date_naissance = intern(self.date_naissance)
+        self.sexe = intern(self.sexe)
+        self.filiere = intern(self.filiere)
+        self.niveau = intern(self.niveau)
+
+    @classmethod
+    def from_row(cls, row) -> 'Etudiant':
+        """Étudiant d'une ligne (matricule, nom, prenom, date_naissance, sexe, filiere, niveau)
+        déjà validée à l'enregistrement (table etudiants, etudiants.txt), sans la revalider"""
+        etudiant = object.__new__(cls)
+        etudiant.matricule, nom, prenom, date_naissance, sexe, filiere, niveau = row
+        etudiant.nom = intern(nom)
+        etudiant.prenom = intern(prenom)
+        etudiant.date_naissance = intern(date_naissance)
+        etudiant.sexe = intern(sexe)
+        etudiant.filiere = intern(filiere)
+        etudiant.niveau = intern(niveau)
+        etudiant._naissance = etudiant._naissance_source = None
+        return etudiant
     
     def valider(self):
         """Valide les données de l'étudiant"""
@@ -130,12 +200,11 @@ class Etudiant:
         if not self.date_naissance:
             raise EtudiantError("La date de naissance est invalide")
             
-        try:
-            date = datetime.strptime(self.date_naissance, "%Y-%m-%d")
-            if date.date() > datetime.now().date():
-                raise EtudiantError("La date de naissance ne peut pas être dans le futur")
-        except ValueError:
+        naissance = self.naissance
+        if naissance is None:
             raise EtudiantError("Format de date invalide (utilisez YYYY-MM-DD)")
+        if naissance > date.today():
+            raise EtudiantError("La date de naissance ne peut pas être dans le futur")
             
         if self.sexe not in ['F', 'H']:
             raise EtudiantError("Le sexe doit être 'F' ou 'H'")
@@ -148,25 +217,32 @@ class Etudiant:
         if self.filiere not in filieres_valides:
             raise EtudiantError(f"Pour le niveau {self.niveau}, la filière doit être l'une des suivantes : {', '.join(filieres_valides)}")
     
+    @property
+    def naissance(self) -> Optional[date]:
+        """Date de naissance analysée une seule fois (de nouveau si date_naissance change) ; None si invalide"""
+        if self._naissance_source != self.date_naissance:
+            try:
+                self._naissance = datetime.strptime(self.date_naissance, "%Y-%m-%d").date()
+            except (TypeError, ValueError):
+                self._naissance = None
+            self._naissance_source = self.date_naissance
+        return self._naissance
+
+    def age_au(self, au: date) -> Optional[int]:
+        """Âge à la date au ; un traitement par lot passe la même date pour tous les étudiants"""
+        naissance = self.naissance
+        if naissance is None:
+            return None
+        # Un an de moins si l'anniversaire n'est pas encore passé cette année-là
+        return au.year - naissance.year - ((au.month, au.day) < (naissance.month, naissance.day))
+
     @property
     def age(self) -> Optional[int]:
         """Calcule l'âge de l'étudiant"""
-        try:
-            naissance = datetime.strptime(self.date_naissance, "%Y-%m-%d")
-            aujourd_hui = datetime.now()
-            age = aujourd_hui.year - naissance.year
-            
-            # Ajustement si l'anniversaire n'est pas encore passé cette année
-            if aujourd_hui.month < naissance.month or \
-               (aujourd_hui.month == naissance.month and aujourd_hui.day < naissance.day):
-                age -= 1
-                
-            return age
-        except ValueError:
-            return None
+        return self.age_au(date.today())
     
-    def to_dict(self) -> dict:
-        """Convertit l'étudiant en dictionnaire"""
+    def to_dict(self, au: Optional[date] = None) -> dict:
+        """Convertit l'étudiant en dictionnaire ; l'âge est calculé à la date au (aujourd'hui par défaut)"""
         return {
             'matricule': self.matricule,
             'nom': self.nom,
@@ -175,7 +251,7 @@ class Etudiant:
             'sexe': self.sexe,
             'filiere': self.filiere,
             'niveau': self.niveau,
-            'age': self.age
+            'age': self.age_au(au or date.today())
         }
     
     @classmethod
@@ -1,13 +1,20 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QLabel, QComboBox, QTableWidget, QTableWidgetItem,
+                             QLabel, QComboBox, QTableWidget, QTableWidgetItem, QTableView,
                              QPushButton, QSpinBox, QDoubleSpinBox, QMessageBox,
-                             QHeaderView, QLineEdit, QDialog, QStatusBar)
-from PyQt5.QtCore import Qt
+                             QHeaderView, QLineEdit, QDialog, QStatusBar, QFileDialog)
+from PyQt5.QtCore import Qt, QTimer
 from database import Database
 from models import Note, Matiere, ResultatEtudiant, Etudiant
+from importation import importer_notes
+from exportation import (exporter_lignes, exporter_ecole, format_export, colonnes_moyennes,
+                         ENTETES_MOYENNES, ENTETES_TOUS_LES_ETUDIANTS)
+from journal_notes import JournalNotes, moyennes_trimestres
+from modeles_qt import ClassementTableModel, BoutonDelegue, COL_ACTION
+from taches import GestionnaireTaches
+from metriques import registre
 from datetime import datetime
+import bisect
 import os
-import pandas as pd
 
 
 class NotesWindow(QDialog):
@@ -16,12 +23,24 @@ class NotesWindow(QDialog):
         self.matricule = matricule
         self.niveau = niveau
         self.filiere = filiere
-        self.db = Database()
-        self.setup_ui()
+        self.db = Database()  # connexion partagée avec la fenêtre principale
+        # État initialisé avant setup_ui, qui charge déjà le classement du niveau sélectionné
         self.selected_etudiant = None
         self.matieres = []
         self.current_trimestre = 1
         self.etudiants = []  # Liste pour stocker les étudiants chargés
+        # Classement affiché, trié par moyenne décroissante puis nom : une entrée par ligne du tableau
+        self.classement = []
+        self.cles_classement = []
+        # Compactage des journaux de notes différé jusqu'à ce que la fenêtre soit inactive
+        self.timer_compactage = QTimer(self)
+        self.timer_compactage.setSingleShot(True)
+        self.timer_compactage.setInterval(30000)
+        self.timer_compactage.timeout.connect(self.compacter_journaux)
+        self.journaux_modifies = set()
+        self.coefficients = {}  # (niveau, filière) -> {matière: coefficient}
+        self.taches = GestionnaireTaches(self)  # classement, exports et imports hors du fil de l'interface
+        self.setup_ui()
 
     def setup_ui(self):
         self.setWindowTitle("Gestion des Notes")
@@ -165,33 +184,69 @@ class NotesWindow(QDialog):
             }
         """)
         
+        # Bouton pour exporter toute l'école, un fichier par classe
+        self.btn_export_ecole = QPushButton("Exporter par Classe")
+        self.btn_export_ecole.setStyleSheet("""
+            QPushButton {
+                background-color: #009688;
+                color: white;
+                padding: 8px 15px;
+                border-radius: 4px;
+                font-weight: bold;
+                min-width: 100px;
+                font-size: 14px;
+            }
+            QPushButton:hover {
+                background-color: #00796B;
+            }
+        """)
+        
+        # Bouton pour importer une feuille de notes (CSV ou Excel)
+        self.btn_import_notes = QPushButton("Importer Notes")
+        self.btn_import_notes.setStyleSheet("""
+            QPushButton {
+                background-color: #9C27B0;
+                color: white;
+                padding: 8px 15px;
+                border-radius: 4px;
+                font-weight: bold;
+                min-width: 100px;
+                font-size: 14px;
+            }
+            QPushButton:hover {
+                background-color: #7B1FA2;
+            }
+        """)
+        
         buttons_group.addWidget(self.btn_refresh)
+        buttons_group.addWidget(self.btn_import_notes)
         buttons_group.addWidget(self.btn_export_excel)
         buttons_group.addWidget(self.btn_export_all)
+        buttons_group.addWidget(self.btn_export_ecole)
         filter_layout.addLayout(buttons_group)
         
         main_layout.addLayout(filter_layout)
         
         # Table des étudiants
-        self.table_etudiants = QTableWidget()
-        self.table_etudiants.setColumnCount(12)
-        self.table_etudiants.setHorizontalHeaderLabels([
-            "Matricule", "Nom", "Prénom", "Date de naissance", "Sexe",
-            "Moyenne T1", "Moyenne T2", "Moyenne T3",
-            "Moyenne Générale", "Mention", "Décision", "Action"
-        ])
+        # Classement : modèle formaté à la demande, colonne Action dessinée par un délégué
+        self.modele_classement = ClassementTableModel(self)
+        self.delegue_notes = BoutonDelegue(self)
+        self.table_etudiants = QTableView()
+        self.table_etudiants.setModel(self.modele_classement)
+        self.table_etudiants.setItemDelegateForColumn(COL_ACTION, self.delegue_notes)
+        self.table_etudiants.setMouseTracking(True)  # survol du bouton
         self.table_etudiants.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.table_etudiants.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table_etudiants.setSelectionMode(QTableWidget.SingleSelection)
+        self.table_etudiants.setSelectionBehavior(QTableView.SelectRows)
+        self.table_etudiants.setSelectionMode(QTableView.SingleSelection)
         self.table_etudiants.setAlternatingRowColors(True)
         self.table_etudiants.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 border: 1px solid #ddd;
                 border-radius: 4px;
                 background-color: white;
                 font-size: 14px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
             }
             QHeaderView::section {
@@ -304,9 +359,12 @@ class NotesWindow(QDialog):
         self.btn_refresh.clicked.connect(self.rafraichir_liste)
         self.btn_calculer.clicked.connect(self.calculer_moyennes)
         self.btn_enregistrer.clicked.connect(self.enregistrer_notes)
+        self.btn_import_notes.clicked.connect(self.importer_notes)
         self.btn_export_excel.clicked.connect(self.exporter_moyennes_excel)
         self.btn_export_all.clicked.connect(self.exporter_tous_les_etudiants_excel)
-        self.table_etudiants.itemSelectionChanged.connect(self.on_etudiant_selected)
+        self.btn_export_ecole.clicked.connect(self.exporter_ecole)
+        self.table_etudiants.selectionModel().selectionChanged.connect(self.on_etudiant_selected)
+        self.delegue_notes.clique.connect(lambda row: self.afficher_notes(self.classement[row].etudiant))
 
     def rafraichir_liste(self):
         """Force le rechargement de la liste des étudiants"""
@@ -351,135 +409,195 @@ class NotesWindow(QDialog):
             self.afficher_notes(self.selected_etudiant)
 
     def charger_classement(self):
-        """Charge et affiche les étudiants selon le niveau et la filière sélectionnés depuis etudiants.txt"""
+        """Charge et affiche les étudiants selon le niveau et la filière sélectionnés depuis etudiants.txt.
+
+        Le calcul se fait en tâche de fond ; un nouveau chargement annule celui en cours.
+        """
         niveau = self.niveau_combo.currentText()
         filiere = self.filiere_combo.currentText()
 
         if not niveau or not filiere:
-            self.table_etudiants.setRowCount(0)
+            self.taches.annuler("classement")
+            self.classement = []
+            self.cles_classement = []
+            self.modele_classement.definir_classement(self.classement)
             return
 
-        try:
-            etudiants_filtres = []
-            self.etudiants = []  # Réinitialiser la liste des étudiants
-            
-            if os.path.exists('etudiants.txt'):
-                with open('etudiants.txt', 'r', encoding='utf-8') as f:
-                    for ligne in f:
-                        donnees = ligne.strip().split('|')
-                        if len(donnees) == 7:
-                            matricule, nom, prenom, date_naissance, sexe, filiere_txt, niveau_txt = donnees
-                            if niveau_txt == niveau and filiere_txt == filiere:
-                                etudiant = Etudiant(
-                                    matricule=matricule,
-                                    nom=nom,
-                                    prenom=prenom,
-                                    date_naissance=date_naissance,
-                                    sexe=sexe,
-                                    filiere=filiere_txt,
-                                    niveau=niveau_txt
-                                )
-                                etudiants_filtres.append(etudiant)
-                                self.etudiants.append(etudiant)
-
-            self.table_etudiants.setRowCount(0)  # Vide le tableau avant de le remplir
-
-            for row, etudiant in enumerate(etudiants_filtres):
-                moyennes_trim = self.calculer_moyennes_trimestres(etudiant.matricule, etudiant.niveau, etudiant.filiere)
-                moyenne_generale = 0.0
-                if all(trim in moyennes_trim for trim in [1, 2, 3]):
-                    moyenne_generale = (moyennes_trim[1] + moyennes_trim[2] + (2 * moyennes_trim[3])) / 4
-                mention = ResultatEtudiant.calculer_mention(moyenne_generale)
-                
-                # Déterminer la décision
-                if niveau.lower() == "bac" and 7.0 <= moyenne_generale < 10.0:
-                    decision = "Contrôle"
-                else:
-                    decision = "Admis" if moyenne_generale >= 10 else "Refusé"
-
-                self.table_etudiants.insertRow(row)
-                self.table_etudiants.setItem(row, 0, QTableWidgetItem(etudiant.matricule))
-                self.table_etudiants.setItem(row, 1, QTableWidgetItem(etudiant.nom))
-                self.table_etudiants.setItem(row, 2, QTableWidgetItem(etudiant.prenom))
-                self.table_etudiants.setItem(row, 3, QTableWidgetItem(etudiant.date_naissance))
-                self.table_etudiants.setItem(row, 4, QTableWidgetItem(etudiant.sexe))
-                self.table_etudiants.setItem(row, 5, QTableWidgetItem(f"{moyennes_trim.get(1, 0.0):.2f}"))
-                self.table_etudiants.setItem(row, 6, QTableWidgetItem(f"{moyennes_trim.get(2, 0.0):.2f}"))
-                self.table_etudiants.setItem(row, 7, QTableWidgetItem(f"{moyennes_trim.get(3, 0.0):.2f}"))
-                self.table_etudiants.setItem(row, 8, QTableWidgetItem(f"{moyenne_generale:.2f}"))
-                self.table_etudiants.setItem(row, 9, QTableWidgetItem(mention))
-                self.table_etudiants.setItem(row, 10, QTableWidgetItem(decision))
-                
-                # Créer le bouton "Gérer les notes"
-                btn_notes = QPushButton("Gérer les notes")
-                btn_notes.setStyleSheet("""
-                    QPushButton {
-                        background-color: #2196F3;
-                        color: white;
-                        border: none;
-                        padding: 5px;
-                        border-radius: 3px;
-                        min-width: 100px;
-                    }
-                    QPushButton:hover {
-                        background-color: #1976D2;
-                    }
-                """)
-                btn_notes.clicked.connect(lambda checked, e=etudiant: self.afficher_notes(e))
-                self.table_etudiants.setCellWidget(row, 11, btn_notes)
-            
-            self.statusBar.showMessage(f"{len(etudiants_filtres)} étudiant(s) trouvé(s) pour {niveau} - {filiere}", 3000)
-        except Exception as e:
-            QMessageBox.critical(self, "Erreur", f"Impossible de charger les étudiants: {str(e)}")
+        def echec(erreur):
+            QMessageBox.critical(self, "Erreur", f"Impossible de charger les étudiants: {erreur}")
             self.statusBar.showMessage("Erreur lors du chargement des étudiants", 3000)
 
-    def exporter_tous_les_etudiants_excel(self):
-        """Exporte tous les étudiants du fichier etudiants.txt avec leurs moyennes vers un fichier Excel"""
+        self.statusBar.showMessage(f"Calcul du classement {niveau} - {filiere}...")
+        self.taches.soumettre(
+            self.calculer_classement, niveau, filiere, cle="classement", avec_base=True,
+            termine=self.afficher_classement, echec=echec,
+            progression=lambda fait, total: self.statusBar.showMessage(
+                f"Calcul du classement {niveau} - {filiere} : {fait}/{total}"))
+
+    def calculer_classement(self, controle, db, niveau, filiere):
+        """Lit les étudiants d'une classe et calcule leur classement (dans un fil du pool)"""
+        etudiants = []
+        if os.path.exists('etudiants.txt'):
+            with registre.mesurer("fichiers.lecture_etudiants"), open('etudiants.txt', 'r', encoding='utf-8') as f:
+                for ligne in f:
+                    donnees = ligne.strip().split('|')
+                    # (matricule, nom, prénom, date, sexe, filière, niveau), écrits par l'application
+                    # après validation : pas de nouvelle validation
+                    if len(donnees) == 7 and donnees[6] == niveau and donnees[5] == filiere:
+                        etudiants.append(Etudiant.from_row(donnees))
+
+        resultats = []
+        for i, etudiant in enumerate(etudiants):
+            if i % 100 == 0:
+                controle.progression(i, len(etudiants))
+            resultats.append(self.calculer_resultat(etudiant, db))
+        classement = sorted(resultats, key=self.cle_classement)
+        return niveau, filiere, etudiants, classement
+
+    def afficher_classement(self, resultat):
+        """Affiche un classement calculé par calculer_classement"""
+        niveau, filiere, self.etudiants, self.classement = resultat
+        self.cles_classement = [self.cle_classement(resultat) for resultat in self.classement]
+        self.modele_classement.definir_classement(self.classement)
+        self.recalculer_rangs(0, len(self.classement))
+        self.statusBar.showMessage(f"{len(self.etudiants)} étudiant(s) trouvé(s) pour {niveau} - {filiere}", 3000)
+
+    def calculer_resultat(self, etudiant, db=None):
+        """Moyennes trimestrielles, moyenne générale et mention d'un étudiant (rang calculé à part).
+
+        db : connexion à utiliser hors du fil de l'interface (celle de la fenêtre par défaut).
+        """
+        moyennes_trim = self.calculer_moyennes_trimestres(etudiant.matricule, etudiant.niveau, etudiant.filiere, db)
+        moyenne_generale = 0.0
+        if all(trim in moyennes_trim for trim in [1, 2, 3]):
+            moyenne_generale = (moyennes_trim[1] + moyennes_trim[2] + (2 * moyennes_trim[3])) / 4
+        return ResultatEtudiant(
+            etudiant=etudiant,
+            notes={},
+            moyenne_generale=moyenne_generale,
+            rang=0,
+            mention=ResultatEtudiant.calculer_mention(moyenne_generale),
+            credits=0,
+            moyennes_trimestres=moyennes_trim
+        )
+
+    @staticmethod
+    def cle_classement(resultat):
+        etudiant = resultat.etudiant
+        return (-resultat.moyenne_generale, etudiant.nom, etudiant.prenom, etudiant.matricule)
+
+    def recalculer_rangs(self, debut, fin):
+        """Met à jour la colonne Rang des lignes debut <= row < fin.
+
+        Rang = 1 + nombre de moyennes strictement supérieures : c'est la position de la
+        première ligne de même moyenne (les ex aequo partagent le rang).
+        """
+        for row in range(debut, fin):
+            moyenne = self.cles_classement[row][0]
+            rang = bisect.bisect_left(self.cles_classement, (moyenne,)) + 1
+            self.classement[row].rang = rang
+        self.modele_classement.rangs_modifies(debut, fin)
+
+    def mettre_a_jour_classement(self, matricule):
+        """Recalcule un seul étudiant après l'enregistrement de ses notes et met à jour sa ligne.
+
+        La ligne est déplacée à sa nouvelle place et seuls les rangs des lignes dont la
+        moyenne est comprise entre l'ancienne et la nouvelle moyenne sont recalculés.
+        Si l'étudiant n'est pas affiché, le classement est rechargé entièrement.
+        """
+        ancien = next((row for row, r in enumerate(self.classement) if r.etudiant.matricule == matricule), None)
+        if ancien is None or self.taches.en_cours("classement"):
+            # Un chargement en cours a pu lire les notes avant cet enregistrement : le relancer
+            self.charger_classement()
+            return
+        resultat = self.calculer_resultat(self.classement[ancien].etudiant)
+        cle = self.cle_classement(resultat)
+        ancienne_moyenne = self.cles_classement[ancien][0]
+
+        del self.cles_classement[ancien]
+        nouveau = bisect.bisect_left(self.cles_classement, cle)
+        self.cles_classement.insert(nouveau, cle)
+
+        # Déplacer la ligne (la sélection la suit) sans recharger le formulaire de notes
+        selection = self.table_etudiants.selectionModel()
+        selection.blockSignals(True)
         try:
-            if not os.path.exists('etudiants.txt'):
-                QMessageBox.warning(self, "Erreur", "Le fichier etudiants.txt n'existe pas.")
-                return
+            self.modele_classement.remplacer(ancien, nouveau, resultat)
+        finally:
+            selection.blockSignals(False)
+
+        # Lignes dont le nombre de moyennes supérieures a pu changer : moyennes comprises
+        # entre l'ancienne et la nouvelle, ex aequo compris (les clés portent -moyenne)
+        premiere, derniere = sorted((ancienne_moyenne, cle[0]))
+        debut = bisect.bisect_left(self.cles_classement, (premiere,))
+        fin = bisect.bisect_left(self.cles_classement, (derniere,))
+        while fin < len(self.cles_classement) and self.cles_classement[fin][0] == derniere:
+            fin += 1
+        self.recalculer_rangs(debut, fin)
 
-            data = []
+    def exporter_tous_les_etudiants_excel(self):
+        """Exporte tous les étudiants du fichier etudiants.txt avec leurs moyennes (XLSX, ou CSV s'ils sont très nombreux)"""
+        if not os.path.exists('etudiants.txt'):
+            QMessageBox.warning(self, "Erreur", "Le fichier etudiants.txt n'existe pas.")
+            return
+        self.lancer_export(self.ecrire_tous_les_etudiants_excel)
+
+    def ecrire_tous_les_etudiants_excel(self, controle, db):
+        """Écrit le fichier de tous les étudiants (dans un fil du pool) ; None s'il n'y a rien à exporter"""
+        with open('etudiants.txt', 'r', encoding='utf-8') as f:
+            total = sum(1 for _ in f)
+        if total == 0:
+            return None
+
+        def lignes():
             with open('etudiants.txt', 'r', encoding='utf-8') as f:
                 for ligne in f:
                     champs = ligne.strip().split('|')
                     if len(champs) == 7:
                         matricule, nom, prenom, date_naissance, sexe, filiere, niveau = champs
-                        moyennes_trim = self.calculer_moyennes_trimestres(matricule, niveau, filiere)
-                        moyenne_generale = 0.0
-                        if all(trim in moyennes_trim for trim in [1, 2, 3]):
-                            moyenne_generale = (moyennes_trim[1] + moyennes_trim[2] + (2 * moyennes_trim[3])) / 4
-                        mention = ResultatEtudiant.calculer_mention(moyenne_generale)
-                        # Décision BAC
-                        if niveau.lower() == "bac" and 7.0 <= moyenne_generale < 10.0:
-                            decision = "Contrôle"
-                        else:
-                            decision = "Admis" if moyenne_generale >= 10 else "Refusé"
-                        data.append({
-                            "Matricule": matricule,
-                            "Nom": nom,
-                            "Prénom": prenom,
-                            "Date de naissance": date_naissance,
-                            "Sexe": sexe,
-                            "Niveau": niveau,
-                            "Filière": filiere,
-                            "Moyenne T1": moyennes_trim.get(1, 0.0),
-                            "Moyenne T2": moyennes_trim.get(2, 0.0),
-                            "Moyenne T3": moyennes_trim.get(3, 0.0),
-                            "Moyenne Générale": moyenne_generale,
-                            "Mention": mention,
-                            "Décision": decision
-                        })
-            if not data:
-                QMessageBox.information(self, "Information", "Aucune donnée à exporter.")
-                return
-
-            df = pd.DataFrame(data)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            nom_fichier = f"tous_les_etudiants_{timestamp}.xlsx"
-            df.to_excel(nom_fichier, index=False)
-            
+                        yield (matricule, nom, prenom, date_naissance, sexe, niveau, filiere,
+                               *self.ligne_moyennes(matricule, niveau, filiere, db))
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        nom_fichier = f"tous_les_etudiants_{timestamp}.{format_export(total)}"
+        with registre.mesurer("fichiers.export_tous_les_etudiants"):
+            ecrites = exporter_lignes(nom_fichier, ENTETES_TOUS_LES_ETUDIANTS, lignes(), feuille="Étudiants",
+                                      total=total, progression=controle.progression)
+        if ecrites == 0:
+            os.remove(nom_fichier)
+            return None
+        return nom_fichier
+
+    def ligne_moyennes(self, matricule, niveau, filiere, db=None):
+        """Colonnes calculées d'une ligne d'export : T1, T2, T3, moyenne générale, mention, décision"""
+        return colonnes_moyennes(self.calculer_moyennes_trimestres(matricule, niveau, filiere, db), niveau)
+
+    def exporter_ecole(self):
+        """Exporte toute l'école : un fichier par niveau et filière, calculés en parallèle, et une synthèse"""
+        if not os.path.exists('etudiants.txt'):
+            QMessageBox.warning(self, "Erreur", "Le fichier etudiants.txt n'existe pas.")
+            return
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.lancer_export(lambda controle, db: exporter_ecole(db, f"export_ecole_{timestamp}",
+                                                                progression=controle.progression),
+                           unite="classe(s)")
+
+    def lancer_export(self, fonction, *args, unite="étudiant(s)"):
+        """Exécute un export en tâche de fond ; fonction(controle, db, *args) retourne le fichier écrit"""
+        if self.taches.en_cours("export"):
+            QMessageBox.information(self, "Information", "Un export est déjà en cours")
+            return
+        self.statusBar.showMessage("Export en cours...")
+        self.taches.soumettre(
+            fonction, *args, cle="export", avec_base=True, termine=self.export_termine,
+            echec=lambda erreur: QMessageBox.critical(self, "Erreur", f"Erreur lors de l'exportation : {erreur}"),
+            progression=lambda fait, total: self.statusBar.showMessage(f"Export en cours : {fait}/{total} {unite}..."))
+
+    def export_termine(self, nom_fichier):
+        if nom_fichier is None:
+            QMessageBox.information(self, "Information", "Aucune donnée à exporter.")
+            return
+        try:
             # Ouvrir le répertoire contenant le fichier exporté
             os.startfile(os.path.dirname(os.path.abspath(nom_fichier)))
             
@@ -487,53 +605,31 @@ class NotesWindow(QDialog):
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur lors de l'exportation : {str(e)}")
 
-    def calculer_moyennes_trimestres(self, matricule, niveau=None, filiere=None):
+    def calculer_moyennes_trimestres(self, matricule, niveau=None, filiere=None, db=None):
         """Calcule les moyennes par trimestre pour un étudiant donné"""
         if niveau is None:
             niveau = self.niveau_combo.currentText()
         if filiere is None:
             filiere = self.filiere_combo.currentText()
             
-        nom_fichier = f"notes_{niveau}_{filiere}.txt"
-        moyennes = {1: 0.0, 2: 0.0, 3: 0.0}
-        coefs = {1: 0, 2: 0, 3: 0}
-        totaux = {1: 0.0, 2: 0.0, 3: 0.0}
-
-        # Charger les matières pour avoir les coefficients
-        matieres = self.db.get_matieres(niveau, filiere)
-        if not matieres:
-            return moyennes
-            
-        coef_matieres = {m.nom: m.coefficient for m in matieres}
-
-        if not os.path.exists(nom_fichier):
-            return moyennes
+        # Coefficients chargés une fois par niveau et filière, notes lues dans l'index du journal
+        coef_matieres = self.coefficients_matieres(niveau, filiere, db)
+        if not coef_matieres:
+            return {1: 0.0, 2: 0.0, 3: 0.0}
 
         try:
-            with open(nom_fichier, "r", encoding="utf-8") as f:
-                for ligne in f:
-                    parts = ligne.strip().split("|")
-                    if len(parts) == 5:
-                        m, matiere, note_cc, note_exam, trimestre = parts
-                        if m == matricule:
-                            try:
-                                trimestre = int(trimestre)
-                                note_cc = float(note_cc)
-                                note_exam = float(note_exam)
-                                moyenne = 0.4 * note_cc + 0.6 * note_exam
-                                coef = coef_matieres.get(matiere, 1)
-                                totaux[trimestre] += moyenne * coef
-                                coefs[trimestre] += coef
-                            except ValueError:
-                                continue
-
-            for t in [1, 2, 3]:
-                if coefs[t] > 0:
-                    moyennes[t] = round(totaux[t] / coefs[t], 2)
+            return moyennes_trimestres(JournalNotes.pour(niveau, filiere).notes_etudiant(matricule), coef_matieres)
         except Exception as e:
-            print(f"Erreur calcul moyennes trimestres: {str(e)}")
-            
-        return moyennes
+            registre.erreur("moyennes_trimestres", f"Erreur calcul moyennes trimestres: {str(e)}")
+            return {1: 0.0, 2: 0.0, 3: 0.0}
+
+    def coefficients_matieres(self, niveau, filiere, db=None):
+        """Coefficients des matières d'un niveau et d'une filière (mis en cache)"""
+        cle = (niveau, filiere)
+        if cle not in self.coefficients:
+            matieres = (db or self.db).get_matieres(niveau, filiere)
+            self.coefficients[cle] = {m.nom: m.coefficient for m in matieres}
+        return self.coefficients[cle]
 
     def afficher_notes(self, etudiant):
         """Affiche les notes d'un étudiant sélectionné"""
@@ -550,21 +646,10 @@ class NotesWindow(QDialog):
             self.table_notes.setRowCount(len(self.matieres))
             
             # Charger les notes existantes pour cet étudiant et ce trimestre
-            notes_existantes = {}
-            nom_fichier = f"notes_{etudiant.niveau}_{etudiant.filiere}.txt"
             trimestre = self.trimestre_combo.currentIndex() + 1
-            
-            if os.path.exists(nom_fichier):
-                with open(nom_fichier, "r", encoding="utf-8") as f:
-                    for ligne in f:
-                        parts = ligne.strip().split("|")
-                        if len(parts) == 5:
-                            m, matiere, note_cc, note_exam, trim = parts
-                            if m == etudiant.matricule and int(trim) == trimestre:
-                                try:
-                                    notes_existantes[matiere] = (float(note_cc), float(note_exam))
-                                except ValueError:
-                                    continue
+            with registre.mesurer("fichiers.lecture_journal"):
+                notes_existantes = JournalNotes.pour(etudiant.niveau, etudiant.filiere) \
+                    .notes_etudiant(etudiant.matricule).get(trimestre, {})
             
             # Remplir la table des notes
             for row, matiere in enumerate(self.matieres):
@@ -642,7 +727,7 @@ class NotesWindow(QDialog):
         trimestre = self.trimestre_combo.currentIndex() + 1  # 1, 2 ou 3
 
         try:
-            notes_data = []
+            notes_data = {}
             total = 0
             coef_total = 0
             
@@ -654,7 +739,7 @@ class NotesWindow(QDialog):
                 # Vérifier si au moins une note est saisie
                 if note_cc > 0 or note_exam > 0:
                     moyenne = round(0.4 * note_cc + 0.6 * note_exam, 2)
-                    notes_data.append(f"{matricule}|{matiere.nom}|{note_cc:.2f}|{note_exam:.2f}|{trimestre}")
+                    notes_data[matiere.nom] = (note_cc, note_exam)
                     total += moyenne * matiere.coefficient
                     coef_total += matiere.coefficient
 
@@ -664,35 +749,102 @@ class NotesWindow(QDialog):
 
             moyenne_trim = round(total / coef_total, 2) if coef_total > 0 else 0.0
 
-            # Nom du fichier par niveau et filière
-            nom_fichier = f"notes_{niveau}_{filiere}.txt"
-            
-            # Lire les notes existantes et supprimer celles pour ce trimestre et cet étudiant
-            notes_existantes = []
-            if os.path.exists(nom_fichier):
-                with open(nom_fichier, "r", encoding="utf-8") as f:
-                    for ligne in f:
-                        parts = ligne.strip().split("|")
-                        if len(parts) == 5:
-                            m, mat, _, _, trim = parts
-                            if not (m == matricule and int(trim) == trimestre):
-                                notes_existantes.append(ligne.strip())
-
-            # Écrire toutes les notes (anciennes + nouvelles)
-            with open(nom_fichier, "w", encoding="utf-8") as f:
-                for ligne in notes_existantes:
-                    f.write(ligne + "\n")
-                for ligne in notes_data:
-                    f.write(ligne + "\n")
-
-            # Mettre à jour l'affichage
-            self.charger_classement()
+            # Ajout en fin de journal : les matières laissées vides effacent les notes précédentes
+            with registre.mesurer("fichiers.ecriture_journal"):
+                JournalNotes.pour(niveau, filiere).enregistrer_trimestre(
+                    matricule, trimestre, notes_data, [matiere.nom for matiere in self.matieres])
+            self.planifier_compactage(niveau, filiere)
+
+            # Mettre à jour la seule ligne de l'étudiant et les rangs concernés
+            self.mettre_a_jour_classement(matricule)
             QMessageBox.information(self, "Succès", 
                 f"Les notes ont été enregistrées et la moyenne du trimestre {trimestre} est {moyenne_trim:.2f} !")
 
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Impossible d'enregistrer les notes: {str(e)}")
 
+    def importer_notes(self):
+        """Importe une feuille de notes CSV/XLSX pour le niveau et la filière sélectionnés"""
+        niveau = self.niveau_combo.currentText()
+        filiere = self.filiere_combo.currentText()
+        if not niveau or not filiere:
+            QMessageBox.warning(self, "Attention", "Veuillez sélectionner un niveau et une filière")
+            return
+
+        chemin, _ = QFileDialog.getOpenFileName(
+            self, "Importer une feuille de notes", "", "Feuilles de notes (*.csv *.xlsx)")
+        if not chemin:
+            return
+
+        if self.taches.en_cours("import_notes"):
+            QMessageBox.information(self, "Information", "Un import de notes est déjà en cours")
+            return
+
+        try:
+            noms_matieres = {m.id: m.nom for m in self.db.get_matieres(niveau, filiere)}
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur", f"Erreur lors de l'import des notes : {str(e)}")
+            return
+
+        self.btn_import_notes.setEnabled(False)
+        self.statusBar.showMessage("Import des notes en cours...")
+        tache = self.taches.soumettre(
+            self.importer_notes_tache, chemin, niveau, filiere, noms_matieres,
+            cle="import_notes", avec_base=True, termine=self.import_notes_termine,
+            echec=lambda erreur: QMessageBox.critical(self, "Erreur", f"Erreur lors de l'import des notes : {erreur}"),
+            progression=lambda fait, total: self.statusBar.showMessage(f"Import en cours : {fait} note(s) enregistrée(s)..."))
+        tache.signaux.fini.connect(lambda: self.btn_import_notes.setEnabled(True))
+
+    @staticmethod
+    def importer_notes_tache(controle, db, chemin, niveau, filiere, noms_matieres):
+        """Import d'une feuille de notes dans un fil du pool ; retourne (niveau, filière, rapport)"""
+        journal = JournalNotes.pour(niveau, filiere)
+        enregistrees = 0
+
+        def apres_lot(notes):
+            nonlocal enregistrees
+            # Chaque lot validé en base est reporté dans le journal de notes
+            with registre.mesurer("fichiers.ecriture_journal"):
+                journal.ajouter(
+                    ((note.etudiant_matricule, noms_matieres[note.matiere_id], note.trimestre),
+                     (note.note_cc or 0.0, note.note_exam or 0.0))
+                    for note in notes
+                )
+            enregistrees += len(notes)
+            controle.progression(enregistrees)
+
+        rapport = importer_notes(chemin, db, niveau, filiere, apres_lot=apres_lot)
+        return niveau, filiere, rapport
+
+    def import_notes_termine(self, resultat):
+        niveau, filiere, rapport = resultat
+        self.planifier_compactage(niveau, filiere)
+        self.charger_classement()
+
+        message = f"{rapport.enregistres} note(s) importée(s) sur {rapport.total}."
+        if rapport.erreurs:
+            details = "\n".join(f"Ligne {numero} : {erreur}" for numero, erreur in rapport.erreurs[:10])
+            if len(rapport.erreurs) > 10:
+                details += f"\n... et {len(rapport.erreurs) - 10} autre(s) erreur(s)"
+            QMessageBox.warning(self, "Import terminé avec des erreurs", f"{message}\n\n{details}")
+        else:
+            QMessageBox.information(self, "Succès", message)
+
+    def planifier_compactage(self, niveau, filiere):
+        """Relance le délai d'inactivité avant compactage du journal modifié"""
+        self.journaux_modifies.add((niveau, filiere))
+        self.timer_compactage.start()
+
+    def compacter_journaux(self):
+        """Compacte les journaux de notes modifiés si leurs enregistrements périmés le justifient"""
+        while self.journaux_modifies:
+            niveau, filiere = self.journaux_modifies.pop()
+            try:
+                with registre.mesurer("fichiers.compactage_journal"):
+                    JournalNotes.pour(niveau, filiere).compacter_si_necessaire()
+            except OSError as e:
+                registre.erreur("compactage_journal", f"Erreur compactage notes {niveau} {filiere}: {str(e)}")
+
     def on_etudiant_selected(self):
         """Gère la sélection d'un étudiant dans le tableau"""
         selected_rows = self.table_etudiants.selectionModel().selectedRows()
@@ -700,84 +852,38 @@ class NotesWindow(QDialog):
             return
 
         row = selected_rows[0].row()
-        # Récupérer chaque item et vérifier qu'il n'est pas None
-        matricule_item = self.table_etudiants.item(row, 0)
-        nom_item = self.table_etudiants.item(row, 1)
-        prenom_item = self.table_etudiants.item(row, 2)
-        date_naissance_item = self.table_etudiants.item(row, 3)
-        sexe_item = self.table_etudiants.item(row, 4)
-
-        if not all([matricule_item, nom_item, prenom_item, date_naissance_item, sexe_item]):
-            QMessageBox.warning(self, "Erreur", "Impossible de récupérer les informations de l'étudiant sélectionné.")
-            return
-
-        matricule = matricule_item.text()
-        nom = nom_item.text()
-        prenom = prenom_item.text()
-        date_naissance = date_naissance_item.text()
-        sexe = sexe_item.text()
-
-        etudiant = Etudiant(
-            matricule=matricule,
-            nom=nom,
-            prenom=prenom,
-            date_naissance=date_naissance,
-            sexe=sexe,
-            filiere=self.filiere_combo.currentText(),
-            niveau=self.niveau_combo.currentText()
-        )
-        self.afficher_notes(etudiant)
+        self.afficher_notes(self.classement[row].etudiant)
 
     def exporter_moyennes_excel(self):
         """Exporte les moyennes des étudiants vers un fichier Excel"""
-        try:
-            if not self.etudiants:
-                QMessageBox.warning(self, "Attention", "Aucun étudiant à exporter")
-                return
-
-            # Préparer les données
-            data = []
-            niveau = self.niveau_combo.currentText()
-            filiere = self.filiere_combo.currentText()
-            
-            for etudiant in self.etudiants:
-                moyennes_trim = self.calculer_moyennes_trimestres(etudiant.matricule, etudiant.niveau, etudiant.filiere)
-                moyenne_generale = 0.0
-                if all(trim in moyennes_trim for trim in [1, 2, 3]):
-                    moyenne_generale = (moyennes_trim[1] + moyennes_trim[2] + (2 * moyennes_trim[3])) / 4
-                
-                data.append({
-                    "Matricule": etudiant.matricule,
-                    "Nom": etudiant.nom,
-                    "Prénom": etudiant.prenom,
-                    "Niveau": niveau,
-                    "Filière": filiere,
-                    "Moyenne T1": moyennes_trim.get(1, 0.0),
-                    "Moyenne T2": moyennes_trim.get(2, 0.0),
-                    "Moyenne T3": moyennes_trim.get(3, 0.0),
-                    "Moyenne Générale": moyenne_generale,
-                    "Mention": ResultatEtudiant.calculer_mention(moyenne_generale),
-                    "Décision": "Contrôle" if niveau.lower() == "bac" and 7.0 <= moyenne_generale < 10.0 else ("Admis" if moyenne_generale >= 10 else "Refusé")
-                })
-
-            # Créer le DataFrame et exporter
-            df = pd.DataFrame(data)
-            
-            # Nom du fichier avec date et heure
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            nom_fichier = f"moyennes_{niveau}_{filiere}_{timestamp}.xlsx"
-            
-            df.to_excel(nom_fichier, index=False)
-            
-            # Ouvrir le répertoire contenant le fichier exporté
-            os.startfile(os.path.dirname(os.path.abspath(nom_fichier)))
-            
-            QMessageBox.information(self, "Succès", f"Exportation réussie vers {nom_fichier}")
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Erreur", f"Erreur lors de l'exportation : {str(e)}")
+        if not self.etudiants:
+            QMessageBox.warning(self, "Attention", "Aucun étudiant à exporter")
+            return
+        self.lancer_export(self.ecrire_moyennes_excel, list(self.etudiants),
+                           self.niveau_combo.currentText(), self.filiere_combo.currentText())
+
+    def ecrire_moyennes_excel(self, controle, db, etudiants, niveau, filiere):
+        """Écrit le fichier des moyennes d'une classe (dans un fil du pool)"""
+        lignes = (
+            (etudiant.matricule, etudiant.nom, etudiant.prenom, niveau, filiere,
+             *self.ligne_moyennes(etudiant.matricule, etudiant.niveau, etudiant.filiere, db))
+            for etudiant in etudiants
+        )
+        # Nom du fichier avec date et heure
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        nom_fichier = f"moyennes_{niveau}_{filiere}_{timestamp}.{format_export(len(etudiants))}"
+        with registre.mesurer("fichiers.export_moyennes"):
+            exporter_lignes(nom_fichier, ENTETES_MOYENNES, lignes, feuille=f"{niveau} - {filiere}",
+                            total=len(etudiants), progression=controle.progression)
+        return nom_fichier
 
     def closeEvent(self, event):
-        """Ferme proprement la fenêtre"""
+        """Ferme proprement la fenêtre et libère sa référence sur la connexion partagée"""
+        self.timer_compactage.stop()
+        self.taches.annuler_tout()
+        # Délai borné : une tâche annulée s'arrête à son prochain point d'annulation ; si elle
+        # tarde (lot d'import en cours), elle finit sans cette fenêtre, qui n'est que masquée
+        self.taches.attendre(2000)
+        self.compacter_journaux()
         self.db.close()
         event.accept()
\ No newline at end of file
@@ -0,0 +1,86 @@
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget,
+                             QTableWidgetItem, QHeaderView, QPlainTextEdit, QMessageBox)
+from PyQt5.QtCore import Qt, QTimer
+from metriques import registre, lignes_tableau, FICHIER_METRIQUES
+
+
+class PanneauMetriques(QDialog):
+    """Panneau de développement : durées, compteurs et dernières erreurs du registre de métriques"""
+
+    COLONNES = ["Métrique", "Appels", "p50 (ms)", "p95 (ms)", "Max (ms)", "Total (ms)"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Métriques")
+        self.resize(760, 520)
+        self.version = None
+        layout = QVBoxLayout(self)
+
+        self.table_durees = QTableWidget(0, len(self.COLONNES))
+        self.table_durees.setHorizontalHeaderLabels(self.COLONNES)
+        self.table_durees.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table_durees.verticalHeader().setVisible(False)
+        self.table_durees.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table_durees)
+
+        layout.addWidget(QLabel("Compteurs et dernières erreurs :"))
+        self.texte_compteurs = QPlainTextEdit()
+        self.texte_compteurs.setReadOnly(True)
+        self.texte_compteurs.setMaximumHeight(150)
+        layout.addWidget(self.texte_compteurs)
+
+        boutons = QHBoxLayout()
+        self.label_depuis = QLabel()
+        boutons.addWidget(self.label_depuis)
+        boutons.addStretch()
+        self.btn_instantane = QPushButton("Écrire un instantané")
+        self.btn_instantane.clicked.connect(self.ecrire_instantane)
+        boutons.addWidget(self.btn_instantane)
+        self.btn_reinitialiser = QPushButton("Réinitialiser")
+        self.btn_reinitialiser.clicked.connect(registre.reinitialiser)
+        boutons.addWidget(self.btn_reinitialiser)
+        layout.addLayout(boutons)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.actualiser)
+        self.timer.start(1000)
+        self.actualiser()
+
+    def actualiser(self):
+        # Rien à redessiner si aucune mesure n'a été ajoutée depuis la dernière actualisation
+        if registre.version == self.version:
+            return
+        self.version = registre.version
+        instantane = registre.instantane()
+
+        lignes = lignes_tableau(instantane)
+        self.table_durees.setRowCount(len(lignes))
+        for i, ligne in enumerate(lignes):
+            for j, valeur in enumerate(ligne):
+                item = QTableWidgetItem(valeur if j == 0 else f"{valeur:g}" if j == 1 else f"{valeur:.2f}")
+                if j:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table_durees.setItem(i, j, item)
+
+        texte = [f"{nom} : {valeur}" for nom, valeur in instantane["compteurs"].items()]
+        texte += [f"[{horodatage}] {nom} : {message}" for horodatage, nom, message in instantane["erreurs"]]
+        self.texte_compteurs.setPlainText("\n".join(texte))
+        self.label_depuis.setText(f"Depuis {instantane['depuis'].replace('T', ' ')}")
+
+    def ecrire_instantane(self):
+        try:
+            if registre.ecrire_instantane():
+                QMessageBox.information(self, "Métriques", f"Instantané ajouté à {FICHIER_METRIQUES}")
+            else:
+                QMessageBox.information(self, "Métriques", "Rien de nouveau depuis le dernier instantané")
+        except OSError as e:
+            QMessageBox.critical(self, "Erreur", f"Impossible d'écrire les métriques : {e}")
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        super().closeEvent(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.timer.start(1000)
+        self.actualiser()
@@ -0,0 +1,137 @@
+"""Profil du démarrage de l'application : imports et délai jusqu'au premier affichage.
+
+L'application est lancée dans un processus neuf avec python -X importtime. Le délai est
+mesuré depuis le lancement du processus jusqu'à la fin du premier dessin de la fenêtre
+principale (GestionEtudiantsApp), puis la fenêtre est refermée. Sont affichés : la médiane
+des essais par étape (interpréteur, imports, construction de la fenêtre, premier affichage)
+et les imports les plus lents du dernier essai.
+
+La vérification échoue si la médiane du premier affichage dépasse le budget. L'option
+-X importtime ajoute elle-même quelques millisecondes, comptées dans le budget.
+
+Usage : python profil_demarrage.py [--budget MS] [--essais N] [--imports N] [--dossier D] [--hors-ecran]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+BUDGET_MS = 1000
+
+# Exécuté dans le processus mesuré ; les instants sont des time.time(), comparables entre processus
+LANCEUR = """
+import sys, time
+debut = time.time()
+sys.path.insert(0, {dossier_app!r})
+from PyQt5.QtCore import QEvent, QObject, QTimer
+from PyQt5.QtWidgets import QApplication
+import main
+imports = time.time()
+app = QApplication(sys.argv)
+app.aboutToQuit.connect(main.GestionnaireConnexions.fermer_tout)
+fenetre = main.GestionEtudiantsApp()
+construction = time.time()
+
+
+class PremierDessin(QObject):
+    def __init__(self):
+        super().__init__()
+        self.vu = False
+
+    def eventFilter(self, objet, evenement):
+        if (not self.vu and evenement.type() == QEvent.Paint
+                and objet.isWidgetType() and objet.window() is fenetre):
+            self.vu = True
+            # Après le retour à la boucle : tous les widgets de ce premier dessin sont peints
+            QTimer.singleShot(0, terminer)
+        return False
+
+
+def terminer():
+    print("PROFIL " + __import__("json").dumps({{
+        "debut": debut, "imports": imports, "construction": construction, "affichage": time.time()}}))
+    sys.stdout.flush()
+    fenetre.close()
+    app.quit()
+
+
+filtre = PremierDessin()
+app.installEventFilter(filtre)
+fenetre.show()
+app.exec_()
+"""
+
+LIGNE_IMPORT = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _imports(sortie_erreur: str) -> List[Tuple[str, int, int]]:
+    """(module, temps cumulé en µs, profondeur) de chaque import, dans l'ordre de -X importtime"""
+    imports = []
+    for ligne in sortie_erreur.splitlines():
+        match = LIGNE_IMPORT.match(ligne)
+        if match:
+            imports.append((match.group(4), int(match.group(2)), (len(match.group(3)) - 1) // 2))
+    return imports
+
+
+def mesurer(dossier: str, hors_ecran: bool = False) -> Tuple[Dict[str, float], List[Tuple[str, int, int]]]:
+    """Un démarrage : durées des étapes en ms (cumulées depuis le lancement) et imports du processus"""
+    environnement = dict(os.environ)
+    if hors_ecran:
+        environnement["QT_QPA_PLATFORM"] = "offscreen"
+    code = LANCEUR.format(dossier_app=os.path.dirname(os.path.abspath(__file__)))
+    lancement = time.time()
+    processus = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=dossier,
+                               env=environnement, capture_output=True, text=True, timeout=120)
+    instants = None
+    for ligne in processus.stdout.splitlines():
+        if ligne.startswith("PROFIL "):
+            instants = json.loads(ligne[len("PROFIL "):])
+    if processus.returncode != 0 or instants is None:
+        erreurs = [ligne for ligne in processus.stderr.splitlines() if not ligne.startswith("import time:")]
+        raise RuntimeError("Le démarrage a échoué :\n" + "\n".join(erreurs[-20:]))
+    etapes = {etape: (instants[etape] - lancement) * 1000
+              for etape in ("debut", "imports", "construction", "affichage")}
+    return etapes, _imports(processus.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="délai maximal du premier affichage (ms)")
+    parser.add_argument("--essais", type=int, default=5, help="nombre de démarrages mesurés")
+    parser.add_argument("--imports", type=int, default=15, help="nombre d'imports les plus lents affichés")
+    parser.add_argument("--dossier", default=".", help="dossier de données de l'application (base, fichiers)")
+    parser.add_argument("--hors-ecran", action="store_true", help="plateforme Qt offscreen (sans affichage)")
+    args = parser.parse_args()
+
+    mesures = []
+    imports = []
+    for _ in range(args.essais):
+        etapes, imports = mesurer(args.dossier, args.hors_ecran)
+        mesures.append(etapes)
+    mediane = {etape: statistics.median(mesure[etape] for mesure in mesures) for etape in mesures[0]}
+
+    print(f"Démarrage, médiane de {args.essais} essai(s), depuis le lancement du processus :")
+    precedent = 0.0
+    for etape, libelle in (("debut", "interpréteur prêt"), ("imports", "imports de main"),
+                           ("construction", "fenêtre construite"), ("affichage", "premier affichage")):
+        print(f"  {libelle:<20} {mediane[etape]:8.1f} ms  (+{mediane[etape] - precedent:.1f})")
+        precedent = mediane[etape]
+
+    print("\nImports les plus lents (temps cumulé, dernier essai) :")
+    for module, cumule, profondeur in sorted(imports, key=lambda i: -i[1])[:args.imports]:
+        print(f"  {cumule / 1000:8.1f} ms  {'  ' * profondeur}{module}")
+
+    if mediane["affichage"] > args.budget:
+        print(f"\nÉCHEC premier affichage en {mediane['affichage']:.0f} ms, budget {args.budget:.0f} ms")
+        sys.exit(1)
+    print(f"\nPremier affichage en {mediane['affichage']:.0f} ms, dans le budget de {args.budget:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
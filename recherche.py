@@ -0,0 +1,109 @@
+"""Recherche d'étudiants au fil de la saisie : cache LRU des derniers résultats.
+
+Quand l'utilisateur prolonge sa saisie, la nouvelle recherche est le plus souvent un
+sous-ensemble d'une recherche déjà en cache : elle est alors obtenue en filtrant ces
+résultats, sans retourner à la base. Le filtre et le classement reproduisent exactement
+Database.rechercher_etudiants :
+- un mot de trois caractères ou plus doit être une sous-chaîne d'un mot d'un champ ;
+- un mot plus court doit être un début de mot ;
+- classement : matricule exact, puis tous les mots en début de mot, puis le reste,
+  par nom et prénom dans chaque groupe.
+
+Un résultat tronqué par la limite de la base ne sert jamais à affiner : des étudiants
+absents de la liste pourraient correspondre à la nouvelle recherche.
+"""
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from database import mots_recherche
+from models import Etudiant
+
+LONGUEUR_SOUS_CHAINE = 3  # en deçà, un mot n'est cherché qu'en début de mot (index trigram)
+
+
+def _mots_etudiant(etudiant: Etudiant) -> List[str]:
+    return mots_recherche(etudiant.matricule) + mots_recherche(etudiant.nom) + mots_recherche(etudiant.prenom)
+
+
+def correspond(etudiant: Etudiant, mots: Sequence[str]) -> bool:
+    """Vrai si l'étudiant serait retourné par la base pour ces mots (voir mots_recherche)"""
+    mots_etudiant = _mots_etudiant(etudiant)
+    for mot in mots:
+        if len(mot) >= LONGUEUR_SOUS_CHAINE:
+            if not any(mot in mot_etudiant for mot_etudiant in mots_etudiant):
+                return False
+        elif not any(mot_etudiant.startswith(mot) for mot_etudiant in mots_etudiant):
+            return False
+    return True
+
+
+def pertinence(etudiant: Etudiant, terme: str, mots: Sequence[str]) -> Tuple[int, str, str]:
+    """Clé de tri des résultats : même ordre que Database.rechercher_etudiants"""
+    if etudiant.matricule == terme.strip():
+        groupe = 0
+    else:
+        mots_etudiant = _mots_etudiant(etudiant)
+        debuts = all(any(mot_etudiant.startswith(mot) for mot_etudiant in mots_etudiant) for mot in mots)
+        groupe = 1 if debuts else 2
+    return groupe, etudiant.nom, etudiant.prenom
+
+
+def affine(ancien: Sequence[str], nouveau: Sequence[str]) -> bool:
+    """Vrai si les résultats de nouveau sont forcément inclus dans ceux de ancien.
+
+    nouveau reprend les mots de ancien, le dernier éventuellement prolongé, puis en ajoute.
+    Un mot court qui atteint trois caractères change de nature (début de mot -> sous-chaîne)
+    et peut trouver des étudiants que l'ancien mot excluait : pas d'affinage dans ce cas.
+    """
+    if not ancien or len(nouveau) < len(ancien):
+        return False
+    if list(nouveau[:len(ancien) - 1]) != list(ancien[:-1]):
+        return False
+    dernier, prolonge = ancien[-1], nouveau[len(ancien) - 1]
+    if not prolonge.startswith(dernier):
+        return False
+    return len(dernier) >= LONGUEUR_SOUS_CHAINE or len(prolonge) < LONGUEUR_SOUS_CHAINE
+
+
+class CacheRecherche:
+    """Derniers résultats de recherche, du plus ancien au plus récent"""
+
+    def __init__(self, capacite: int = 32, limite: int = 500):
+        self.capacite = capacite
+        self.limite = limite  # limite passée à Database.rechercher_etudiants
+        self.generation = 0  # incrémentée par vider()
+        self._entrees: 'OrderedDict[str, Tuple[List[str], List[Etudiant]]]' = OrderedDict()
+
+    def chercher(self, terme: str) -> Optional[List[Etudiant]]:
+        """Résultats de terme tirés du cache (exacts ou affinés), ou None s'il faut interroger la base"""
+        cle = terme.strip()
+        if cle in self._entrees:
+            self._entrees.move_to_end(cle)
+            return self._entrees[cle][1]
+        mots = mots_recherche(terme)
+        if not mots:
+            return None
+        # Le plus récent d'abord : c'est en général la saisie précédente, la plus proche
+        for mots_anciens, resultats in reversed(self._entrees.values()):
+            if len(resultats) < self.limite and affine(mots_anciens, mots):
+                affines = [etudiant for etudiant in resultats if correspond(etudiant, mots)]
+                affines.sort(key=lambda etudiant: pertinence(etudiant, terme, mots))
+                self.enregistrer(terme, affines)
+                return affines
+        return None
+
+    def enregistrer(self, terme: str, resultats: List[Etudiant]):
+        cle = terme.strip()
+        self._entrees[cle] = (mots_recherche(terme), resultats)
+        self._entrees.move_to_end(cle)
+        while len(self._entrees) > self.capacite:
+            self._entrees.popitem(last=False)
+
+    def vider(self):
+        """À appeler après tout ajout, modification ou suppression d'étudiant.
+
+        Une recherche lancée avant l'appel ne doit plus être enregistrée : comparer generation
+        à sa valeur au lancement.
+        """
+        self._entrees.clear()
+        self.generation += 1
@@ -0,0 +1,187 @@
+"""Travaux longs exécutés hors du fil de l'interface (chargements, classements, exports, imports).
+
+Une tâche exécute une fonction dans un fil d'un QThreadPool. La fonction reçoit un
+ControleTache pour signaler sa progression et vérifier qu'elle n'a pas été annulée ;
+avec avec_base=True elle reçoit aussi une Database propre au fil du pool (connexion
+fournie par le GestionnaireConnexions, fermée à la fin de la tâche).
+
+Les signaux de la tâche sont créés dans le fil de l'interface : résultats, erreurs et
+progression y sont livrés par la boucle d'événements Qt. Une tâche annulée ne livre jamais
+son résultat, même si elle a fini son travail : un chargement remplacé par un plus récent
+(même clé) ne peut pas écraser l'affichage.
+"""
+import threading
+import time
+import traceback
+from typing import Callable, Dict, Optional, Set
+
+from PyQt5.QtCore import QObject, QRunnable, QThread, QThreadPool, pyqtSignal
+
+from database import Database
+from metriques import registre
+
+
+class TacheAnnulee(Exception):
+    """Levée par ControleTache quand la tâche a été annulée ; interrompt la fonction de travail"""
+    pass
+
+
+class SignauxTache(QObject):
+    progression = pyqtSignal(int, int)  # fait, total (0 si inconnu)
+    termine = pyqtSignal(object)        # résultat de la fonction
+    echec = pyqtSignal(str)
+    annulee = pyqtSignal()
+    fini = pyqtSignal()                 # émis en dernier, quelle que soit l'issue
+
+
+class ControleTache:
+    """Vue de la tâche offerte à la fonction de travail"""
+
+    def __init__(self, signaux: SignauxTache):
+        self._signaux = signaux
+        self._annulation = threading.Event()
+
+    @property
+    def annulee(self) -> bool:
+        return self._annulation.is_set()
+
+    def annuler(self):
+        self._annulation.set()
+
+    def verifier(self):
+        """Lève TacheAnnulee si la tâche a été annulée"""
+        if self._annulation.is_set():
+            raise TacheAnnulee()
+
+    def progression(self, fait: int, total: int = 0):
+        """Signale l'avancement ; c'est aussi un point d'annulation"""
+        self.verifier()
+        self._signaux.progression.emit(fait, total)
+
+
+class Tache(QRunnable):
+    """fonction(controle, [db,] *args, **kwargs) exécutée dans un fil du pool"""
+
+    def __init__(self, fonction: Callable, *args, avec_base: bool = False, **kwargs):
+        super().__init__()
+        # Le gestionnaire garde une référence jusqu'au signal fini
+        self.setAutoDelete(False)
+        self.fonction = fonction
+        self.args = args
+        self.kwargs = kwargs
+        self.avec_base = avec_base
+        self.signaux = SignauxTache()
+        self.controle = ControleTache(self.signaux)
+        # Posé par le fil du pool à la fin de run : GestionnaireTaches.attendre ne dépend pas
+        # de la boucle d'événements (le signal fini n'est livré qu'à son retour)
+        self.execution_finie = threading.Event()
+
+    def annuler(self):
+        self.controle.annuler()
+
+    def run(self):
+        try:
+            if self.controle.annulee:
+                self.signaux.annulee.emit()
+                return
+            db = Database() if self.avec_base else None
+            try:
+                args = (self.controle, db) if self.avec_base else (self.controle,)
+                resultat = self.fonction(*args, *self.args, **self.kwargs)
+            finally:
+                if db is not None:
+                    db.close()
+            if self.controle.annulee:
+                self.signaux.annulee.emit()
+            else:
+                self.signaux.termine.emit(resultat)
+        except TacheAnnulee:
+            self.signaux.annulee.emit()
+        except Exception as e:
+            nom = getattr(self.fonction, "__name__", repr(self.fonction))
+            registre.erreur("taches", f"Erreur dans la tâche {nom} :\n{traceback.format_exc()}")
+            if self.controle.annulee:
+                self.signaux.annulee.emit()
+            else:
+                self.signaux.echec.emit(str(e))
+        finally:
+            self.signaux.fini.emit()
+            self.execution_finie.set()
+
+
+def _pool_par_defaut() -> QThreadPool:
+    pool = QThreadPool()
+    # Au moins deux fils : un import long ne doit pas retarder les chargements d'affichage
+    pool.setMaxThreadCount(max(2, QThread.idealThreadCount()))
+    return pool
+
+
+class GestionnaireTaches(QObject):
+    """Soumet des tâches au pool et suit celles qui sont en cours.
+
+    Une tâche soumise avec une clé annule la tâche en cours de même clé : seul le
+    dernier chargement demandé d'un même affichage livre son résultat.
+    """
+    _pool: Optional[QThreadPool] = None
+
+    def __init__(self, parent=None, pool: Optional[QThreadPool] = None):
+        super().__init__(parent)
+        if pool is None:
+            if GestionnaireTaches._pool is None:
+                GestionnaireTaches._pool = _pool_par_defaut()
+            pool = GestionnaireTaches._pool
+        self.pool = pool
+        self._actives: Set[Tache] = set()
+        self._par_cle: Dict[str, Tache] = {}
+
+    def soumettre(self, fonction: Callable, *args, cle: Optional[str] = None, avec_base: bool = False,
+                  termine: Optional[Callable] = None, echec: Optional[Callable] = None,
+                  progression: Optional[Callable] = None, annulee: Optional[Callable] = None,
+                  **kwargs) -> Tache:
+        """Exécute fonction(controle, [db,] *args, **kwargs) dans le pool.
+
+        Les rappels termine(resultat), echec(message), progression(fait, total) et
+        annulee() sont appelés dans le fil de l'interface.
+        """
+        if cle is not None:
+            self.annuler(cle)
+        tache = Tache(fonction, *args, avec_base=avec_base, **kwargs)
+        for signal, rappel in ((tache.signaux.termine, termine), (tache.signaux.echec, echec),
+                               (tache.signaux.progression, progression), (tache.signaux.annulee, annulee)):
+            if rappel is not None:
+                signal.connect(rappel)
+        tache.signaux.fini.connect(lambda: self._retirer(tache, cle))
+        self._actives.add(tache)
+        if cle is not None:
+            self._par_cle[cle] = tache
+        self.pool.start(tache)
+        return tache
+
+    def _retirer(self, tache: Tache, cle: Optional[str]):
+        self._actives.discard(tache)
+        if cle is not None and self._par_cle.get(cle) is tache:
+            del self._par_cle[cle]
+
+    def en_cours(self, cle: str) -> bool:
+        """Vrai si une tâche de cette clé n'a pas encore livré son résultat"""
+        return cle in self._par_cle
+
+    def annuler(self, cle: str):
+        tache = self._par_cle.pop(cle, None)
+        if tache is not None:
+            tache.annuler()
+
+    def annuler_tout(self):
+        for tache in list(self._actives):
+            tache.annuler()
+        self._par_cle.clear()
+
+    def attendre(self, delai_ms: int = -1) -> bool:
+        """Attend la fin des tâches de ce gestionnaire (fermeture de fenêtre, tests), pas celles des
+        autres fenêtres qui partagent le pool ; faux si le délai (ms, -1 : sans limite) expire avant"""
+        echeance = None if delai_ms < 0 else time.monotonic() + delai_ms / 1000
+        for tache in list(self._actives):
+            restant = None if echeance is None else max(0.0, echeance - time.monotonic())
+            if not tache.execution_finie.wait(restant):
+                return False
+        return True
@@ -0,0 +1,287 @@
+"""Traceur des requêtes SQL émises par Database, pour repérer les motifs N+1.
+
+Le traceur s'accroche à la connexion du fil courant (sqlite3.Connection.set_trace_callback)
+et range les requêtes par opération : un appel de méthode publique de Database (instrumenter)
+ou un bloc nommé (operation). Pour chaque requête il garde le texte normalisé (valeurs
+remplacées par ?, listes IN réduites) et une durée : le temps écoulé jusqu'à la requête
+suivante ou la fin de l'opération.
+
+SQLite signale aussi les instructions des déclencheurs (même texte que l'instruction qui les
+déclenche) et celles des modules de tables virtuelles (texte commençant par « -- ») : elles
+sont comptées avec la requête en cours, pas comme des requêtes.
+
+Un motif N+1 se reconnaît à un nombre de requêtes qui croît avec la taille des données :
+mesurer_croissance exécute une opération à plusieurs tailles et compare. Pour un test :
+
+    with maximum_requetes(db, 2):
+        db.get_classement("Bac", "Informatique")
+
+Exécuté comme script, vérifie que chaque méthode publique de Database émet un nombre de
+requêtes indépendant du nombre d'étudiants, sauf exceptions justifiées.
+
+Usage : python traceur_requetes.py
+"""
+import inspect
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from database import Database
+from models import Etudiant, Note
+
+
+class RequetesExcessivesError(AssertionError):
+    """Levée par maximum_requetes quand un bloc émet plus de requêtes que permis"""
+    pass
+
+
+_CHAINE = re.compile(r"'(?:[^']|'')*'")
+_NOMBRE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b", re.IGNORECASE)
+_LISTE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def normaliser(sql: str) -> str:
+    """Texte d'une requête sans ses valeurs : deux exécutions de la même requête ont le même texte"""
+    sql = _CHAINE.sub("?", sql)
+    sql = _NOMBRE.sub("?", sql)
+    sql = " ".join(sql.split())
+    return _LISTE.sub("(?, ...)", sql)
+
+
+@dataclass
+class Requete:
+    sql: str                 # texte normalisé
+    debut: float
+    duree: float = 0.0
+    declencheurs: int = 0    # instructions de déclencheurs et de tables virtuelles
+
+
+@dataclass
+class Operation:
+    nom: str
+    requetes: List[Requete] = field(default_factory=list)
+    duree: float = 0.0
+
+    @property
+    def nombre(self) -> int:
+        return len(self.requetes)
+
+    def par_texte(self) -> Counter:
+        """Nombre d'exécutions de chaque requête normalisée"""
+        return Counter(requete.sql for requete in self.requetes)
+
+    def resume(self, lignes: int = 5) -> str:
+        details = "\n".join(f"  {nombre} x {sql[:120]}" for sql, nombre in self.par_texte().most_common(lignes))
+        return f"{self.nom} : {self.nombre} requête(s) en {self.duree * 1000:.1f} ms\n{details}"
+
+
+class TraceurRequetes:
+    """Enregistre les requêtes de la connexion du fil courant de db, par opération.
+
+    Une seule fonction de trace par connexion : le traceur remplace celle en place
+    (verifier_plans, par exemple) le temps du bloc with.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self.operations: List[Operation] = []
+        self._courante: Optional[Operation] = None
+        self._texte_precedent: Optional[str] = None
+        self._conn = None
+
+    def __enter__(self) -> 'TraceurRequetes':
+        self._conn = self.db.conn
+        self._conn.set_trace_callback(self._tracer)
+        return self
+
+    def __exit__(self, *exc):
+        self._conn.set_trace_callback(None)
+        self._conn = None
+
+    def _tracer(self, sql: str):
+        operation = self._courante
+        if operation is None:
+            return
+        maintenant = time.perf_counter()
+        if operation.requetes and (sql.startswith("--") or sql == self._texte_precedent):
+            operation.requetes[-1].declencheurs += 1
+            return
+        self._clore_requete(maintenant)
+        self._texte_precedent = sql
+        operation.requetes.append(Requete(normaliser(sql), maintenant))
+
+    def _clore_requete(self, maintenant: float):
+        if self._courante is not None and self._courante.requetes:
+            derniere = self._courante.requetes[-1]
+            derniere.duree = maintenant - derniere.debut
+
+    @contextmanager
+    def operation(self, nom: str):
+        """Range les requêtes du bloc dans une opération ; un bloc imbriqué reste dans l'opération englobante"""
+        if self._courante is not None:
+            yield self._courante
+            return
+        operation = Operation(nom)
+        self._courante = operation
+        self._texte_precedent = None
+        debut = time.perf_counter()
+        try:
+            yield operation
+        finally:
+            fin = time.perf_counter()
+            self._clore_requete(fin)
+            operation.duree = fin - debut
+            self._courante = None
+            self.operations.append(operation)
+
+    @contextmanager
+    def instrumenter(self):
+        """Fait de chaque appel de méthode publique de db une opération, le temps du bloc"""
+        noms = [nom for nom, _ in inspect.getmembers(type(self.db), inspect.isfunction) if not nom.startswith("_")]
+
+        def envelopper(nom, methode):
+            def appel(*args, **kwargs):
+                with self.operation(nom):
+                    return methode(*args, **kwargs)
+            return appel
+
+        for nom in noms:
+            setattr(self.db, nom, envelopper(nom, getattr(self.db, nom)))
+        try:
+            yield self
+        finally:
+            for nom in noms:
+                delattr(self.db, nom)
+
+    def rapport(self) -> str:
+        return "\n".join(operation.resume() for operation in self.operations)
+
+
+@contextmanager
+def maximum_requetes(db: Database, maximum: int, nom: str = "bloc"):
+    """Lève RequetesExcessivesError si le bloc émet plus de maximum requêtes (pour les tests)"""
+    with TraceurRequetes(db) as traceur, traceur.operation(nom) as operation:
+        yield operation
+    if operation.nombre > maximum:
+        raise RequetesExcessivesError(f"{maximum} requête(s) au plus attendue(s)\n{operation.resume()}")
+
+
+def mesurer_croissance(executer: Callable[[Database, int], object], preparer: Callable[[Database, int], None],
+                       tailles: Sequence[int] = (3, 12)) -> Dict[int, Operation]:
+    """Exécute executer(db, taille) sur une base neuve préparée par preparer(db, taille), pour chaque taille.
+
+    Retourne l'opération tracée de chaque taille ; voir croissance pour l'interpréter.
+    """
+    operations = {}
+    for taille in tailles:
+        with tempfile.TemporaryDirectory() as dossier:
+            db = Database(os.path.join(dossier, "traceur.db"))
+            try:
+                preparer(db, taille)
+                with TraceurRequetes(db) as traceur, traceur.operation(f"taille {taille}") as operation:
+                    executer(db, taille)
+                operations[taille] = operation
+            finally:
+                db.close()
+    return operations
+
+
+def croissance(operations: Dict[int, Operation]) -> Counter:
+    """Requêtes normalisées exécutées davantage à la plus grande taille qu'à la plus petite (vide si aucune)"""
+    petite, grande = operations[min(operations)], operations[max(operations)]
+    return grande.par_texte() - petite.par_texte()
+
+
+NIVEAU = "Bac"
+FILIERE = "Informatique"
+
+# Méthodes qui n'émettent aucune requête SQL (ou seulement des PRAGMA)
+SANS_SQL = {"valider_date", "close", "appliquer_profil", "profil_temporaire"}
+
+# Requêtes dont le nombre croît forcément (début du texte normalisé), avec leur justification
+CROISSANCES_AUTORISEES = {
+    "ajouter_notes_bulk": ("INSERT INTO notes", "une exécution par note de l'executemany, une transaction par lot"),
+    "ajouter_etudiants_bulk": ("INSERT INTO etudiants", "une exécution par étudiant de l'executemany, une transaction par lot"),
+}
+
+
+def _etudiant(i: int, nom: str = "Nom") -> Etudiant:
+    return Etudiant(f"ETU{i:04d}", f"{nom}{i}", f"Prenom{i}", "2006-01-01", "F", FILIERE, NIVEAU)
+
+
+def _remplir(db: Database, taille: int):
+    """taille étudiants dans la classe, chacun avec toutes ses notes"""
+    matieres = db.get_matieres(NIVEAU, FILIERE)
+    db.ajouter_etudiants_bulk(_etudiant(i) for i in range(taille))
+    db.ajouter_notes_bulk((f"ETU{i:04d}", matiere.id, 12.0, 14.0, trimestre)
+                          for i in range(taille) for matiere in matieres for trimestre in (1, 2, 3))
+
+
+def _notes_nouvelles(db: Database, taille: int):
+    """Une note de chaque étudiant existant (les lots restent sous la taille de lot)"""
+    matiere = db.get_matieres(NIVEAU, FILIERE)[0]
+    return [(f"ETU{i:04d}", matiere.id, 9.5, 10.0, 2) for i in range(taille)]
+
+
+# Chaque scénario reçoit une base de taille étudiants ; une méthode qui prend une liste en reçoit une de taille éléments
+SCENARIOS = {
+    "create_tables": lambda db, n: db.create_tables(),
+    "ajouter_matieres_par_defaut": lambda db, n: db.ajouter_matieres_par_defaut(),
+    "get_matieres": lambda db, n: db.get_matieres(NIVEAU, FILIERE),
+    "ajouter_note": lambda db, n: db.ajouter_note(Note(None, "ETU0000", db.get_matieres(NIVEAU, FILIERE)[0].id,
+                                                       10.0, 11.0, 1)),
+    "ajouter_notes_bulk": lambda db, n: db.ajouter_notes_bulk(_notes_nouvelles(db, n), niveau=NIVEAU, filiere=FILIERE),
+    "get_notes_etudiant": lambda db, n: db.get_notes_etudiant("ETU0000"),
+    "get_notes_cohorte": lambda db, n: db.get_notes_cohorte(NIVEAU, FILIERE),
+    "calculer_moyenne_generale": lambda db, n: db.calculer_moyenne_generale("ETU0000"),
+    "get_classement": lambda db, n: db.get_classement(NIVEAU, FILIERE),
+    "get_etudiants_by_niveau_filiere": lambda db, n: db.get_etudiants_by_niveau_filiere(NIVEAU, FILIERE),
+    "ajouter_etudiant": lambda db, n: db.ajouter_etudiant(_etudiant(9999, "Nouveau")),
+    "ajouter_etudiants_bulk": lambda db, n: db.ajouter_etudiants_bulk(_etudiant(5000 + i, "Lot") for i in range(n)),
+    "rechercher_etudiant": lambda db, n: db.rechercher_etudiant("ETU0001"),
+    "rechercher_etudiants": lambda db, n: db.rechercher_etudiants("prenom"),
+    "modifier_etudiant": lambda db, n: db.modifier_etudiant(_etudiant(2, "Modifié")),
+    "get_all_etudiants": lambda db, n: db.get_all_etudiants(),
+    "supprimer_etudiant": lambda db, n: db.supprimer_etudiant("ETU0001"),
+    "verifier_moyennes": lambda db, n: db.verifier_moyennes(),
+    "reconstruire_moyennes": lambda db, n: db.reconstruire_moyennes(),
+    "reconstruire_recherche": lambda db, n: db.reconstruire_recherche(),
+}
+
+
+def verifier(tailles: Sequence[int] = (3, 12)) -> List[str]:
+    """Exécute tous les scénarios à chaque taille et retourne la liste des échecs"""
+    echecs = []
+    publiques = {nom for nom, _ in inspect.getmembers(Database, inspect.isfunction) if not nom.startswith("_")}
+    for nom in sorted(publiques - set(SCENARIOS) - SANS_SQL):
+        echecs.append(f"{nom}: aucun scénario de vérification")
+
+    for nom, scenario in SCENARIOS.items():
+        operations = mesurer_croissance(scenario, _remplir, tailles)
+        comptes = " -> ".join(str(operations[taille].nombre) for taille in tailles)
+        surplus = croissance(operations)
+        autorisee = CROISSANCES_AUTORISEES.get(nom, (None, None))[0]
+        statut = "croissance justifiée" if surplus else "ok"
+        if autorisee:
+            surplus = Counter({sql: nombre for sql, nombre in surplus.items() if not sql.startswith(autorisee)})
+        if surplus:
+            statut = "N+1"
+            details = "\n".join(f"    +{nombre} x {sql[:140]}" for sql, nombre in surplus.most_common(5))
+            echecs.append(f"{nom}: {comptes} requêtes pour {' -> '.join(map(str, tailles))} étudiants\n{details}")
+        print(f"{nom:<32} {comptes:>12}   {statut}")
+    return echecs
+
+
+if __name__ == "__main__":
+    echecs = verifier()
+    for echec in echecs:
+        print(f"ÉCHEC {echec}")
+    if echecs:
+        sys.exit(1)
+    print(f"{len(SCENARIOS)} méthodes vérifiées : nombre de requêtes indépendant du nombre d'étudiants")
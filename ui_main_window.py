@@ -44,15 +44,15 @@ class Ui_MainWindow(object):
                 border-radius: 4px;
                 background-color: white;
             }
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 border: 1px solid #ddd;
                 border-radius: 4px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #2196F3;
                 color: white;
             }
@@ -144,12 +144,8 @@ class Ui_MainWindow(object):
         self.table_frame.setStyleSheet("QFrame { background-color: white; border-radius: 8px; padding: 10px; }")
         self.table_layout = QtWidgets.QVBoxLayout(self.table_frame)
         
-        self.table_etudiants = QtWidgets.QTableWidget()
-        self.table_etudiants.setColumnCount(7)
-        self.table_etudiants.setHorizontalHeaderLabels([
-            "Matricule", "Nom", "Prénom", "Date de naissance",
-            "Sexe", "Filière", "Niveau"
-        ])
+        self.table_etudiants = QtWidgets.QTableView()
+        self.table_etudiants.setObjectName("table_etudiants")
         
         # Configuration de la table
         self.table_etudiants.horizontalHeader().setStretchLastSection(True)
@@ -157,9 +153,9 @@ class Ui_MainWindow(object):
             QtWidgets.QHeaderView.Stretch)
         self.table_etudiants.setAlternatingRowColors(True)
         self.table_etudiants.setSelectionBehavior(
-            QtWidgets.QTableWidget.SelectRows)
+            QtWidgets.QTableView.SelectRows)
         self.table_etudiants.setSelectionMode(
-            QtWidgets.QTableWidget.SingleSelection)
+            QtWidgets.QTableView.SingleSelection)
         
         self.table_layout.addWidget(self.table_etudiants)
         self.main_layout.addWidget(self.table_frame)
@@ -196,17 +192,3 @@ class Ui_MainWindow(object):
         self.btn_ajouter.setText(_translate("MainWindow", "Insertion"))
         self.btn_modifier.setText(_translate("MainWindow", "Modification"))
         self.btn_supprimer.setText(_translate("MainWindow", "Suppression"))
-        item = self.table_etudiants.horizontalHeaderItem(0)
-        item.setText(_translate("MainWindow", "Matricule"))
-        item = self.table_etudiants.horizontalHeaderItem(1)
-        item.setText(_translate("MainWindow", "Nom"))
-        item = self.table_etudiants.horizontalHeaderItem(2)
-        item.setText(_translate("MainWindow", "Prénom"))
-        item = self.table_etudiants.horizontalHeaderItem(3)
-        item.setText(_translate("MainWindow", "Date de naissance"))
-        item = self.table_etudiants.horizontalHeaderItem(4)
-        item.setText(_translate("MainWindow", "Sexe"))
-        item = self.table_etudiants.horizontalHeaderItem(5)
-        item.setText(_translate("MainWindow", "Filière"))
-        item = self.table_etudiants.horizontalHeaderItem(6)
-        item.setText(_translate("MainWindow", "Niveau"))
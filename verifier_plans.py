@@ -0,0 +1,179 @@
+"""Vérification des plans de requêtes de la classe Database.
+
+Chaque méthode publique de Database est exécutée sur une base temporaire ; les requêtes
+qu'elle émet sont capturées puis passées à EXPLAIN QUERY PLAN. Les instructions des
+déclencheurs sont vérifiées de la même façon. La vérification échoue si une requête
+parcourt entièrement une table sans index, construit un index automatique ou trie via
+un B-tree temporaire. Une table virtuelle (index plein texte) est considérée comme parcourue
+entièrement quand aucune contrainte (MATCH, rowid) n'est transmise à son module.
+
+Usage : python verifier_plans.py
+"""
+import inspect
+import os
+import re
+import sys
+import tempfile
+from typing import Dict, List, Set
+
+from database import Database
+from models import Etudiant, Note
+
+NIVEAU = "Bac"
+FILIERE = "Informatique"
+
+# Méthodes qui n'émettent aucune requête SQL (ou seulement des PRAGMA)
+SANS_SQL = {"valider_date", "close", "appliquer_profil", "profil_temporaire"}
+
+# B-trees temporaires inévitables, avec leur justification
+TRIS_AUTORISES = {
+    "get_classement": "RANK() porte sur des moyennes issues d'une jointure, qu'aucun index ne peut servir",
+    "ajouter_notes_bulk": "le recalcul des étudiants d'un lot groupe leurs notes par matière",
+    "verifier_moyennes": "le recalcul de référence groupe des agrégats calculés",
+    "reconstruire_moyennes": "le recalcul complet groupe des agrégats calculés",
+    "declencheurs": "le recalcul d'un étudiant groupe ses quelques notes par matière",
+}
+
+# Parcours complets inévitables, avec leur justification
+PARCOURS_AUTORISES = {
+    "verifier_moyennes": "la vérification compare toutes les notes à toutes les moyennes",
+    "reconstruire_moyennes": "la reconstruction relit toutes les notes",
+    "reconstruire_recherche": "la reconstruction réindexe tous les étudiants",
+}
+
+# Tables parcourues entièrement par construction, quelle que soit la méthode
+TABLES_PARCOURUES = {
+    "recherche_a_indexer": "file d'attente des étudiants à indexer, vidée à chaque écriture",
+}
+
+MOTS_CLES = {"WHERE", "ON", "JOIN", "LEFT", "INNER", "CROSS", "GROUP", "ORDER", "LIMIT", "USING", "SET", "VALUES"}
+
+
+def _remplir(db: Database):
+    """Insère un petit jeu de données pour que chaque méthode ait du travail réel"""
+    matieres = db.get_matieres(NIVEAU, FILIERE)
+    for i in range(5):
+        etudiant = Etudiant(f"ETU{i:04d}", f"Nom{i}", f"Prenom{i}", "2006-01-01", "F", FILIERE, NIVEAU)
+        db.ajouter_etudiant(etudiant)
+        for matiere in matieres:
+            for trimestre in (1, 2, 3):
+                db.ajouter_note(Note(None, etudiant.matricule, matiere.id, 12.0, 14.0, trimestre))
+
+
+SCENARIOS = {
+    "create_tables": lambda db: db.create_tables(),
+    "ajouter_matieres_par_defaut": lambda db: db.ajouter_matieres_par_defaut(),
+    "get_matieres": lambda db: db.get_matieres(NIVEAU, FILIERE),
+    "ajouter_note": lambda db: db.ajouter_note(Note(None, "ETU0000", db.get_matieres(NIVEAU, FILIERE)[0].id, 10.0, 11.0, 1)),
+    "ajouter_notes_bulk": lambda db: db.ajouter_notes_bulk(
+        [("ETU0001", m.id, 9.5, 10.0, 2) for m in db.get_matieres(NIVEAU, FILIERE)], niveau=NIVEAU, filiere=FILIERE),
+    "get_notes_etudiant": lambda db: db.get_notes_etudiant("ETU0000"),
+    "get_notes_cohorte": lambda db: db.get_notes_cohorte(NIVEAU, FILIERE),
+    "calculer_moyenne_generale": lambda db: db.calculer_moyenne_generale("ETU0000"),
+    "get_classement": lambda db: db.get_classement(NIVEAU, FILIERE),
+    "get_etudiants_by_niveau_filiere": lambda db: db.get_etudiants_by_niveau_filiere(NIVEAU, FILIERE),
+    "ajouter_etudiant": lambda db: db.ajouter_etudiant(
+        Etudiant("ETU9999", "Nouveau", "Etudiant", "2006-01-01", "H", FILIERE, NIVEAU)),
+    "ajouter_etudiants_bulk": lambda db: db.ajouter_etudiants_bulk(
+        [Etudiant(f"ETU8{i:03d}", "Lot", "Etudiant", "2006-01-01", "F", FILIERE, NIVEAU) for i in range(3)]
+        + [Etudiant("ETU0000", "Doublon", "Etudiant", "2006-01-01", "F", FILIERE, NIVEAU)]),
+    "rechercher_etudiant": lambda db: db.rechercher_etudiant("ETU0001"),
+    "rechercher_etudiants": lambda db: db.rechercher_etudiants("prénom1"),
+    "modifier_etudiant": lambda db: db.modifier_etudiant(
+        Etudiant("ETU0002", "Modifié", "Etudiant", "2006-01-01", "H", FILIERE, NIVEAU)),
+    "get_all_etudiants": lambda db: db.get_all_etudiants(),
+    "supprimer_etudiant": lambda db: db.supprimer_etudiant("ETU0004"),
+    "verifier_moyennes": lambda db: db.verifier_moyennes(),
+    "reconstruire_moyennes": lambda db: db.reconstruire_moyennes(),
+    "reconstruire_recherche": lambda db: db.reconstruire_recherche(),
+}
+
+
+def _tables_et_alias(db: Database, sql: str) -> Dict[str, str]:
+    """Associe chaque nom (ou alias) apparaissant après FROM/JOIN à sa table réelle"""
+    tables = {row[0] for row in db.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    alias = {}
+    for table, nom in re.findall(r"(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", sql, re.IGNORECASE):
+        if table in tables:
+            alias[table] = table
+            if nom and nom.upper() not in MOTS_CLES:
+                alias[nom] = table
+    return alias
+
+
+def _problemes(db: Database, sql: str, tri_autorise: bool, parcours_autorise: bool = False,
+               parametres: Dict[str, None] = None) -> List[str]:
+    alias = _tables_et_alias(db, sql)
+    problemes = []
+    for _, _, _, detail in db.conn.execute("EXPLAIN QUERY PLAN " + sql, parametres or {}):
+        if "USE TEMP B-TREE" in detail:
+            if not tri_autorise:
+                problemes.append(detail)
+            continue
+        match = re.match(r"(SCAN|SEARCH) (\S+)", detail)
+        if not match or match.group(2) not in alias:
+            continue  # CTE, sous-requête ou ligne constante
+        contrainte_virtuelle = re.search(r"VIRTUAL TABLE INDEX \d+:\S", detail)
+        if "AUTOMATIC" in detail:
+            problemes.append(detail)
+        elif (match.group(1) == "SCAN" and "USING" not in detail and not contrainte_virtuelle
+              and not parcours_autorise and alias[match.group(2)] not in TABLES_PARCOURUES):
+            problemes.append(detail)
+    return problemes
+
+
+def _verifier_declencheurs(db: Database) -> List[str]:
+    """Vérifie chaque instruction des déclencheurs, NEW.x et OLD.x devenant des paramètres"""
+    echecs = []
+    declencheurs = db.conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").fetchall()
+    for nom, sql in declencheurs:
+        corps = re.search(r"\bBEGIN\b(.*)\bEND\s*$", sql, re.DOTALL | re.IGNORECASE).group(1)
+        for instruction in corps.split(";"):
+            if not instruction.strip():
+                continue
+            instruction = re.sub(r"\b(NEW|OLD)\.(\w+)", r":\1_\2", instruction)
+            parametres = dict.fromkeys(re.findall(r":(\w+)", instruction))
+            for detail in _problemes(db, instruction, "declencheurs" in TRIS_AUTORISES, parametres=parametres):
+                echecs.append(f"{nom}: {detail}\n    {' '.join(instruction.split())[:160]}")
+    return echecs
+
+
+def verifier() -> List[str]:
+    """Exécute tous les scénarios et retourne la liste des échecs"""
+    echecs = []
+    publiques: Set[str] = {
+        nom for nom, _ in inspect.getmembers(Database, inspect.isfunction) if not nom.startswith("_")
+    }
+    for nom in sorted(publiques - set(SCENARIOS) - SANS_SQL):
+        echecs.append(f"{nom}: aucun scénario de vérification")
+
+    with tempfile.TemporaryDirectory() as dossier:
+        db = Database(os.path.join(dossier, "plans.db"))
+        try:
+            _remplir(db)
+            for nom, scenario in SCENARIOS.items():
+                requetes = []
+                db.conn.set_trace_callback(requetes.append)
+                try:
+                    scenario(db)
+                finally:
+                    db.conn.set_trace_callback(None)
+                for sql in requetes:
+                    instruction = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+                    if instruction not in ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT"):
+                        continue
+                    for detail in _problemes(db, sql, nom in TRIS_AUTORISES, nom in PARCOURS_AUTORISES):
+                        echecs.append(f"{nom}: {detail}\n    {' '.join(sql.split())[:160]}")
+            echecs.extend(_verifier_declencheurs(db))
+        finally:
+            db.close()
+    return echecs
+
+
+if __name__ == "__main__":
+    echecs = verifier()
+    for echec in echecs:
+        print(f"ÉCHEC {echec}")
+    if echecs:
+        sys.exit(1)
+    print(f"{len(SCENARIOS)} méthodes et les déclencheurs vérifiés, aucun parcours complet ni tri temporaire")